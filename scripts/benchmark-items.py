@@ -0,0 +1,61 @@
+"""Benchmarks Item creation and serialization throughput in Items/sec.
+
+Usage: python scripts/benchmark-items.py [number of Items]
+"""
+import os
+import sys
+import time
+from tempfile import TemporaryDirectory
+from typing import Callable
+
+from stactools.noaa_nclimgrid import stac, utils
+from stactools.noaa_nclimgrid.constants import Variable
+
+COG_DIR = os.path.join(
+    os.path.dirname(__file__), "..", "tests", "data-files", "cog", "monthly"
+)
+COG_HREFS = {
+    var: os.path.join(COG_DIR, f"nclimgrid-{var.value}-189501.tif") for var in Variable
+}
+
+
+def rate(count: int, function: Callable[[int], None]) -> float:
+    start = time.perf_counter()
+    for index in range(count):
+        function(index)
+    return count / (time.perf_counter() - start)
+
+
+def main(count: int) -> None:
+    print(f"orjson installed: {utils.HAS_ORJSON}")
+
+    def create_item(_: int) -> None:
+        stac.create_item(COG_HREFS)
+
+    item_factory = stac.ItemFactory()
+
+    def create_factory_item(_: int) -> None:
+        item_factory.create_item(COG_HREFS)
+
+    print(f"create_item:             {rate(count, create_item):10.1f} Items/sec")
+    print(
+        f"ItemFactory.create_item: {rate(count, create_factory_item):10.1f} Items/sec"
+    )
+
+    item = item_factory.create_item(COG_HREFS)
+    with TemporaryDirectory() as tmp_dir:
+
+        def save_object(index: int) -> None:
+            item.set_self_href(os.path.join(tmp_dir, f"pystac-{index}.json"))
+            item.save_object(include_self_link=False)
+
+        def save_item(index: int) -> None:
+            item.set_self_href(os.path.join(tmp_dir, f"fast-{index}.json"))
+            utils.save_item(item)
+
+        print(f"Item.save_object:        {rate(count, save_object):10.1f} Items/sec")
+        print(f"save_item:               {rate(count, save_item):10.1f} Items/sec")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
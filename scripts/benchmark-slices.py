@@ -0,0 +1,62 @@
+"""Benchmarks reading netCDF time slices with xarray and with the direct HDF5
+SliceReader, in slices/sec. The HREF can be local or remote.
+
+Usage: python scripts/benchmark-slices.py <netCDF href> [number of slices]
+"""
+import os
+import sys
+import time
+from typing import Any, Callable
+
+import numpy as np
+import xarray
+
+from stactools.noaa_nclimgrid.constants import Variable
+from stactools.noaa_nclimgrid.hdf5 import open_slice_reader
+from stactools.noaa_nclimgrid.session import (
+    DatasetCache,
+    FileSystemSession,
+    open_href,
+)
+
+
+def rate(count: int, function: Callable[[int], Any]) -> float:
+    start = time.perf_counter()
+    for index in range(count):
+        function(index)
+    return count / (time.perf_counter() - start)
+
+
+def main(href: str, count: int) -> None:
+    var = next(v.value for v in Variable if v.value in os.path.basename(href))
+    session = FileSystemSession()
+    with open_href(href, session) as f:
+        with xarray.open_dataset(f) as dataset:
+            num_times = dataset.sizes["time"]
+
+    def read_xarray(index: int) -> np.ndarray:
+        with open_href(href, session) as f:
+            with xarray.open_dataset(f) as dataset:
+                values = dataset[var].isel(time=index % num_times).values
+                if dataset.lat.values[0] < dataset.lat.values[-1]:
+                    values = np.flipud(values)
+        return values
+
+    def read_direct(index: int) -> np.ndarray:
+        with open_slice_reader(href, session) as reader:
+            return reader.read(var, index % num_times)
+
+    warm_session = FileSystemSession(datasets=DatasetCache())
+
+    def read_warm(index: int) -> np.ndarray:
+        with open_slice_reader(href, warm_session) as reader:
+            return reader.read(var, index % num_times)
+
+    assert np.array_equal(read_xarray(0), read_direct(0), equal_nan=True)
+    print(f"xarray:             {rate(count, read_xarray):8.2f} slices/sec")
+    print(f"SliceReader:        {rate(count, read_direct):8.2f} slices/sec")
+    print(f"SliceReader (warm): {rate(count, read_warm):8.2f} slices/sec")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 20)
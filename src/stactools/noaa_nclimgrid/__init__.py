@@ -2,8 +2,9 @@ import stactools.core
 from stactools.cli.registry import Registry
 
 from stactools.noaa_nclimgrid.stac import create_collection, create_items
+from stactools.noaa_nclimgrid.utils import CachedReadHrefModifier
 
-__all__ = ["create_items", "create_collection"]
+__all__ = ["create_items", "create_collection", "CachedReadHrefModifier"]
 
 stactools.core.use_fsspec()
 
@@ -0,0 +1,194 @@
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas
+import xarray
+from numpy.typing import NDArray
+from pystac import Item
+from stactools.core.io import ReadHrefModifier
+
+from stactools.noaa_nclimgrid import constants
+from stactools.noaa_nclimgrid.cog import GTIFF_PROFILE, write_cog
+from stactools.noaa_nclimgrid.constants import (
+    Aggregation,
+    CollectionType,
+    Frequency,
+    Variable,
+)
+from stactools.noaa_nclimgrid.session import FileSystemSession, open_href
+from stactools.noaa_nclimgrid.stac import ItemFactory
+from stactools.noaa_nclimgrid.utils import (
+    cached_read_href_modifier,
+    cog_asset_dict,
+    modify_href,
+    nc_href_dict,
+)
+
+
+class DailyAggregate:
+    """Running per-pixel sums and counts of daily values for one aggregation
+    period, e.g., a month or a year.
+
+    Args:
+        shape (Tuple[int, int]): Shape of the daily time slices.
+    """
+
+    def __init__(self, shape: Tuple[int, int]):
+        self.sums = {var: np.zeros(shape, dtype=np.float64) for var in Variable}
+        self.counts = {var: np.zeros(shape, dtype=np.int32) for var in Variable}
+        self.dates: List[datetime] = []
+
+    def add(self, var: Variable, values: NDArray[Any]) -> None:
+        """Adds a stack of daily time slices of a variable.
+
+        Args:
+            var (Variable): Variable.
+            values (NDArray[Any]): Daily time slices, stacked along the first
+                axis. NaN pixels are skipped.
+        """
+        self.sums[var] += np.nansum(values, axis=0, dtype=np.float64)
+        self.counts[var] += np.isfinite(values).sum(axis=0, dtype=np.int32)
+
+    def values(self, var: Variable) -> NDArray[Any]:
+        """Returns the aggregated values of a variable: the precipitation
+        total, or the mean of the daily temperatures.
+
+        Args:
+            var (Variable): Variable.
+
+        Returns:
+            NDArray[Any]: float32 aggregated values, NaN for pixels without
+                data.
+        """
+        count = self.counts[var]
+        if var == Variable.PRCP:
+            values = np.where(count > 0, self.sums[var], np.nan)
+        else:
+            values = np.divide(
+                self.sums[var],
+                count,
+                out=np.full(count.shape, np.nan),
+                where=count > 0,
+            )
+        return values.astype(np.float32)
+
+
+def create_aggregate_items(
+    nc_hrefs: List[str],
+    cog_dir: str,
+    aggregation: Aggregation = Aggregation.MONTHLY,
+    read_href_modifier: Optional[ReadHrefModifier] = None,
+    session: Optional[FileSystemSession] = None,
+) -> Tuple[List[Item], List[str]]:
+    """Creates monthly or annual COGs and STAC Items aggregated from daily
+    netCDF files.
+
+    Precipitation is summed and temperatures are averaged over the days in
+    each month or year. Each daily netCDF file (one month of data) is read
+    once per variable and aggregated along the time axis with NumPy. Days
+    that do not yet contain data (precipitation fill values) are skipped, so
+    the Items for incomplete months or years end on the last day with data.
+
+    Args:
+        nc_hrefs (List[str]): HREFs to daily netCDF files, one per group of
+            four variable files. For annual aggregates, pass the files for
+            all months of the year.
+        cog_dir (str): Local destination directory for created COGs.
+        aggregation (Aggregation): Aggregation period, 'monthly' or
+            'annual'. Default is 'monthly'.
+        read_href_modifier (Optional[ReadHrefModifier]): An optional function
+            to modify an href (e.g., to add a token to a url).
+        session (Optional[FileSystemSession]): Optional shared filesystem
+            session used to open the netCDF files.
+
+    Returns:
+        Tuple[List[Item], List[str]]:
+            1. A list of created STAC Items, one per aggregation period and
+               daily type (prelim or scaled).
+            2. A list of HREFs to the created COGs.
+    """
+    read_href_modifier = cached_read_href_modifier(read_href_modifier)
+    if session is None:
+        session = FileSystemSession()
+
+    shape = (GTIFF_PROFILE["height"], GTIFF_PROFILE["width"])
+    aggregates: Dict[Tuple[str, str], DailyAggregate] = {}
+    for nc_href in nc_hrefs:
+        if Frequency.from_href(nc_href) != Frequency.DAILY:
+            raise ValueError(
+                f"Aggregates can only be created from daily data: {nc_href}"
+            )
+        daily_type = CollectionType.from_href(nc_href)[6:]
+
+        valid = None
+        for var, href in nc_href_dict(nc_href).items():
+            read_href = modify_href(href, read_href_modifier=read_href_modifier)
+            dates, values = _read_cube(read_href, var, session)
+            if valid is None:
+                # Days not yet containing data hold negative fill values.
+                valid = np.nanmin(values, axis=(1, 2)) >= 0
+                dates = [date for date, is_valid in zip(dates, valid) if is_valid]
+                if not dates:
+                    break
+                key = (dates[0].strftime(_key_format(aggregation)), daily_type)
+                aggregate = aggregates.setdefault(key, DailyAggregate(shape))
+                if set(aggregate.dates) & set(dates):
+                    raise ValueError(f"Days in {nc_href} are already aggregated")
+                aggregate.dates.extend(dates)
+            aggregate.add(var, values[valid])
+
+    items: List[Item] = []
+    cogs: List[str] = []
+    item_factory = ItemFactory()
+    for (period, daily_type), aggregate in sorted(aggregates.items()):
+        item_id = f"{period}-grd-{daily_type}-{aggregation.value}"
+        assets = {}
+        for var in Variable:
+            cog_path = os.path.join(cog_dir, f"{var.value}-{item_id}.tif")
+            write_cog(aggregate.values(var), cog_path)
+            cogs.append(cog_path)
+            assets[var.value] = {
+                **_asset_dict(aggregation, var),
+                "href": cog_path,
+            }
+
+        item = item_factory.create_derived_item(
+            item_id,
+            min(aggregate.dates),
+            max(aggregate.dates) + timedelta(hours=23, minutes=59, seconds=59),
+            assets,
+        )
+        item.properties["nclimgrid:daily_type"] = daily_type
+        item.properties["nclimgrid:aggregated_days"] = len(aggregate.dates)
+        items.append(item)
+
+    return items, cogs
+
+
+def _read_cube(
+    href: str, var: str, session: Optional[FileSystemSession]
+) -> Tuple[List[datetime], NDArray[Any]]:
+    with open_href(href, session) as file_object:
+        with xarray.open_dataset(file_object) as dataset:
+            values: NDArray[Any] = dataset[var].values
+            if dataset.lat.values[0] < dataset.lat.values[-1]:
+                values = values[:, ::-1]
+            dates = pandas.DatetimeIndex(dataset.time.values).to_pydatetime()
+    return list(dates), values
+
+
+def _key_format(aggregation: Aggregation) -> str:
+    return "%Y%m" if aggregation == Aggregation.MONTHLY else "%Y"
+
+
+def _asset_dict(aggregation: Aggregation, var: Variable) -> Dict[str, Any]:
+    statistic = "Total" if var == Variable.PRCP else "Mean"
+    return {
+        **cog_asset_dict(Frequency.MONTHLY, var),
+        "title": (
+            f"{aggregation.value.capitalize()} {statistic} "
+            f"{constants.COG_ASSET_TITLES[var]} from Daily Data"
+        ),
+    }
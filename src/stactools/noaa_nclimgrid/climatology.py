@@ -0,0 +1,261 @@
+import calendar
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas
+import xarray
+from numpy.typing import NDArray
+from pystac import Item
+from stactools.core.io import ReadHrefModifier
+
+from stactools.noaa_nclimgrid import constants
+from stactools.noaa_nclimgrid.cog import GTIFF_PROFILE, write_cog
+from stactools.noaa_nclimgrid.constants import Frequency, Variable
+from stactools.noaa_nclimgrid.mask import LandMask
+from stactools.noaa_nclimgrid.session import FileSystemSession, open_href
+from stactools.noaa_nclimgrid.stac import ItemFactory
+from stactools.noaa_nclimgrid.utils import (
+    cached_read_href_modifier,
+    cog_asset_dict,
+    modify_href,
+    nc_href_dict,
+)
+
+# WMO standard climate normals period, as start and end YYYYMM dates.
+NORMALS_PERIOD = ("199101", "202012")
+
+# Number of time slices read at once (one year of monthly data, ~40 MiB).
+TIME_BLOCK = 12
+
+
+class MonthlyAccumulator:
+    """Running per-pixel mean and variance for each calendar month.
+
+    Uses Welford's algorithm, so memory use does not depend on the number of
+    time slices added: 12 counts, means, and sums of squared differences per
+    pixel (~200 MiB for the NClimGrid grid). NaN pixels are skipped.
+
+    Args:
+        shape (Tuple[int, ...]): Shape of the time slices, e.g., the grid
+            shape, or the number of valid pixels for time slices compressed
+            with :py:meth:`LandMask.compress`.
+    """
+
+    def __init__(self, shape: Tuple[int, ...]):
+        self.count = np.zeros((12, *shape), dtype=np.int32)
+        self.mean = np.zeros((12, *shape), dtype=np.float64)
+        self.m2 = np.zeros((12, *shape), dtype=np.float64)
+
+    def add(self, month: int, values: NDArray[Any]) -> None:
+        """Adds a time slice to the statistics of a calendar month.
+
+        Args:
+            month (int): Calendar month, 1 to 12.
+            values (NDArray[Any]): Time slice.
+        """
+        count = self.count[month - 1]
+        mean = self.mean[month - 1]
+        valid = np.isfinite(values)
+        count += valid
+        delta = np.where(valid, values - mean, 0.0)
+        mean += np.divide(delta, count, out=np.zeros_like(delta), where=count > 0)
+        self.m2[month - 1] += delta * np.where(valid, values - mean, 0.0)
+
+    def statistics(self, month: int) -> Tuple[NDArray[Any], NDArray[Any]]:
+        """Returns the mean and sample standard deviation of a calendar month.
+
+        Args:
+            month (int): Calendar month, 1 to 12.
+
+        Returns:
+            Tuple[NDArray[Any], NDArray[Any]]: float32 mean and standard
+                deviation. Pixels without data are NaN, as are standard
+                deviations of pixels with a single value.
+        """
+        count = self.count[month - 1]
+        mean = np.where(count > 0, self.mean[month - 1], np.nan)
+        variance = np.divide(
+            self.m2[month - 1],
+            count - 1,
+            out=np.full(count.shape, np.nan),
+            where=count > 1,
+        )
+        return mean.astype(np.float32), np.sqrt(variance).astype(np.float32)
+
+
+def create_climatology(
+    nc_href: str,
+    cog_dir: str,
+    period: Tuple[str, str] = NORMALS_PERIOD,
+    anomaly_range: Optional[Tuple[str, str]] = None,
+    read_href_modifier: Optional[ReadHrefModifier] = None,
+    session: Optional[FileSystemSession] = None,
+    land_mask: Optional[LandMask] = None,
+) -> Tuple[List[Item], List[str]]:
+    """Creates climate normal COGs and, optionally, monthly anomaly COGs and
+    their STAC Items from a set of monthly netCDF files.
+
+    For each variable, the time slices within `period` are streamed once
+    from the netCDF file to compute the per-pixel mean and standard deviation
+    of each calendar month. Anomalies (the difference from the calendar
+    month mean) for the months in `anomaly_range` are computed in a second
+    streaming pass.
+
+    Args:
+        nc_href (str): HREF to a monthly netCDF containing data for one of
+            the four variables (prcp, tavg, tmax, tmin).
+        cog_dir (str): Local destination directory for created COGs.
+        period (Tuple[str, str]): Start and end YYYYMM date strings of the
+            normals period. Default is 1991 to 2020.
+        anomaly_range (Optional[Tuple[str, str]]): Optional start and end
+            YYYYMM date strings of the months for which to create anomalies.
+        read_href_modifier (Optional[ReadHrefModifier]): An optional function
+            to modify an href (e.g., to add a token to a url).
+        session (Optional[FileSystemSession]): Optional shared filesystem
+            session used to open the netCDF files.
+        land_mask (Optional[LandMask]): Optional static mask of valid pixels.
+            If present, statistics are only accumulated for pixels inside the
+            mask, which reduces the accumulator memory and update cost by the
+            fraction of pixels outside the mask.
+
+    Returns:
+        Tuple[List[Item], List[str]]:
+            1. A list of created STAC Items: one normals Item per calendar
+               month, followed by one anomaly Item per month in
+               `anomaly_range`.
+            2. A list of HREFs to the created COGs.
+    """
+    if Frequency.from_href(nc_href) != Frequency.MONTHLY:
+        raise ValueError("Climatologies can only be created from monthly data")
+    if period[0] > period[1]:
+        raise ValueError("The end of 'period' must be >= to the start.")
+    if anomaly_range and anomaly_range[0] > anomaly_range[1]:
+        raise ValueError("The end of 'anomaly_range' must be >= to the start.")
+
+    read_href_modifier = cached_read_href_modifier(read_href_modifier)
+    if session is None:
+        session = FileSystemSession()
+
+    years = f"{period[0][:4]}-{period[1][:4]}"
+    normal_assets: Dict[int, Dict[str, Dict[str, Any]]] = {
+        month: {} for month in range(1, 13)
+    }
+    anomaly_assets: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    cogs: List[str] = []
+    for var, href in nc_href_dict(nc_href).items():
+        read_href = modify_href(href, read_href_modifier=read_href_modifier)
+        with open_href(read_href, session) as file_object:
+            with xarray.open_dataset(file_object) as dataset:
+                shape: Tuple[int, ...]
+                if land_mask is None:
+                    shape = (GTIFF_PROFILE["height"], GTIFF_PROFILE["width"])
+                else:
+                    shape = (len(land_mask.indices),)
+                accumulator = MonthlyAccumulator(shape)
+                for date, values in _time_slices(dataset, var, period):
+                    if land_mask is not None:
+                        values = land_mask.compress(values)
+                    accumulator.add(int(date[4:]), values)
+                if not accumulator.count.any():
+                    raise ValueError(f"No data in {href} for period {period}")
+
+                means = {}
+                for month in range(1, 13):
+                    means[month], std = accumulator.statistics(month)
+                    if land_mask is not None:
+                        means[month] = land_mask.expand(means[month])
+                        std = land_mask.expand(std)
+                    for statistic, values in [("mean", means[month]), ("std", std)]:
+                        cog_path = os.path.join(
+                            cog_dir,
+                            f"nclimgrid-{var.value}-normal-{statistic}-{years}"
+                            f"-{month:02d}.tif",
+                        )
+                        write_cog(values, cog_path)
+                        cogs.append(cog_path)
+                        normal_assets[month][f"{var.value}_{statistic}"] = {
+                            **_normal_asset_dict(var, statistic, years, month),
+                            "href": cog_path,
+                        }
+
+                if anomaly_range:
+                    for date, values in _time_slices(dataset, var, anomaly_range):
+                        cog_path = os.path.join(
+                            cog_dir, f"nclimgrid-{var.value}-anomaly-{date}.tif"
+                        )
+                        write_cog(values - means[int(date[4:])], cog_path)
+                        cogs.append(cog_path)
+                        anomaly_assets.setdefault(date, {})[var.value] = {
+                            **_anomaly_asset_dict(var, years),
+                            "href": cog_path,
+                        }
+
+    item_factory = ItemFactory()
+    start_year, end_year = int(period[0][:4]), int(period[1][:4])
+    items = []
+    for month, assets in normal_assets.items():
+        item = item_factory.create_derived_item(
+            f"nclimgrid-normals-{years}-{month:02d}",
+            datetime(start_year, month, 1),
+            _end_of_month(end_year, month),
+            assets,
+        )
+        item.properties["nclimgrid:normals_period"] = years
+        items.append(item)
+    for date, assets in sorted(anomaly_assets.items()):
+        year, month = int(date[:4]), int(date[4:])
+        item = item_factory.create_derived_item(
+            f"nclimgrid-anomaly-{date}",
+            datetime(year, month, 1),
+            _end_of_month(year, month),
+            assets,
+        )
+        item.properties["nclimgrid:normals_period"] = years
+        items.append(item)
+
+    return items, cogs
+
+
+def _time_slices(
+    dataset: xarray.Dataset, var: str, date_range: Tuple[str, str]
+) -> Iterator[Tuple[str, NDArray[Any]]]:
+    dates = pandas.DatetimeIndex(dataset.time.values).strftime("%Y%m")
+    indices = np.flatnonzero((dates >= date_range[0]) & (dates <= date_range[1]))
+    flip = dataset.lat.values[0] < dataset.lat.values[-1]
+    for start in range(0, len(indices), TIME_BLOCK):
+        stop = start + TIME_BLOCK
+        block_indices = indices[start:stop]
+        block = dataset[var].isel(time=block_indices).values
+        if flip:
+            block = block[:, ::-1]
+        for index, values in zip(block_indices, block):
+            yield dates[index], values
+
+
+def _end_of_month(year: int, month: int) -> datetime:
+    return datetime(year, month, calendar.monthrange(year, month)[1], 23, 59, 59)
+
+
+def _normal_asset_dict(
+    var: Variable, statistic: str, years: str, month: int
+) -> Dict[str, Any]:
+    name = "Mean" if statistic == "mean" else "Standard Deviation"
+    return {
+        **cog_asset_dict(Frequency.MONTHLY, var),
+        "title": (
+            f"{years} {calendar.month_name[month]} {name} of Monthly "
+            f"{constants.COG_ASSET_TITLES[var]}"
+        ),
+    }
+
+
+def _anomaly_asset_dict(var: Variable, years: str) -> Dict[str, Any]:
+    return {
+        **cog_asset_dict(Frequency.MONTHLY, var),
+        "title": (
+            f"Monthly {constants.COG_ASSET_TITLES[var]} Anomaly from the {years} "
+            "Mean"
+        ),
+    }
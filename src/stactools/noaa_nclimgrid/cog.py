@@ -1,3 +1,5 @@
+import hashlib
+import json
 import os
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -5,12 +7,18 @@ import fsspec
 import numpy as np
 import rasterio
 import rasterio.shutil
-import xarray
+from numpy.typing import NDArray
 from rasterio.io import MemoryFile
 from stactools.core.io import ReadHrefModifier
 from stactools.core.utils import href_exists
 
-from stactools.noaa_nclimgrid.constants import Variable
+from stactools.noaa_nclimgrid.constants import (
+    QUANTIZED_RASTER_BANDS,
+    Frequency,
+    Variable,
+)
+from stactools.noaa_nclimgrid.hdf5 import open_slice_reader
+from stactools.noaa_nclimgrid.session import FileSystemSession
 from stactools.noaa_nclimgrid.utils import modify_href
 
 TRANSFORM = [0.04166667, 0.0, -124.70833333, 0.0, -0.04166667, 49.37500127]
@@ -26,7 +34,13 @@ GTIFF_PROFILE = {
     "driver": "GTiff",
 }
 
-COG_PROFILE = {"compress": "deflate", "blocksize": 512, "driver": "COG"}
+COG_BLOCKSIZE = 512
+
+COG_PROFILE = {"compress": "deflate", "blocksize": COG_BLOCKSIZE, "driver": "COG"}
+
+# Multihash prefix of a SHA2-256 digest: the function code (0x12) and the
+# digest length in bytes (0x20).
+SHA256_MULTIHASH_PREFIX = "1220"
 
 
 def cog_time_slice(
@@ -34,6 +48,7 @@ def cog_time_slice(
     var: str,
     cog_path: str,
     time_index: int,
+    session: Optional[FileSystemSession] = None,
 ) -> None:
     """Create a COG from a single timeslice of a netCDF DataArray.
 
@@ -45,19 +60,224 @@ def cog_time_slice(
             For daily data, the index is the day of the month. For monthly data,
             the index is the number of months since January 1895 where January
             1895 is month=1.
+        session (Optional[FileSystemSession]): Optional shared filesystem
+            session used to open the netCDF file.
+    """
+    write_cog(read_time_slice(nc_href, var, time_index, session=session), cog_path)
+
+
+def read_time_slice(
+    nc_href: str,
+    var: str,
+    time_index: int,
+    session: Optional[FileSystemSession] = None,
+) -> NDArray[Any]:
+    """Reads a single timeslice of a netCDF DataArray, oriented north-up.
+
+    The timeslice is read with a :py:class:`SliceReader`, which reads and
+    decodes only the HDF5 chunks of the timeslice, without opening the file
+    with xarray.
+
+    Args:
+        nc_href (str): HREF to the netCDF file.
+        var (str): One of 'prcp', 'tavg', 'tmax', or 'tmin'.
+        time_index (int): Zero-based index into the data timestack.
+        session (Optional[FileSystemSession]): Optional shared filesystem
+            session used to open the netCDF file.
+
+    Returns:
+        NDArray[Any]: The timeslice, with the first row at the northern edge.
+    """
+    with open_slice_reader(nc_href, session) as reader:
+        return reader.read(var, time_index)
+
+
+def data_hash(values: NDArray[Any]) -> str:
+    """Computes a hash of the data in an array.
+
+    Args:
+        values (NDArray[Any]): Array to hash.
+
+    Returns:
+        str: Hexadecimal BLAKE2b digest of the array shape, data type, and
+            values.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{values.dtype.str}{values.shape}".encode("utf-8"))
+    digest.update(np.ascontiguousarray(values).tobytes())
+    return digest.hexdigest()
+
+
+def file_properties(data: bytes) -> Dict[str, Any]:
+    """Computes the STAC file extension size and checksum of a file.
+
+    Args:
+        data (bytes): Content of the file.
+
+    Returns:
+        Dict[str, Any]: The `file:size` in bytes and the `file:checksum`, a
+            hexadecimal SHA2-256 multihash.
+    """
+    return {
+        "file:size": len(data),
+        "file:checksum": SHA256_MULTIHASH_PREFIX + hashlib.sha256(data).hexdigest(),
+    }
+
+
+def cog_data_hash(href: str) -> str:
+    """Computes the :py:func:`data_hash` of the data in an existing COG.
+
+    Args:
+        href (str): HREF to the COG.
+
+    Returns:
+        str: Hash of the first band, which matches the hash of the data the
+            COG was created from.
+    """
+    with rasterio.open(href) as dataset:
+        return data_hash(dataset.read(1))
+
+
+def read_hash_manifest(
+    href: str, read_href_modifier: Optional[ReadHrefModifier] = None
+) -> Dict[str, str]:
+    """Reads a manifest of COG data hashes.
+
+    Args:
+        href (str): HREF to a JSON manifest mapping COG file names to the
+            :py:func:`data_hash` of their data.
+        read_href_modifier (Optional[ReadHrefModifier]): An optional function
+            to modify an href (e.g., to add a token to a url).
+
+    Returns:
+        Dict[str, str]: Mapping of COG file names to data hashes. Empty if the
+            manifest does not exist.
+    """
+    data_hashes: Dict[str, str] = _read_manifest(href, read_href_modifier)
+    return data_hashes
+
+
+def write_hash_manifest(href: str, data_hashes: Dict[str, str]) -> None:
+    """Writes a manifest of COG data hashes.
+
+    Args:
+        href (str): Destination HREF for the JSON manifest.
+        data_hashes (Dict[str, str]): Mapping of COG file names to data hashes.
+    """
+    _write_manifest(href, data_hashes)
+
+
+def read_file_manifest(
+    href: str, read_href_modifier: Optional[ReadHrefModifier] = None
+) -> Dict[str, Dict[str, Any]]:
+    """Reads a manifest of COG file sizes and checksums.
+
+    Args:
+        href (str): HREF to a JSON manifest mapping COG file names to their
+            :py:func:`file_properties`.
+        read_href_modifier (Optional[ReadHrefModifier]): An optional function
+            to modify an href (e.g., to add a token to a url).
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Mapping of COG file names to file
+            properties. Empty if the manifest does not exist.
+    """
+    file_info: Dict[str, Dict[str, Any]] = _read_manifest(href, read_href_modifier)
+    return file_info
+
+
+def write_file_manifest(href: str, file_info: Dict[str, Dict[str, Any]]) -> None:
+    """Writes a manifest of COG file sizes and checksums.
+
+    Args:
+        href (str): Destination HREF for the JSON manifest.
+        file_info (Dict[str, Dict[str, Any]]): Mapping of COG file names to
+            file properties.
     """
-    with fsspec.open(nc_href) as file_object:
-        with xarray.open_dataset(file_object) as dataset:
-            values = dataset[var].isel(time=time_index).values
-            latitudes = dataset.lat.values
+    _write_manifest(href, file_info)
+
+
+def _read_manifest(href: str, read_href_modifier: Optional[ReadHrefModifier]) -> Any:
+    read_href = modify_href(href, read_href_modifier)
+    if not href_exists(read_href):
+        return {}
+    with fsspec.open(read_href, "r") as f:
+        return json.load(f)
+
 
-            if latitudes[0] < latitudes[-1]:
-                values = np.flipud(values)
+def _write_manifest(href: str, manifest: Dict[str, Any]) -> None:
+    with fsspec.open(href, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
 
-            with MemoryFile() as mem:
-                with mem.open(**GTIFF_PROFILE) as temp:
-                    temp.write(values, 1)
-                    rasterio.shutil.copy(temp, cog_path, **COG_PROFILE)
+
+def quantize(values: NDArray[Any], band: Dict[str, Any]) -> NDArray[Any]:
+    """Encodes floating point data as integers with a scale and offset.
+
+    Args:
+        values (NDArray[Any]): Floating point data. NaN marks missing data.
+        band (Dict[str, Any]): Encoding with `data_type`, `nodata`, `scale`,
+            and `offset` keys, e.g., from
+            :py:data:`constants.QUANTIZED_RASTER_BANDS`.
+
+    Returns:
+        NDArray[Any]: Integer data, rounded to the nearest step, with
+            `nodata` where `values` is NaN.
+    """
+    scaled = np.round((values.astype(np.float64) - band["offset"]) / band["scale"])
+    valid = np.isfinite(scaled)
+    info = np.iinfo(band["data_type"])
+    out_of_range = valid & (
+        (scaled < info.min) | (scaled > info.max) | (scaled == band["nodata"])
+    )
+    if np.any(out_of_range):
+        raise ValueError(
+            f"{int(np.sum(out_of_range))} value(s) cannot be quantized to "
+            f"{band['data_type']} with scale {band['scale']} and offset "
+            f"{band['offset']}, e.g., {values[out_of_range][0]}"
+        )
+    quantized: NDArray[Any] = np.where(valid, scaled, band["nodata"]).astype(
+        band["data_type"]
+    )
+    return quantized
+
+
+def write_cog(
+    values: NDArray[Any], cog_path: str, band: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Writes a 2D array of north-up NClimGrid data to a COG.
+
+    The COG is encoded in memory and written with a single write, so its
+    size and checksum are computed from the encoded bytes rather than by
+    reading the file back.
+
+    Args:
+        values (NDArray[Any]): Data with the shape of the NClimGrid grid, with
+            the first row at the northern edge.
+        cog_path (str): Destination for created COG file.
+        band (Optional[Dict[str, Any]]): Optional integer encoding of
+            `values`, as passed to :py:func:`quantize`. If present, the COG
+            data type and nodata value are taken from `band`, and its scale
+            and offset are recorded in the COG metadata. Default is float32
+            with NaN nodata.
+
+    Returns:
+        Dict[str, Any]: The STAC file extension properties of the COG, as
+            returned by :py:func:`file_properties`.
+    """
+    profile = GTIFF_PROFILE
+    if band is not None:
+        profile = {**profile, "dtype": band["data_type"], "nodata": band["nodata"]}
+    with MemoryFile() as mem, MemoryFile() as cog:
+        with mem.open(**profile) as temp:
+            temp.write(values, 1)
+            if band is not None:
+                temp.scales = (band["scale"],)
+                temp.offsets = (band["offset"],)
+            rasterio.shutil.copy(temp, cog.name, **COG_PROFILE)
+        data = cog.read()
+    with fsspec.open(cog_path, "wb") as f:
+        f.write(data)
+    return file_properties(data)
 
 
 def create_cogs(
@@ -67,6 +287,10 @@ def create_cogs(
     month: Optional[Dict[str, Any]] = None,
     cog_check_href: Optional[str] = None,
     read_href_modifier: Optional[ReadHrefModifier] = None,
+    session: Optional[FileSystemSession] = None,
+    data_hashes: Optional[Dict[str, str]] = None,
+    quantized: bool = False,
+    file_info: Optional[Dict[str, Dict[str, Any]]] = None,
 ) -> Tuple[Dict[Variable, str], List[str]]:
     """Creates a prcp, tavg, tmax, and tmin COG for a single temporal unit.
 
@@ -87,6 +311,25 @@ def create_cogs(
             COGs are not created if existing COGs are found.
         read_href_modifier (Optional[ReadHrefModifier]): An optional function
             to modify an href (e.g., to add a token to a url).
+        session (Optional[FileSystemSession]): Optional shared filesystem
+            session used to open the netCDF files.
+        data_hashes (Optional[Dict[str, str]]): Optional mapping of COG file
+            names to the hash of their data, as read with
+            :py:func:`read_hash_manifest`. If present, the source data is
+            always read and hashed, and existing COGs are only reused when
+            their recorded hash matches; otherwise a new COG is created.
+            Existing COGs without a recorded hash, e.g., on the first run
+            with a new manifest, are read and hashed instead of being
+            recreated. The mapping is updated in place with these hashes and
+            with the hashes of COGs once they are written.
+        quantized (bool): Flag to write integer COGs with the encodings in
+            :py:data:`constants.QUANTIZED_RASTER_BANDS` instead of float32
+            COGs. Data hashes are computed from the quantized data. Default
+            is False.
+        file_info (Optional[Dict[str, Dict[str, Any]]]): Optional mapping of
+            COG file names to their size and checksum, as returned by
+            :py:func:`write_cog`. The mapping is updated in place for the
+            created COGs.
 
     Returns:
         Tuple[Dict[Variable, str], List[str]]: A tuple consisting of:
@@ -97,32 +340,100 @@ def create_cogs(
     cog_hrefs = {}
     created_cog_hrefs = []
     for var in Variable:
-        cog_exists = False
-        if cog_check_href is not None:
-            existing_cog_href = get_cog_href(
-                nc_hrefs[var], var, cog_check_href, day=day, month=month
-            )
-            read_existing_cog_href = modify_href(existing_cog_href)
-            if href_exists(read_existing_cog_href):
-                cog_exists = True
-                cog_hrefs[var] = existing_cog_href
-
-        if not cog_exists:
-            new_cog_path = get_cog_href(
-                nc_hrefs[var], var, cog_dir, day=day, month=month
-            )
-            read_nc_href = modify_href(nc_hrefs[var], read_href_modifier)
-            if day:
-                time_index = day - 1
-            elif month:
-                time_index = month["idx"] - 1
-            cog_time_slice(read_nc_href, var, new_cog_path, time_index)
-            cog_hrefs[var] = new_cog_path
-            created_cog_hrefs.append(new_cog_path)
+        existing_href = existing_cog_href(
+            nc_hrefs[var], var, cog_check_href, day=day, month=month
+        )
+        if existing_href is not None and data_hashes is None:
+            cog_hrefs[var] = existing_href
+            continue
+
+        new_cog_path = get_cog_href(nc_hrefs[var], var, cog_dir, day=day, month=month)
+        read_nc_href = modify_href(nc_hrefs[var], read_href_modifier)
+        values = read_time_slice(
+            read_nc_href, var, time_index(day=day, month=month), session=session
+        )
+        band = None
+        if quantized:
+            band = QUANTIZED_RASTER_BANDS[Frequency.from_href(nc_hrefs[var])][var]
+            values = quantize(values, band)
+        values_hash = None
+        if data_hashes is not None:
+            cog_name = os.path.basename(new_cog_path)
+            values_hash = data_hash(values)
+            if existing_href is not None and cog_name not in data_hashes:
+                data_hashes[cog_name] = cog_data_hash(
+                    modify_href(existing_href, read_href_modifier)
+                )
+            if existing_href is not None and data_hashes.get(cog_name) == values_hash:
+                cog_hrefs[var] = existing_href
+                continue
+
+        properties = write_cog(values, new_cog_path, band)
+        if data_hashes is not None and values_hash is not None:
+            data_hashes[os.path.basename(new_cog_path)] = values_hash
+        if file_info is not None:
+            file_info[os.path.basename(new_cog_path)] = properties
+        cog_hrefs[var] = new_cog_path
+        created_cog_hrefs.append(new_cog_path)
 
     return cog_hrefs, created_cog_hrefs
 
 
+def existing_cog_href(
+    nc_href: str,
+    var: Variable,
+    cog_check_href: Optional[str],
+    day: Optional[int] = None,
+    month: Optional[Dict[str, Any]] = None,
+) -> Optional[str]:
+    """Returns the HREF of an existing COG for a variable and day or month.
+
+    Args:
+        nc_href (str): NetCDF file HREF
+        var (Variable): Variable
+        cog_check_href (Optional[str]): HREF to a location to check for an
+            existing COG file. If None, no check is made.
+        day (Optional[int], optional): Day of month. Only specify for daily
+            data.
+        month (Optional[Dict[str, Any]], optional): Month index and YYYYMM
+            date, as in the units returned by :py:meth:`TimeIndex.units`.
+            Only specify for monthly data.
+
+    Returns:
+        Optional[str]: The HREF to the existing COG, or None if it does not
+            exist.
+    """
+    if cog_check_href is None:
+        return None
+    cog_href = get_cog_href(nc_href, var, cog_check_href, day=day, month=month)
+    if href_exists(modify_href(cog_href)):
+        return cog_href
+    return None
+
+
+def time_index(
+    day: Optional[int] = None, month: Optional[Dict[str, Any]] = None
+) -> int:
+    """Returns the zero-based index into a netCDF time dimension for a day or
+    month.
+
+    Args:
+        day (Optional[int], optional): Day of month. Only specify for daily
+            data.
+        month (Optional[Dict[str, Any]], optional): Month index and YYYYMM
+            date, as in the units returned by :py:meth:`TimeIndex.units`.
+            Only specify for monthly data.
+
+    Returns:
+        int: Zero-based time index.
+    """
+    if day:
+        return day - 1
+    elif month:
+        return int(month["idx"]) - 1
+    raise ValueError("One of 'day' or 'month' must be specified")
+
+
 def get_cog_href(
     nc_href: str,
     var: Variable,
@@ -1,18 +1,273 @@
+import functools
+import glob
+import json
 import logging
 import os
+from contextlib import ExitStack
 from tempfile import TemporaryDirectory
-from typing import List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import click
 from click import Command, Group
-from pystac import CatalogType, Item
-from stactools.core.copy import move_asset_file_to_item
+from fsspec.core import split_protocol
+from pystac import Asset, CatalogType, Item
 
-from stactools.noaa_nclimgrid import stac
-from stactools.noaa_nclimgrid.constants import CollectionType, Variable
+from stactools.noaa_nclimgrid import (
+    aggregate,
+    climatology,
+    export,
+    partition,
+    stac,
+    timeseries,
+    validation,
+    vrt,
+    worker,
+)
+from stactools.noaa_nclimgrid.constants import (
+    Aggregation,
+    CollectionType,
+    Frequency,
+    Variable,
+)
+from stactools.noaa_nclimgrid.discovery import discover_inputs
+from stactools.noaa_nclimgrid.mask import load_land_mask
+from stactools.noaa_nclimgrid.mirror import DEFAULT_MAX_SIZE, MirrorCache
+from stactools.noaa_nclimgrid.progress import ProgressEvent
+from stactools.noaa_nclimgrid.scheduler import parse_memory, peak_rss
+from stactools.noaa_nclimgrid.session import (
+    DEFAULT_BLOCK_SIZE,
+    DEFAULT_CACHE_TYPE,
+    DEFAULT_MAX_AGE,
+    DEFAULT_MAX_OPEN,
+    DatasetCache,
+    FileSystemSession,
+)
+from stactools.noaa_nclimgrid.utils import relocate_assets, save_item, vrt_asset_dict
 
 logger = logging.getLogger(__name__)
 
+PROGRESS_FORMATS = ["bar", "jsonl", "none"]
+
+
+def _save_collection(
+    items: List[Item],
+    collection_type: CollectionType,
+    outdir: str,
+    nc_assets: bool,
+    copy: bool = False,
+    quantized: bool = False,
+    time_stacks: bool = False,
+) -> None:
+    """Adds Items to a new Collection, moves their COGs alongside them, and
+    saves the validated Collection to OUTDIR. With `time_stacks`, a
+    multi-band VRT of each variable's COGs is added as a Collection asset."""
+    collection = stac.create_collection(collection_type, nc_assets, quantized)
+    collection.catalog_type = CatalogType.SELF_CONTAINED
+    collection_dir = os.path.join(outdir, collection_type.value)
+    collection.set_self_href(os.path.join(collection_dir, "collection.json"))
+
+    collection.add_items(items)
+    collection.update_extent_from_items()
+
+    # Only move the COGs (not the source netCDFs) next to the Items
+    relocate_assets(
+        collection.get_all_items(), [var.value for var in Variable], copy=copy
+    )
+
+    if time_stacks:
+        frequency = (
+            Frequency.MONTHLY
+            if collection_type == CollectionType.MONTHLY
+            else Frequency.DAILY
+        )
+        os.makedirs(collection_dir, exist_ok=True)
+        for var in Variable:
+            filename = f"{var.value}-time-stack.vrt"
+            vrt.create_time_stack_vrt(
+                items, var, os.path.join(collection_dir, filename)
+            )
+            collection.add_asset(
+                f"{var.value}_time_stack",
+                Asset.from_dict(
+                    {**vrt_asset_dict(frequency, var), "href": f"./{filename}"}
+                ),
+            )
+
+    collection.make_all_asset_hrefs_relative()
+
+    collection.validate_all()
+    collection.save()
+
+
+def _print_plan(
+    hrefs: List[str],
+    session: FileSystemSession,
+    quantized: bool,
+    calibrate: bool,
+    **kwargs: Any,
+) -> None:
+    """Prints the totals and per-HREF plans of creating COGs and Items for
+    sets of netCDF files."""
+    calibration = None
+    if calibrate:
+        calibration = partition.calibrate(
+            hrefs[0], session=session, quantized=quantized
+        )
+    plans = [
+        partition.plan_items(
+            href,
+            session=session,
+            quantized=quantized,
+            calibration=calibration,
+            **kwargs,
+        )
+        for href in hrefs
+    ]
+    click.echo(json.dumps(partition.summarize_plans(plans), indent=2))
+
+
+def _discover(
+    root: str, session: FileSystemSession, collection_type: Optional[str]
+) -> List[str]:
+    """Discovers complete sets of netCDF files for command line options and
+    reports incomplete sets."""
+    discovery = discover_inputs(root, session=session)
+    if collection_type is not None:
+        discovery = discovery.filter(CollectionType(collection_type))
+    for href, missing in discovery.incomplete.items():
+        variables = ", ".join(var.value for var in missing)
+        click.echo(f"Skipping incomplete set {href}: missing {variables}", err=True)
+
+    collection_types = discovery.collection_types()
+    if not collection_types:
+        raise click.UsageError(f"No complete sets of netCDF files found in {root}")
+    if len(collection_types) > 1:
+        raise click.UsageError(
+            "Found netCDF files of more than one collection type ("
+            f"{', '.join(t.value for t in collection_types)}); "
+            "use --collection-type"
+        )
+    return discovery.complete
+
+
+def _read_infile(infile: str) -> List[str]:
+    """Reads the netCDF HREFs of an INFILE argument: a single netCDF HREF, or
+    a text file with one HREF per line. Blank lines are skipped and relative
+    local paths are made absolute."""
+    if os.path.splitext(infile)[1] == ".nc":
+        hrefs = [infile]
+    else:
+        with open(infile) as f:
+            hrefs = [line.strip() for line in f if line.strip()]
+    return [
+        href if split_protocol(href)[0] else os.path.abspath(href) for href in hrefs
+    ]
+
+
+class _ProgressReporter:
+    """Reports the progress events of a run on stderr as a progress bar or as
+    JSON lines, or discards them."""
+
+    def __init__(self, progress_format: str, href: str):
+        self.progress_format = progress_format
+        self.label = os.path.basename(href)
+        self._bar: Optional[Any] = None
+        self._exit_stack = ExitStack()
+
+    def __call__(self, event: ProgressEvent) -> None:
+        if self.progress_format == "jsonl":
+            click.echo(json.dumps({"href": self.label, **event.to_dict()}), err=True)
+        elif self.progress_format == "bar":
+            if self._bar is None:
+                self._bar = self._exit_stack.enter_context(
+                    click.progressbar(
+                        length=event.total,
+                        label=self.label,
+                        file=click.get_text_stream("stderr"),
+                        item_show_func=_format_rates,
+                    )
+                )
+            if event.done:
+                self._bar.update(1, event)
+
+    def __enter__(self) -> "_ProgressReporter":
+        return self
+
+    def __exit__(self, *args: Any) -> Optional[bool]:
+        return self._exit_stack.__exit__(*args)
+
+
+def _format_rates(event: Optional[ProgressEvent]) -> Optional[str]:
+    if event is None:
+        return None
+    return (
+        f"{event.cogs_per_second:.1f} COGs/s, read {event.read_mb_per_second:.1f} "
+        f"MB/s, write {event.write_mb_per_second:.1f} MB/s"
+    )
+
+
+def _session(
+    cache_type: str, block_size: int, cache_dir: Optional[str], cache_max_size: int
+) -> FileSystemSession:
+    """Creates a filesystem session from command line options."""
+    mirror = None
+    if cache_dir is not None:
+        mirror = MirrorCache(cache_dir, max_size=cache_max_size)
+    return FileSystemSession(
+        cache_type=cache_type, block_size=block_size, mirror=mirror
+    )
+
+
+def session_options(command: Callable[..., Any]) -> Callable[..., Any]:
+    """Adds the options for reading netCDF files (--cache-type, --block-size,
+    --cache-dir, and --cache-max-size) to a command, which receives the
+    :py:class:`FileSystemSession` built from them as `session`."""
+
+    @functools.wraps(command)
+    def wrapper(
+        *args: Any,
+        cache_type: str,
+        block_size: int,
+        cache_dir: Optional[str],
+        cache_max_size: int,
+        **kwargs: Any,
+    ) -> Any:
+        session = _session(cache_type, block_size, cache_dir, cache_max_size)
+        return command(*args, session=session, **kwargs)
+
+    options = [
+        click.option(
+            "--cache-type",
+            type=str,
+            default=DEFAULT_CACHE_TYPE,
+            show_default=True,
+            help="fsspec cache type for reading netCDF files",
+        ),
+        click.option(
+            "--block-size",
+            type=int,
+            default=DEFAULT_BLOCK_SIZE,
+            show_default=True,
+            help="Block size in bytes for reading netCDF files",
+        ),
+        click.option(
+            "--cache-dir",
+            type=str,
+            help="Local directory in which to mirror remote netCDF files",
+        ),
+        click.option(
+            "--cache-max-size",
+            type=int,
+            default=DEFAULT_MAX_SIZE,
+            show_default=True,
+            help="Maximum size in bytes of the netCDF mirror in --cache-dir",
+        ),
+    ]
+    decorated: Callable[..., Any] = wrapper
+    for option in reversed(options):
+        decorated = option(decorated)
+    return decorated
+
 
 def create_noaa_nclimgrid_command(cli: Group) -> Command:
     """Creates the stactools-noaa-nclimgrid command line utility."""
@@ -30,6 +285,18 @@ def create_noaa_nclimgrid_command(cli: Group) -> Command:
     )
     @click.argument("INFILE")
     @click.argument("OUTDIR")
+    @click.option(
+        "--discover",
+        is_flag=True,
+        default=False,
+        help="List netCDF files in INFILE, a directory or prefix, instead of "
+        "reading HREFs from it",
+    )
+    @click.option(
+        "--collection-type",
+        type=click.Choice([t.value for t in CollectionType]),
+        help="With --discover, only use files of this collection type",
+    )
     @click.option(
         "-n",
         "--nc-assets",
@@ -38,7 +305,60 @@ def create_noaa_nclimgrid_command(cli: Group) -> Command:
         show_default=True,
         help="Include source netCDF file assets in Items",
     )
-    def create_collection_command(infile: str, outdir: str, nc_assets: bool) -> None:
+    @session_options
+    @click.option(
+        "--quantize",
+        "quantized",
+        is_flag=True,
+        default=False,
+        help="Create int16/uint16 COGs with a scale and offset instead of float32",
+    )
+    @click.option(
+        "--time-stacks",
+        is_flag=True,
+        default=False,
+        help="Add a multi-band VRT of each variable's COGs to the Collection",
+    )
+    @click.option(
+        "--dry-run",
+        is_flag=True,
+        default=False,
+        help="Print a plan with cost estimates instead of creating COGs and Items",
+    )
+    @click.option(
+        "--calibrate",
+        is_flag=True,
+        default=False,
+        help="With --dry-run, measure COG size and encoding time on this machine",
+    )
+    @click.option(
+        "--progress",
+        "progress_format",
+        type=click.Choice(PROGRESS_FORMATS),
+        default="bar",
+        show_default=True,
+        help="Progress reporting on stderr: a bar, JSON lines, or none",
+    )
+    @click.option(
+        "--validate-cogs",
+        is_flag=True,
+        default=False,
+        help="Check that created COGs are valid Cloud-Optimized GeoTIFFs",
+    )
+    def create_collection_command(
+        infile: str,
+        outdir: str,
+        nc_assets: bool,
+        session: FileSystemSession,
+        quantized: bool = False,
+        time_stacks: bool = False,
+        dry_run: bool = False,
+        calibrate: bool = False,
+        discover: bool = False,
+        collection_type: Optional[str] = None,
+        progress_format: str = "bar",
+        validate_cogs: bool = False,
+    ) -> None:
         """Creates a STAC Collection with Items generated from the HREFs listed
         in INFILE. COGs are also generated and stored alongside the Items.
 
@@ -46,46 +366,85 @@ def create_noaa_nclimgrid_command(cli: Group) -> Command:
         single HREF to a single variable (prcp, tavg, tmax, or tmin) should be
         listed in the INFILE for each group of netCDF files.
 
+        With --discover, INFILE is instead a local directory or remote prefix
+        that is listed for netCDF files, which are grouped into complete sets
+        of the four variables. Incomplete sets are reported and skipped.
+
         \b
         Args:
-            infile (str): Text file containing one HREF to a netCDF file per
-                line.
+            infile (str): A single netCDF HREF or a text file containing one
+                HREF to a netCDF file per line, or, with `discover`, a
+                directory or prefix.
             outdir (str): Directory that will contain the collection.
             nc_assets (bool): Flag to include source netCDF file assets in
                 created Items. Default is False.
+            session (FileSystemSession): Filesystem session for reading the
+                netCDF files, built from the --cache-type, --block-size,
+                --cache-dir, and --cache-max-size options.
+            quantized (bool): Flag to create int16 (temperature) and uint16
+                (precipitation) COGs with a scale and offset instead of
+                float32 COGs.
+            time_stacks (bool): Flag to add a multi-band VRT of each
+                variable's COGs, one band per Item in time order, to the
+                Collection assets.
+            dry_run (bool): Flag to print a JSON plan, with the number of
+                COGs to create and estimates of the bytes read and written
+                and of the run time, instead of creating the Collection.
+            calibrate (bool): Flag to base the `dry_run` estimates on COGs
+                created for the first day or month in a temporary directory
+                instead of typical values.
+            progress_format (str): Progress reporting on stderr: 'bar' for
+                a progress bar with COG and byte throughput, 'jsonl' for one
+                JSON line per day or month done, or 'none'.
+            validate_cogs (bool): Flag to check, while the run continues,
+                that created COGs are valid Cloud-Optimized GeoTIFFs with the
+                expected tiling and overviews. The command fails with the
+                problems of each invalid COG.
+            discover (bool): Flag to list the netCDF files in `infile`, a
+                local directory or remote prefix, instead of reading HREFs
+                from it.
+            collection_type (Optional[str]): With `discover`, only use files
+                of this collection type: 'monthly', 'daily-prelim', or
+                'daily-scaled'. Required if files of more than one type are
+                found.
         """
-        with open(infile) as f:
-            hrefs = [os.path.abspath(line.strip()) for line in f.readlines()]
+        if discover:
+            hrefs = _discover(infile, session, collection_type)
+        else:
+            hrefs = _read_infile(infile)
 
         items: List[Item] = []
         collection_type = CollectionType.from_href(hrefs[0])
-        with TemporaryDirectory() as cog_dir:
+        if dry_run:
+            _print_plan(hrefs, session, quantized, calibrate)
+            return None
+
+        # Stage the COGs on the same filesystem as OUTDIR, so that moving
+        # them next to their Items is a rename rather than a copy.
+        os.makedirs(outdir, exist_ok=True)
+        with TemporaryDirectory(dir=outdir) as cog_dir:
             for href in hrefs:
-                temp_items, _ = stac.create_items(href, cog_dir, nc_assets=nc_assets)
+                with _ProgressReporter(progress_format, href) as progress:
+                    temp_items, _ = stac.create_items(
+                        href,
+                        cog_dir,
+                        nc_assets=nc_assets,
+                        session=session,
+                        quantized=quantized,
+                        progress=progress,
+                        validate_cogs=validate_cogs,
+                    )
                 items.extend(temp_items)
 
-            collection = stac.create_collection(collection_type, nc_assets)
-            collection.catalog_type = CatalogType.SELF_CONTAINED
-            collection.set_self_href(
-                os.path.join(outdir, f"{collection_type}/collection.json")
+            _save_collection(
+                items,
+                collection_type,
+                outdir,
+                nc_assets,
+                quantized=quantized,
+                time_stacks=time_stacks,
             )
 
-            collection.add_items(items)
-            collection.update_extent_from_items()
-
-            # Only move the COGs (not the source netCDFs) next to the Items
-            for item in collection.get_all_items():
-                for var in Variable:
-                    new_href = move_asset_file_to_item(
-                        item, item.assets[var].href, ignore_conflicts=True
-                    )
-                    item.assets[var].href = new_href
-
-            collection.make_all_asset_hrefs_relative()
-
-        collection.validate_all()
-        collection.save()
-
         return None
 
     @noaa_nclimgrid.command("create-items", short_help="Creates STAC Items")
@@ -120,18 +479,118 @@ def create_noaa_nclimgrid_command(cli: Group) -> Command:
         type=str,
         help="Desired start and end month in YYYYMM format for monthly data",
     )
+    @click.option(
+        "--hash-manifest",
+        type=str,
+        help=(
+            "HREF to a JSON manifest of COG data hashes. Existing COGs are only "
+            "reused if their data is unchanged"
+        ),
+    )
+    @click.option(
+        "--file-manifest",
+        type=str,
+        help="HREF to a JSON manifest of COG file sizes and checksums",
+    )
+    @click.option(
+        "--dask-scheduler",
+        type=str,
+        help="Address of a Dask scheduler on which to create the COGs",
+    )
+    @session_options
+    @click.option(
+        "-f",
+        "--format",
+        "output_format",
+        type=click.Choice(["json", "ndjson", "geoparquet"]),
+        default="json",
+        show_default=True,
+        help="Write one JSON file per Item, or all Items to a single file",
+    )
+    @click.option(
+        "--land-mask",
+        type=str,
+        help=(
+            "HREF of a persisted mask of valid pixels for --footprint, derived "
+            "from the netCDF files and written there if it does not exist"
+        ),
+    )
+    @click.option(
+        "--footprint",
+        is_flag=True,
+        default=False,
+        help="Use the footprint of valid pixels as the Item geometry",
+    )
+    @click.option(
+        "--quantize",
+        "quantized",
+        is_flag=True,
+        default=False,
+        help="Create int16/uint16 COGs with a scale and offset instead of float32",
+    )
+    @click.option(
+        "--max-memory",
+        type=str,
+        help=(
+            "Memory budget for the process, e.g., 4GB or 3.5GiB. Days or months "
+            "are processed concurrently within the budget"
+        ),
+    )
+    @click.option(
+        "--dry-run",
+        is_flag=True,
+        default=False,
+        help="Print a plan with cost estimates instead of creating COGs and Items",
+    )
+    @click.option(
+        "--calibrate",
+        is_flag=True,
+        default=False,
+        help="With --dry-run, measure COG size and encoding time on this machine",
+    )
+    @click.option(
+        "--progress",
+        "progress_format",
+        type=click.Choice(PROGRESS_FORMATS),
+        default="bar",
+        show_default=True,
+        help="Progress reporting on stderr: a bar, JSON lines, or none",
+    )
+    @click.option(
+        "--validate-cogs",
+        is_flag=True,
+        default=False,
+        help="Check that created COGs are valid Cloud-Optimized GeoTIFFs",
+    )
     def create_items_command(
         infile: str,
         cogdir: str,
         itemdir: str,
         nc_assets: bool,
+        session: FileSystemSession,
         cog_check_href: Optional[str] = None,
         day_range: Optional[Tuple[int, int]] = None,
         month_range: Optional[Tuple[str, str]] = None,
+        hash_manifest: Optional[str] = None,
+        file_manifest: Optional[str] = None,
+        dask_scheduler: Optional[str] = None,
+        output_format: str = "json",
+        land_mask: Optional[str] = None,
+        footprint: bool = False,
+        quantized: bool = False,
+        max_memory: Optional[str] = None,
+        dry_run: bool = False,
+        calibrate: bool = False,
+        progress_format: str = "bar",
+        validate_cogs: bool = False,
     ) -> None:
         """Creates COGs and STAC Items for each day or month in the daily or
         monthly netCDF INFILE.
 
+        Items are written to ITEMDIR as individual JSON files, or, with
+        `--format ndjson` or `--format geoparquet`, to a single
+        `items.ndjson` or `items.parquet` file.
+
         \b
         Args:
             infile (str): HREF to a netCDF file for one of the four variables:
@@ -150,21 +609,539 @@ def create_noaa_nclimgrid_command(cli: Group) -> Command:
                 of month for daily data
             month_range (Optional[Tuple[int, int]]): Optional start and end
                 month in YYYYMM format for monthly data.
+            hash_manifest (Optional[str]): Optional HREF to a JSON manifest of
+                COG data hashes, created or updated by the run. When used
+                with `cog_check_href`, existing COGs are only reused if the
+                hash of their source data is unchanged.
+            file_manifest (Optional[str]): Optional HREF to a JSON manifest of
+                COG file sizes and checksums, created or updated by the run.
+                Sizes and checksums are computed while COGs are written and
+                are also recorded in the Item assets.
+            dask_scheduler (Optional[str]): Optional address of a Dask
+                scheduler, e.g., tcp://10.0.0.1:8786. COGs are created on the
+                cluster and `cogdir` must be writable by its workers.
+            session (FileSystemSession): Filesystem session for reading the
+                netCDF files, built from the --cache-type, --block-size,
+                --cache-dir, and --cache-max-size options.
+            output_format (str): Output format for the Items: 'json',
+                'ndjson', or 'geoparquet'. Default is 'json'.
+            land_mask (Optional[str]): Optional HREF of a persisted mask of
+                valid pixels used for `footprint`, which must be set. The
+                mask is derived from the netCDF files and written to this
+                HREF if it does not exist yet.
+            footprint (bool): Flag to use the footprint of valid pixels as
+                the Item geometry instead of the grid extent.
+            quantized (bool): Flag to create int16 (temperature) and uint16
+                (precipitation) COGs with a scale and offset instead of
+                float32 COGs.
+            max_memory (Optional[str]): Optional memory budget for the
+                process, e.g., 4GB. Days or months are processed
+                concurrently, as many at a time as fit in the budget, and
+                the peak RSS is reported at the end of the run.
+            dry_run (bool): Flag to print a JSON plan, with the number of
+                COGs to create and reuse and estimates of the bytes read and
+                written and of the run time, instead of creating COGs and
+                Items.
+            calibrate (bool): Flag to base the `dry_run` estimates on COGs
+                created for the first day or month in a temporary directory
+                instead of typical values.
+            progress_format (str): Progress reporting on stderr: 'bar' for
+                a progress bar with COG and byte throughput, 'jsonl' for one
+                JSON line per day or month done, or 'none'.
+            validate_cogs (bool): Flag to check, while the run continues,
+                that created COGs are valid Cloud-Optimized GeoTIFFs with the
+                expected tiling and overviews. The command fails with the
+                problems of each invalid COG.
         """
-        items, _ = stac.create_items(
+        if land_mask and not footprint:
+            raise click.UsageError("--land-mask requires --footprint")
+
+        if dry_run:
+            _print_plan(
+                [infile],
+                session,
+                quantized,
+                calibrate,
+                cog_check_href=cog_check_href,
+                day_range=day_range,
+                month_range=month_range,
+            )
+            return None
+
+        mask = None
+        if land_mask:
+            mask = load_land_mask(land_mask, infile, session=session)
+
+        dask_client = None
+        if dask_scheduler:
+            from distributed import Client
+
+            dask_client = Client(dask_scheduler)
+
+        try:
+            with _ProgressReporter(progress_format, infile) as progress:
+                items, _ = stac.create_items(
+                    infile,
+                    cogdir,
+                    nc_assets=nc_assets,
+                    cog_check_href=cog_check_href,
+                    day_range=day_range,
+                    month_range=month_range,
+                    dask_client=dask_client,
+                    hash_manifest=hash_manifest,
+                    file_manifest=file_manifest,
+                    session=session,
+                    land_mask=mask,
+                    footprint=footprint,
+                    quantized=quantized,
+                    max_memory=parse_memory(max_memory) if max_memory else None,
+                    progress=progress,
+                    validate_cogs=validate_cogs,
+                )
+        finally:
+            if dask_client is not None:
+                dask_client.close()
+
+        logger.info(f"Remote reads: {session.metrics.to_dict()}")
+        if max_memory:
+            rss = peak_rss()
+            if rss is not None:
+                click.echo(f"Peak RSS: {rss / 2**20:.0f} MiB", err=True)
+
+        for item in items:
+            item_path = os.path.join(itemdir, f"{item.id}.json")
+            item.set_self_href(item_path)
+            item.make_asset_hrefs_relative()
+            item.validate()
+            if output_format == "json":
+                save_item(item)
+
+        if output_format == "ndjson":
+            export.write_ndjson(items, os.path.join(itemdir, "items.ndjson"))
+        elif output_format == "geoparquet":
+            export.write_geoparquet(items, os.path.join(itemdir, "items.parquet"))
+
+        return None
+
+    @noaa_nclimgrid.command(
+        "aggregate", short_help="Creates monthly or annual COGs from daily data"
+    )
+    @click.argument("INFILE")
+    @click.argument("COGDIR")
+    @click.argument("ITEMDIR")
+    @click.option(
+        "-a",
+        "--aggregation",
+        type=click.Choice([aggregation.value for aggregation in Aggregation]),
+        default=Aggregation.MONTHLY.value,
+        show_default=True,
+        help="Aggregation period",
+    )
+    @session_options
+    def aggregate_command(
+        infile: str,
+        cogdir: str,
+        itemdir: str,
+        session: FileSystemSession,
+        aggregation: str = Aggregation.MONTHLY.value,
+    ) -> None:
+        """Creates monthly or annual precipitation total and mean temperature
+        COGs and STAC Items from the daily netCDF files referenced by INFILE.
+
+        \b
+        Args:
+            infile (str): A single daily netCDF HREF or a text file containing
+                one HREF to a daily netCDF file per line, as for
+                `create-collection`. For annual aggregates, include the files
+                for all months of the year.
+            cogdir (str): Directory that will contain the COGs.
+            itemdir (str): Directory that will contain the STAC Items.
+            aggregation (str): Aggregation period, 'monthly' or 'annual'.
+                Default is 'monthly'.
+            session (FileSystemSession): Filesystem session for reading the
+                netCDF files, built from the --cache-type, --block-size,
+                --cache-dir, and --cache-max-size options.
+        """
+        hrefs = _read_infile(infile)
+
+        items, _ = aggregate.create_aggregate_items(
+            hrefs,
+            cogdir,
+            aggregation=Aggregation(aggregation),
+            session=session,
+        )
+
+        for item in items:
+            item_path = os.path.join(itemdir, f"{item.id}.json")
+            item.set_self_href(item_path)
+            item.make_asset_hrefs_relative()
+            item.validate()
+            save_item(item)
+
+        return None
+
+    @noaa_nclimgrid.command(
+        "create-climatology", short_help="Creates normal and anomaly COGs and Items"
+    )
+    @click.argument("INFILE")
+    @click.argument("COGDIR")
+    @click.argument("ITEMDIR")
+    @click.option(
+        "-p",
+        "--period",
+        nargs=2,
+        type=str,
+        default=climatology.NORMALS_PERIOD,
+        show_default=True,
+        help="Start and end month of the normals period in YYYYMM format",
+    )
+    @click.option(
+        "-a",
+        "--anomaly-range",
+        nargs=2,
+        type=str,
+        help="Start and end month in YYYYMM format for which to create anomalies",
+    )
+    @click.option(
+        "--land-mask",
+        type=str,
+        help=(
+            "HREF of a persisted mask of valid pixels, derived from the netCDF "
+            "files and written there if it does not exist"
+        ),
+    )
+    @session_options
+    def create_climatology_command(
+        infile: str,
+        cogdir: str,
+        itemdir: str,
+        session: FileSystemSession,
+        period: Tuple[str, str] = climatology.NORMALS_PERIOD,
+        anomaly_range: Optional[Tuple[str, str]] = None,
+        land_mask: Optional[str] = None,
+    ) -> None:
+        """Creates per-calendar-month normal (mean and standard deviation)
+        COGs and, optionally, monthly anomaly COGs and their STAC Items from
+        the monthly netCDF INFILE.
+
+        \b
+        Args:
+            infile (str): HREF to a monthly netCDF file for one of the four
+                variables: prcp, tavg, tmax, and tmin. The netCDF files for
+                the remaining three variable must exist alongside `infile`.
+            cogdir (str): Directory that will contain the COGs.
+            itemdir (str): Directory that will contain the STAC Items.
+            period (Tuple[str, str]): Start and end month of the normals
+                period in YYYYMM format. Default is 199101 to 202012.
+            anomaly_range (Optional[Tuple[str, str]]): Optional start and end
+                month in YYYYMM format for which to create anomalies from the
+                normals.
+            land_mask (Optional[str]): Optional HREF of a persisted mask of
+                valid pixels. The mask is derived from the netCDF files and
+                written to this HREF if it does not exist yet. Statistics
+                are only accumulated for pixels inside the mask.
+            session (FileSystemSession): Filesystem session for reading the
+                netCDF files, built from the --cache-type, --block-size,
+                --cache-dir, and --cache-max-size options.
+        """
+        mask = None
+        if land_mask:
+            mask = load_land_mask(land_mask, infile, session=session)
+
+        items, _ = climatology.create_climatology(
             infile,
             cogdir,
-            nc_assets=nc_assets,
-            cog_check_href=cog_check_href,
-            day_range=day_range,
-            month_range=month_range,
+            period=period,
+            anomaly_range=anomaly_range,
+            session=session,
+            land_mask=mask,
         )
+
         for item in items:
             item_path = os.path.join(itemdir, f"{item.id}.json")
             item.set_self_href(item_path)
             item.make_asset_hrefs_relative()
             item.validate()
-            item.save_object(include_self_link=False)
+            save_item(item)
+
+        return None
+
+    @noaa_nclimgrid.command(
+        "timeseries", short_help="Extracts time series at points from netCDFs"
+    )
+    @click.argument("INFILE")
+    @click.argument("POINTS")
+    @click.argument("OUTFILE")
+    @session_options
+    def timeseries_command(
+        infile: str,
+        points: str,
+        outfile: str,
+        session: FileSystemSession,
+    ) -> None:
+        """Extracts the prcp, tavg, tmax, and tmin time series at the points
+        in POINTS directly from the netCDF files referenced by INFILE and
+        writes them to OUTFILE.
+
+        Each netCDF file is read once for all points.
+
+        \b
+        Args:
+            infile (str): A single netCDF HREF or a text file containing one
+                HREF to a netCDF file per line, as for `create-collection`.
+            points (str): CSV file with 'lat' and 'lon' columns and an
+                optional 'id' column, e.g., station IDs.
+            outfile (str): Path for the time series, one row per point and
+                time. Written as Parquet if the path ends with '.parquet' and
+                as CSV otherwise.
+            session (FileSystemSession): Filesystem session for reading the
+                netCDF files, built from the --cache-type, --block-size,
+                --cache-dir, and --cache-max-size options.
+        """
+        hrefs = _read_infile(infile)
+
+        point_table = timeseries.read_points(points)
+        ids = point_table["id"].tolist() if "id" in point_table.columns else None
+        timeseries.write_timeseries(
+            timeseries.concat_timeseries(
+                [
+                    timeseries.extract_timeseries(
+                        href,
+                        point_table["lat"].values,
+                        point_table["lon"].values,
+                        ids=ids,
+                        session=session,
+                    )
+                    for href in hrefs
+                ]
+            ),
+            outfile,
+        )
+
+        return None
+
+    @noaa_nclimgrid.command("plan", short_help="Splits work into balanced shards")
+    @click.argument("INFILE")
+    @click.argument("OUTFILE")
+    @click.option(
+        "-s",
+        "--shards",
+        type=int,
+        default=1,
+        show_default=True,
+        help="Number of shards to create",
+    )
+    def plan_command(infile: str, outfile: str, shards: int) -> None:
+        """Splits the days or months available in the netCDF files referenced
+        by INFILE into balanced shards and writes the shard specifications to
+        OUTFILE as JSON.
+
+        Each shard is a list of tasks, and each task holds an `href` and a
+        `day_range` or `month_range` that can be passed directly to
+        `create-items`. The per-shard Item directories can be combined into a
+        single Collection with `merge`.
+
+        \b
+        Args:
+            infile (str): A single netCDF HREF or a text file containing one
+                HREF to a netCDF file per line, as for `create-collection`.
+            outfile (str): Path for the JSON shard specifications.
+            shards (int): Number of shards to create. Default is 1.
+        """
+        hrefs = _read_infile(infile)
+
+        plan = {
+            "collection_type": CollectionType.from_href(hrefs[0]).value,
+            "shards": partition.plan_shards(hrefs, shards),
+        }
+        with open(outfile, "w") as f:
+            json.dump(plan, f, indent=2)
+
+        return None
+
+    @noaa_nclimgrid.command(
+        "merge", short_help="Merges per-shard Items into a STAC collection"
+    )
+    @click.argument("ITEMDIRS", nargs=-1, required=True)
+    @click.argument("OUTDIR")
+    @click.option(
+        "--time-stacks",
+        is_flag=True,
+        default=False,
+        help="Add a multi-band VRT of each variable's COGs to the Collection",
+    )
+    def merge_command(
+        itemdirs: List[str], outdir: str, time_stacks: bool = False
+    ) -> None:
+        """Creates a STAC Collection from the Items (and their COGs) found in
+        one or more ITEMDIRS, such as the outputs of `create-items` runs over
+        the shards created by `plan`.
+
+        COGs are copied alongside the Items in OUTDIR, and the Collection
+        extent is computed from the merged Items. Items are ordered by ID so
+        the result does not depend on the order of ITEMDIRS.
+
+        \b
+        Args:
+            itemdirs (List[str]): Directories containing STAC Item JSON files.
+            outdir (str): Directory that will contain the collection.
+            time_stacks (bool): Flag to add a multi-band VRT of each
+                variable's COGs to the Collection assets.
+        """
+        items: Dict[str, Item] = {}
+        for itemdir in itemdirs:
+            for item_path in sorted(glob.glob(os.path.join(itemdir, "*.json"))):
+                item = Item.from_file(item_path)
+                if item.id in items:
+                    raise ValueError(
+                        f"Item '{item.id}' found in more than one ITEMDIR: {item_path}"
+                    )
+                item.make_asset_hrefs_absolute()
+                item.clear_links()
+                items[item.id] = item
+
+        if not items:
+            raise click.UsageError("No Items found in ITEMDIRS")
+
+        sorted_items = [items[id] for id in sorted(items)]
+        first_item = sorted_items[0]
+        collection_type = CollectionType.from_href(
+            first_item.assets[Variable.PRCP].href
+        )
+        nc_assets = f"{Variable.PRCP.value}_source" in first_item.assets
+        prcp_bands = first_item.assets[Variable.PRCP].extra_fields["raster:bands"]
+        quantized = prcp_bands[0]["data_type"] != "float32"
+
+        _save_collection(
+            sorted_items,
+            collection_type,
+            outdir,
+            nc_assets,
+            copy=True,
+            quantized=quantized,
+            time_stacks=time_stacks,
+        )
+
+        return None
+
+    @noaa_nclimgrid.command(
+        "worker", short_help="Runs a worker that keeps netCDF files open"
+    )
+    @click.argument("COGDIR")
+    @click.option(
+        "--port",
+        type=int,
+        help="Serve jobs over HTTP on this port instead of reading stdin",
+    )
+    @click.option(
+        "--host",
+        type=str,
+        default=worker.DEFAULT_HOST,
+        show_default=True,
+        help="Host to listen on with --port",
+    )
+    @click.option(
+        "--max-open",
+        type=int,
+        default=DEFAULT_MAX_OPEN,
+        show_default=True,
+        help="Maximum number of netCDF files kept open",
+    )
+    @click.option(
+        "--max-age",
+        type=float,
+        default=DEFAULT_MAX_AGE,
+        show_default=True,
+        help="Seconds after which a remote netCDF file is reopened",
+    )
+    @session_options
+    def worker_command(
+        cogdir: str,
+        session: FileSystemSession,
+        port: Optional[int] = None,
+        host: str = worker.DEFAULT_HOST,
+        max_open: int = DEFAULT_MAX_OPEN,
+        max_age: float = DEFAULT_MAX_AGE,
+    ) -> None:
+        """Runs a long-running worker that creates COGs in COGDIR and returns
+        STAC Items, keeping netCDF files open between jobs.
+
+        Jobs are JSON objects with an 'href' to a netCDF file and, optionally,
+        'day_range' or 'month_range', 'cog_dir', 'cog_check_href',
+        'nc_assets', and 'quantized'. Without --port, jobs are read from stdin
+        as JSON lines and results are written to stdout as JSON lines. With
+        --port, jobs are posted to /items and the worker status is served at
+        /status.
+
+        \b
+        Args:
+            cogdir (str): Default directory that will contain the COGs.
+            port (Optional[int]): Optional port on which to serve jobs over
+                HTTP.
+            host (str): Host to listen on with `port`.
+            max_open (int): Maximum number of netCDF files kept open.
+            max_age (float): Number of seconds after which a remote netCDF
+                file is reopened, to pick up re-issued files.
+            session (FileSystemSession): Filesystem session for reading the
+                netCDF files, built from the --cache-type, --block-size,
+                --cache-dir, and --cache-max-size options.
+        """
+        session.datasets = DatasetCache(max_open=max_open, max_age=max_age)
+        job_worker = worker.Worker(cogdir, session=session)
+        try:
+            if port is None:
+                failures = worker.serve_stream(
+                    job_worker,
+                    click.get_text_stream("stdin"),
+                    click.get_text_stream("stdout"),
+                )
+                if failures:
+                    raise click.ClickException(f"{failures} jobs failed")
+            else:
+                server = worker.WorkerServer(job_worker, (host, port))
+                click.echo(f"Serving jobs at {server.url}/items", err=True)
+                try:
+                    server.serve_forever()
+                except KeyboardInterrupt:
+                    pass
+                finally:
+                    server.server_close()
+        finally:
+            job_worker.close()
+
+        return None
+
+    @noaa_nclimgrid.command(
+        "validate-cogs", short_help="Checks that files are Cloud-Optimized GeoTIFFs"
+    )
+    @click.argument("COGS", nargs=-1, required=True)
+    @click.option(
+        "--max-workers",
+        type=int,
+        default=validation.VALIDATE_WORKERS,
+        show_default=True,
+        help="Number of files checked concurrently",
+    )
+    def validate_cogs_command(
+        cogs: Tuple[str, ...], max_workers: int = validation.VALIDATE_WORKERS
+    ) -> None:
+        """Checks that COGS are valid Cloud-Optimized GeoTIFFs with the tiling
+        and overviews of the COGs created by this package.
+
+        One JSON line per file, with its 'href' and a list of 'errors', is
+        written to stdout. The command fails if any file is invalid.
+
+        \b
+        Args:
+            cogs (Tuple[str, ...]): HREFs of the files to check.
+            max_workers (int): Number of files checked concurrently.
+        """
+        results = validation.validate_cogs(cogs, max_workers=max_workers)
+        for href, errors in results.items():
+            click.echo(json.dumps({"href": href, "errors": errors}))
+        invalid = sum(1 for errors in results.values() if errors)
+        if invalid:
+            raise click.ClickException(f"{invalid} of {len(results)} COGs are invalid")
 
         return None
 
@@ -34,6 +34,11 @@ class CollectionType(str, Enum):
             return CollectionType.DAILY_SCALED
 
 
+class Aggregation(str, Enum):
+    MONTHLY = "monthly"
+    ANNUAL = "annual"
+
+
 class Variable(str, Enum):
     PRCP = "prcp"
     TAVG = "tavg"
@@ -82,7 +87,45 @@ COG_RASTER_BANDS = {
         }
     ],
 }
+# Integer encodings for quantized COGs: physical value = stored * scale + offset.
+# Temperatures keep their reported 0.01 degree Celsius precision. Precipitation
+# steps are coarser so that the uint16 range covers 1310 mm per day and 3276 mm
+# per month, well above the wettest NClimGrid month (~1208 mm).
+_TEMPERATURE_QUANTIZATION = {
+    "data_type": "int16",
+    "nodata": -32768,
+    "scale": 0.01,
+    "offset": 0.0,
+}
+QUANTIZED_RASTER_BANDS = {
+    Frequency.DAILY: {
+        Variable.PRCP: {
+            "data_type": "uint16",
+            "nodata": 65535,
+            "scale": 0.02,
+            "offset": 0.0,
+        },
+        Variable.TAVG: _TEMPERATURE_QUANTIZATION,
+        Variable.TMAX: _TEMPERATURE_QUANTIZATION,
+        Variable.TMIN: _TEMPERATURE_QUANTIZATION,
+    },
+    Frequency.MONTHLY: {
+        Variable.PRCP: {
+            "data_type": "uint16",
+            "nodata": 65535,
+            "scale": 0.05,
+            "offset": 0.0,
+        },
+        Variable.TAVG: _TEMPERATURE_QUANTIZATION,
+        Variable.TMAX: _TEMPERATURE_QUANTIZATION,
+        Variable.TMIN: _TEMPERATURE_QUANTIZATION,
+    },
+}
 RASTER_EXTENSION_V11 = "https://stac-extensions.github.io/raster/v1.1.0/schema.json"
+FILE_EXTENSION_V21 = "https://stac-extensions.github.io/file/v2.1.0/schema.json"
+
+VRT_MEDIA_TYPE = "application/xml"
+VRT_ROLES = ["data", "time-stack"]
 
 NETCDF_MEDIA_TYPE = "application/netcdf"
 NETCDF_ASSET_TITLES = {
@@ -0,0 +1,183 @@
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from stactools.core.io import ReadHrefModifier
+
+from stactools.noaa_nclimgrid.cog import (
+    existing_cog_href,
+    get_cog_href,
+    quantize,
+    time_index,
+    write_cog,
+)
+from stactools.noaa_nclimgrid.constants import (
+    QUANTIZED_RASTER_BANDS,
+    Frequency,
+    Variable,
+)
+from stactools.noaa_nclimgrid.hdf5 import open_slice_reader
+from stactools.noaa_nclimgrid.session import FileSystemSession
+from stactools.noaa_nclimgrid.utils import modify_href
+
+# Number of time slices of a variable written by a single Dask task, which
+# opens the netCDF file once for all of them.
+TIME_CHUNK = 8
+
+
+def create_cogs(
+    nc_hrefs: Dict[Variable, str],
+    cog_dir: str,
+    units: List[Dict[str, Any]],
+    client: Any,
+    cog_check_href: Optional[str] = None,
+    read_href_modifier: Optional[ReadHrefModifier] = None,
+    session: Optional[FileSystemSession] = None,
+    quantized: bool = False,
+    file_info: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> List[Tuple[Dict[Variable, str], List[str]]]:
+    """Creates prcp, tavg, tmax, and tmin COGs for many temporal units on a
+    Dask cluster.
+
+    A single graph is built for all variables and temporal units, with one
+    task per variable and group of :py:data:`TIME_CHUNK` time slices. The
+    graph holds only HREFs and session settings, so it can be sent to
+    workers in other processes or on other machines: each task opens its
+    netCDF file on the worker, reads its time slices, and writes their COGs.
+    `cog_dir` must be writable by the workers, and the netCDF HREFs readable
+    from them.
+
+    Args:
+        nc_hrefs (Dict[Variable, str]): A dictionary mapping variables to netCDF
+            HREFs.
+        cog_dir (str): Directory path for created COGs.
+        units (List[Dict[str, Any]]): Temporal units, each a dictionary with
+            either a `day` or a `month` key, as accepted by
+            :py:func:`stactools.noaa_nclimgrid.cog.create_cogs`.
+        client (distributed.Client): Dask distributed client used to run the
+            graph.
+        cog_check_href (Optional[str]): HREF to a location to check for existing
+            COG files. New COGs are not created if existing COGs are found.
+        read_href_modifier (Optional[ReadHrefModifier]): An optional function
+            to modify an href (e.g., to add a token to a url).
+        session (Optional[FileSystemSession]): Optional filesystem session
+            whose cache type, block size, storage options, and retry
+            settings are used by the workers to open the netCDF files. A
+            mirror is not used on the workers.
+        quantized (bool): Flag to write quantized integer COGs, as with
+            :py:func:`stactools.noaa_nclimgrid.cog.create_cogs`. Default is
+            False.
+        file_info (Optional[Dict[str, Dict[str, Any]]]): Optional mapping of
+            COG file names to their size and checksum, updated in place with
+            the properties computed by the workers for the created COGs.
+
+    Returns:
+        List[Tuple[Dict[Variable, str], List[str]]]: For each temporal unit, in
+            the order given, a tuple consisting of:
+            1. A dictionary mapping variables to COG HREFs. The HREFs may be to
+                existing or newly created COGs.
+            2. A list of HREFs to any newly created (not existing) COGs.
+    """
+    try:
+        from dask.delayed import delayed
+    except ImportError:
+        raise ImportError(
+            "The Dask backend requires the 'dask' extra: "
+            "pip install stactools-noaa-nclimgrid[dask]"
+        )
+
+    # Only HREFs and plain settings go into the graph: the netCDF files are
+    # opened on the workers, which may be other processes or machines.
+    settings = _session_settings(session)
+    slices: Dict[Variable, List[Tuple[int, str]]] = {var: [] for var in Variable}
+    results: List[Tuple[Dict[Variable, str], List[str]]] = []
+    for unit in units:
+        cog_hrefs: Dict[Variable, str] = {}
+        created_cog_hrefs: List[str] = []
+        for var in Variable:
+            existing_href = existing_cog_href(
+                nc_hrefs[var], var, cog_check_href, **unit
+            )
+            if existing_href is not None:
+                cog_hrefs[var] = existing_href
+                continue
+            new_cog_path = get_cog_href(nc_hrefs[var], var, cog_dir, **unit)
+            slices[var].append((time_index(**unit), new_cog_path))
+            cog_hrefs[var] = new_cog_path
+            created_cog_hrefs.append(new_cog_path)
+        results.append((cog_hrefs, created_cog_hrefs))
+
+    tasks = []
+    task_paths: List[str] = []
+    for var, var_slices in slices.items():
+        read_nc_href = modify_href(nc_hrefs[var], read_href_modifier)
+        band = None
+        if quantized:
+            band = QUANTIZED_RASTER_BANDS[Frequency.from_href(nc_hrefs[var])][var]
+        for start in range(0, len(var_slices), TIME_CHUNK):
+            end = start + TIME_CHUNK
+            chunk = var_slices[start:end]
+            tasks.append(
+                delayed(write_cogs, pure=False)(
+                    read_nc_href, var.value, chunk, band, settings
+                )
+            )
+            task_paths.extend(path for _, path in chunk)
+
+    properties = [
+        cog_properties
+        for chunk_properties in client.gather(client.compute(tasks))
+        for cog_properties in chunk_properties
+    ]
+    if file_info is not None:
+        for path, cog_properties in zip(task_paths, properties):
+            file_info[os.path.basename(path)] = cog_properties
+
+    return results
+
+
+def write_cogs(
+    nc_href: str,
+    var: str,
+    slices: List[Tuple[int, str]],
+    band: Optional[Dict[str, Any]] = None,
+    session_settings: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """Writes COGs for several time slices of a netCDF variable, opening the
+    netCDF file once. Runs on a Dask worker.
+
+    Args:
+        nc_href (str): HREF to the netCDF file, with any read modification
+            (e.g., a token) already applied.
+        var (str): One of 'prcp', 'tavg', 'tmax', or 'tmin'.
+        slices (List[Tuple[int, str]]): Zero-based time indices and the COG
+            paths to write them to.
+        band (Optional[Dict[str, Any]]): Optional integer encoding, as passed
+            to :py:func:`stactools.noaa_nclimgrid.cog.write_cog`.
+        session_settings (Optional[Dict[str, Any]]): Keyword arguments for
+            the :py:class:`FileSystemSession` used to open the netCDF file.
+
+    Returns:
+        List[Dict[str, Any]]: The file properties of each written COG, in the
+            order of `slices`.
+    """
+    session = FileSystemSession(**(session_settings or {}))
+    properties = []
+    with open_slice_reader(nc_href, session) as reader:
+        for index, cog_path in slices:
+            values = reader.read(var, index)
+            if band is not None:
+                values = quantize(values, band)
+            properties.append(write_cog(values, cog_path, band))
+    return properties
+
+
+def _session_settings(session: Optional[FileSystemSession]) -> Dict[str, Any]:
+    if session is None:
+        return {}
+    return {
+        "cache_type": session.cache_type,
+        "block_size": session.block_size,
+        "storage_options": session.storage_options,
+        "retries": session.retries,
+        "backoff": session.backoff,
+    }
@@ -0,0 +1,214 @@
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set
+
+from fsspec.core import split_protocol, strip_protocol
+
+from stactools.noaa_nclimgrid.constants import CollectionType, Variable
+from stactools.noaa_nclimgrid.session import (
+    LOCAL_PROTOCOLS,
+    FileSystemSession,
+    retry_call,
+)
+from stactools.noaa_nclimgrid.utils import nc_href_dict
+
+logger = logging.getLogger(__name__)
+
+# Number of directories listed concurrently.
+LIST_WORKERS = 16
+
+# Number of directory levels listed below the root, enough for the daily
+# by-month/<YYYY>/<MM> layout.
+MAX_DEPTH = 4
+
+# NClimGrid netCDF file names: monthly 'nclimgrid_<var>.nc' and daily
+# '<var>-<YYYYMM>-grd-<prelim|scaled>.nc'.
+_VARIABLES = "|".join(var.value for var in Variable)
+_MONTHLY_NAME = re.compile(rf"^nclimgrid_(?P<var>{_VARIABLES})(?P<suffix>.*)\.nc$")
+_DAILY_NAME = re.compile(
+    rf"^(?P<var>{_VARIABLES})(?P<suffix>-\d{{6}}-grd-(prelim|scaled))\.nc$"
+)
+
+
+class Discovery:
+    """Sets of netCDF files found by :py:func:`discover_inputs`.
+
+    A set is complete when the 'prcp', 'tavg', 'tmax', and 'tmin' files for
+    the same timespan are in the same directory. Sets are identified by the
+    HREF of their 'prcp' file, which is the HREF :py:func:`create_items`
+    expects, whether or not that file exists.
+
+    Attributes:
+        complete (List[str]): HREFs of the complete sets, sorted.
+        incomplete (Dict[str, List[Variable]]): Missing variables of the
+            incomplete sets, keyed by set HREF.
+    """
+
+    def __init__(
+        self, complete: List[str], incomplete: Dict[str, List[Variable]]
+    ) -> None:
+        self.complete = complete
+        self.incomplete = incomplete
+
+    def collection_types(self) -> List[CollectionType]:
+        """Returns the collection types of the complete sets.
+
+        Returns:
+            List[CollectionType]: Sorted, distinct collection types.
+        """
+        return sorted({CollectionType.from_href(href) for href in self.complete})
+
+    def filter(self, collection_type: CollectionType) -> "Discovery":
+        """Returns the sets of a single collection type.
+
+        Args:
+            collection_type (CollectionType): The collection type.
+
+        Returns:
+            Discovery: The sets of `collection_type`.
+        """
+        return Discovery(
+            [
+                h
+                for h in self.complete
+                if CollectionType.from_href(h) == collection_type
+            ],
+            {
+                href: missing
+                for href, missing in self.incomplete.items()
+                if CollectionType.from_href(href) == collection_type
+            },
+        )
+
+
+def list_files(
+    root: str,
+    session: Optional[FileSystemSession] = None,
+    max_workers: int = LIST_WORKERS,
+    max_depth: int = MAX_DEPTH,
+) -> List[str]:
+    """Lists the netCDF files below a local directory or remote prefix.
+
+    Directories are listed one level at a time, with the directories of each
+    level listed concurrently, so a remote prefix costs one listing request
+    per directory rather than one request per probed file.
+
+    Args:
+        root (str): Local directory or remote prefix, e.g.,
+            'https://.../daily/beta/by-month/2022'.
+        session (Optional[FileSystemSession]): Optional filesystem session.
+            Listings are retried like reads.
+        max_workers (int): Number of directories listed concurrently.
+            Default is 16.
+        max_depth (int): Number of directory levels listed below `root`.
+            Default is 4.
+
+    Returns:
+        List[str]: Sorted HREFs of the '.nc' files found.
+    """
+    if session is None:
+        session = FileSystemSession()
+    protocol = split_protocol(root)[0] or "file"
+    fs = session.filesystem(protocol)
+    root_path = strip_protocol(root).rstrip("/")
+
+    def ls(path: str) -> List[Dict[str, Any]]:
+        entries: List[Dict[str, Any]] = retry_call(
+            lambda: fs.ls(path, detail=True),
+            session.retries,
+            session.backoff,
+            session.metrics,
+        )
+        return entries
+
+    files: Set[str] = set()
+    seen = {root_path}
+    level = [root_path]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for _ in range(max_depth + 1):
+            next_level = []
+            for entries in executor.map(ls, level):
+                for entry in entries:
+                    name = entry["name"].rstrip("/")
+                    if entry["type"] == "directory":
+                        if name not in seen and name.startswith(root_path):
+                            seen.add(name)
+                            next_level.append(name)
+                    elif name.endswith(".nc"):
+                        files.add(name)
+            if not next_level:
+                break
+            level = next_level
+
+    if protocol in LOCAL_PROTOCOLS:
+        return sorted(files)
+    return sorted(f if "://" in f else fs.unstrip_protocol(f) for f in files)
+
+
+def group_files(hrefs: List[str]) -> Discovery:
+    """Groups netCDF HREFs into sets of the four variables.
+
+    HREFs that are not NClimGrid netCDF file names are ignored.
+
+    Args:
+        hrefs (List[str]): netCDF HREFs.
+
+    Returns:
+        Discovery: Complete and incomplete sets.
+    """
+    found: Dict[str, Set[Variable]] = {}
+    for href in hrefs:
+        variable = _variable(os.path.basename(href))
+        if variable is None:
+            logger.debug(f"Skipping {href}: not an NClimGrid netCDF file name")
+            continue
+        set_href = nc_href_dict(href)[Variable.PRCP]
+        found.setdefault(set_href, set()).add(variable)
+
+    complete = []
+    incomplete = {}
+    for set_href, variables in sorted(found.items()):
+        missing = [var for var in Variable if var not in variables]
+        if missing:
+            incomplete[set_href] = missing
+        else:
+            complete.append(set_href)
+    return Discovery(complete, incomplete)
+
+
+def discover_inputs(
+    root: str,
+    session: Optional[FileSystemSession] = None,
+    max_workers: int = LIST_WORKERS,
+) -> Discovery:
+    """Finds the complete and incomplete sets of netCDF files below a local
+    directory or remote prefix.
+
+    Incomplete sets are, e.g., months whose 'tmin' file has not been
+    published yet, or files whose siblings were deleted.
+
+    Args:
+        root (str): Local directory or remote prefix.
+        session (Optional[FileSystemSession]): Optional filesystem session.
+        max_workers (int): Number of directories listed concurrently.
+            Default is 16.
+
+    Returns:
+        Discovery: Complete and incomplete sets.
+    """
+    discovery = group_files(list_files(root, session, max_workers=max_workers))
+    logger.info(
+        f"Found {len(discovery.complete)} complete and "
+        f"{len(discovery.incomplete)} incomplete sets below {root}"
+    )
+    return discovery
+
+
+def _variable(filename: str) -> Optional[Variable]:
+    for pattern in [_MONTHLY_NAME, _DAILY_NAME]:
+        match = pattern.match(filename)
+        if match:
+            return Variable(match.group("var"))
+    return None
@@ -0,0 +1,127 @@
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+import fsspec
+import shapely.geometry
+from pystac import Item
+from pystac.utils import str_to_datetime
+
+from stactools.noaa_nclimgrid import utils
+
+# Item properties stored as timestamp columns in GeoParquet.
+DATETIME_PROPERTIES = ["datetime", "start_datetime", "end_datetime", "created"]
+
+# Number of Items written per Parquet row group.
+GEOPARQUET_BATCH_SIZE = 1000
+
+
+def write_ndjson(items: Iterable[Item], href: str) -> int:
+    """Writes Items to a newline-delimited JSON file, one Item per line.
+
+    Items are written as they are produced, so `items` can be a generator.
+
+    Args:
+        items (Iterable[Item]): Items to write.
+        href (str): Destination HREF for the NDJSON file.
+
+    Returns:
+        int: Number of Items written.
+    """
+    count = 0
+    with fsspec.open(href, "wb") as f:
+        for item in items:
+            f.write(utils.json_dumps_line(item.to_dict(include_self_link=False)))
+            count += 1
+    return count
+
+
+def write_geoparquet(items: Iterable[Item], href: str) -> int:
+    """Writes Items to a stac-geoparquet file.
+
+    Item properties are stored as top-level columns, datetimes as UTC
+    timestamp columns, geometries as WKB, and assets as nested structs. The
+    file includes GeoParquet 1.0 metadata. Items are written in row groups of
+    :py:data:`GEOPARQUET_BATCH_SIZE` as they are produced. Requires the
+    'geoparquet' extra.
+
+    Args:
+        items (Iterable[Item]): Items to write. All Items must have the same
+            asset and property structure, e.g., be created by a single
+            :py:func:`stactools.noaa_nclimgrid.stac.create_items` call.
+        href (str): Destination HREF for the Parquet file.
+
+    Returns:
+        int: Number of Items written.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError(
+            "Writing GeoParquet requires the 'geoparquet' extra: "
+            "pip install stactools-noaa-nclimgrid[geoparquet]"
+        )
+
+    count = 0
+    writer: Optional[pq.ParquetWriter] = None
+    batch: List[Dict[str, Any]] = []
+    with fsspec.open(href, "wb") as f:
+        try:
+            for item in items:
+                batch.append(_geoparquet_record(item))
+                if len(batch) == GEOPARQUET_BATCH_SIZE:
+                    writer = _write_batch(pa, pq, writer, batch, f)
+                    count += len(batch)
+                    batch = []
+            if batch or writer is None:
+                writer = _write_batch(pa, pq, writer, batch, f)
+                count += len(batch)
+        finally:
+            if writer is not None:
+                writer.close()
+    return count
+
+
+def _geoparquet_record(item: Item) -> Dict[str, Any]:
+    item_dict = item.to_dict(include_self_link=False)
+    properties = item_dict.pop("properties")
+    for key in DATETIME_PROPERTIES:
+        if properties.get(key) is not None:
+            properties[key] = str_to_datetime(properties[key])
+    geometry = item_dict.pop("geometry")
+    bbox = item_dict.pop("bbox")
+    return {
+        **item_dict,
+        "geometry": shapely.geometry.shape(geometry).wkb if geometry else None,
+        "bbox": dict(zip(["xmin", "ymin", "xmax", "ymax"], bbox)),
+        **properties,
+    }
+
+
+def _write_batch(
+    pa: Any, pq: Any, writer: Any, batch: List[Dict[str, Any]], f: Any
+) -> Any:
+    if writer is not None:
+        writer.write_table(pa.Table.from_pylist(batch, schema=writer.schema))
+        return writer
+
+    table = pa.Table.from_pylist(batch)
+    for key in DATETIME_PROPERTIES:
+        if key in table.column_names:
+            table = table.set_column(
+                table.column_names.index(key),
+                key,
+                table[key].cast(pa.timestamp("us", tz="UTC")),
+            )
+    # Items are streamed, so the optional file-level bbox is not recorded.
+    geo = {
+        "version": "1.0.0",
+        "primary_column": "geometry",
+        "columns": {"geometry": {"encoding": "WKB", "geometry_types": []}},
+    }
+    table = table.replace_schema_metadata(
+        {**(table.schema.metadata or {}), b"geo": json.dumps(geo).encode("utf-8")}
+    )
+    writer = pq.ParquetWriter(f, table.schema)
+    writer.write_table(table)
+    return writer
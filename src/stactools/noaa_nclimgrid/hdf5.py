@@ -0,0 +1,138 @@
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+import h5py
+import numpy as np
+from numpy.typing import NDArray
+
+from stactools.noaa_nclimgrid.session import FileSystemSession, open_href
+
+
+class SliceReader:
+    """Reads time slices of netCDF variables directly with h5py.
+
+    Opening a netCDF file with xarray decodes CF times, loads the coordinate
+    variables, and builds indexes, which costs more than reading a single
+    time slice. A SliceReader opens only the HDF5 structure of the file:
+    reading a time slice selects the chunks that intersect it (one chunk for
+    NClimGrid, which is chunked by time slice), decompresses them, and
+    applies the CF fill value, scale, and offset of the variable, like
+    xarray does. Time coordinates are not decoded; use xarray for metadata,
+    e.g., :py:func:`day_index` and :py:func:`month_index`.
+
+    Args:
+        file_object (Any): Open, binary file-like object, or a local path.
+    """
+
+    def __init__(self, file_object: Any):
+        self._file = h5py.File(file_object, "r")
+        self._encodings: Dict[str, Dict[str, Any]] = {}
+        latitudes = self._file["lat"]
+        self.flip = bool(latitudes[0] < latitudes[-1])
+
+    def read(self, var: str, time_index: int) -> NDArray[Any]:
+        """Reads a time slice of a variable, oriented north-up.
+
+        Args:
+            var (str): One of 'prcp', 'tavg', 'tmax', or 'tmin'.
+            time_index (int): Zero-based index into the data timestack.
+
+        Returns:
+            NDArray[Any]: The decoded time slice, with the first row at the
+                northern edge.
+        """
+        variable = self._file[var]
+        values: NDArray[Any] = variable[time_index]
+        values = _decode(values, self._encoding(var))
+        if self.flip:
+            values = np.flipud(values)
+        return values
+
+    def close(self) -> None:
+        """Closes the HDF5 file."""
+        self._file.close()
+
+    def _encoding(self, var: str) -> Dict[str, Any]:
+        if var not in self._encodings:
+            attrs = self._file[var].attrs
+            self._encodings[var] = {
+                "fill_values": [
+                    _scalar(attrs[name])
+                    for name in ["_FillValue", "missing_value"]
+                    if name in attrs
+                ],
+                "scale_factor": _scalar(attrs.get("scale_factor")),
+                "add_offset": _scalar(attrs.get("add_offset")),
+            }
+        return self._encodings[var]
+
+
+def _scalar(value: Any) -> Any:
+    if value is None:
+        return None
+    return np.asarray(value).ravel()[0]
+
+
+def _decode(values: NDArray[Any], encoding: Dict[str, Any]) -> NDArray[Any]:
+    scale_factor = encoding["scale_factor"]
+    add_offset = encoding["add_offset"]
+    fill_values = [v for v in encoding["fill_values"] if not _is_nan(v)]
+    if not fill_values and scale_factor is None and add_offset is None:
+        return values
+
+    # xarray decodes integer data to float32 if the scale and offset fit,
+    # and keeps floating point data in its own type.
+    dtype = values.dtype if values.dtype.kind == "f" else np.dtype(np.float32)
+    if scale_factor is not None or add_offset is not None:
+        dtype = np.result_type(
+            dtype,
+            *[np.asarray(v).dtype for v in [scale_factor, add_offset] if v is not None],
+        )
+    mask = np.isin(values, fill_values) if fill_values else None
+    decoded = values.astype(dtype)
+    if scale_factor is not None:
+        decoded *= scale_factor
+    if add_offset is not None:
+        decoded += add_offset
+    if mask is not None:
+        decoded[mask] = np.nan
+    return decoded
+
+
+def _is_nan(value: Any) -> bool:
+    return bool(np.issubdtype(np.asarray(value).dtype, np.floating)) and bool(
+        np.isnan(value)
+    )
+
+
+@contextmanager
+def open_slice_reader(
+    href: str, session: Optional[FileSystemSession] = None
+) -> Iterator[SliceReader]:
+    """Opens a netCDF HREF as a :py:class:`SliceReader`, through a session if
+    provided.
+
+    If the session has a :py:class:`DatasetCache`, the reader is taken from
+    or added to the cache and stays open when the context exits.
+
+    Args:
+        href (str): HREF to open.
+        session (Optional[FileSystemSession]): Optional session to open the
+            HREF with.
+
+    Returns:
+        Iterator[SliceReader]: The open reader.
+    """
+    if session is not None and session.datasets is not None:
+        opener = session.open
+        with session.datasets.open(
+            href, lambda: opener(href), loader=SliceReader
+        ) as reader:
+            yield reader
+    else:
+        with open_href(href, session) as file_object:
+            reader = SliceReader(file_object)
+            try:
+                yield reader
+            finally:
+                reader.close()
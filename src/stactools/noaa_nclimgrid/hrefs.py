@@ -0,0 +1,16 @@
+from urllib.parse import urlsplit, urlunsplit
+
+
+def strip_query(href: str) -> str:
+    """Removes the query string and fragment from an HREF.
+
+    Signed HREFs for the same file, e.g., with different SAS tokens, are the
+    same after their query strings are removed.
+
+    Args:
+        href (str): HREF, which may be signed.
+
+    Returns:
+        str: The HREF without its query string and fragment.
+    """
+    return urlunsplit(urlsplit(href)._replace(query="", fragment=""))
@@ -0,0 +1,179 @@
+import logging
+from typing import Any, Dict, Optional
+
+import fsspec
+import numpy as np
+import rasterio
+import rasterio.features
+import shapely.geometry
+import shapely.ops
+from numpy.typing import NDArray
+from stactools.core.io import ReadHrefModifier
+from stactools.core.utils import href_exists
+
+from stactools.noaa_nclimgrid.cog import TRANSFORM
+from stactools.noaa_nclimgrid.constants import Variable
+from stactools.noaa_nclimgrid.session import FileSystemSession, open_dataset
+from stactools.noaa_nclimgrid.utils import modify_href, nc_href_dict
+
+logger = logging.getLogger(__name__)
+
+# Simplification tolerance, in degrees, for footprint geometries. About two
+# pixels, which keeps the CONUS footprint to a few hundred vertices.
+FOOTPRINT_TOLERANCE = 0.1
+
+
+class LandMask:
+    """The static footprint of valid (non-NaN) NClimGrid pixels.
+
+    NClimGrid data are NaN over the ocean and outside CONUS in every time
+    slice, so multi-pass computations that only need valid pixels, e.g.,
+    accumulating statistics, can work on the ~57% of the grid inside the
+    mask. Single reductions over a time slice are faster on the full grid,
+    since gathering the valid pixels costs as much as the reduction.
+
+    Args:
+        mask (NDArray[np.bool_]): Boolean grid, oriented north-up, that is
+            True for valid pixels.
+    """
+
+    def __init__(self, mask: NDArray[np.bool_]):
+        self.mask = mask
+        self.indices = np.flatnonzero(mask)
+
+    @classmethod
+    def from_netcdf(
+        cls,
+        nc_href: str,
+        read_href_modifier: Optional[ReadHrefModifier] = None,
+        session: Optional[FileSystemSession] = None,
+    ) -> "LandMask":
+        """Derives the mask from the first time slice of the precipitation
+        netCDF file of a set of netCDF files.
+
+        Args:
+            nc_href (str): HREF to a netCDF containing data for one of the
+                four variables (prcp, tavg, tmax, tmin).
+            read_href_modifier (Optional[ReadHrefModifier]): An optional
+                function to modify an href (e.g., to add a token to a url).
+            session (Optional[FileSystemSession]): Optional shared filesystem
+                session used to open the netCDF file.
+
+        Returns:
+            LandMask: The mask.
+        """
+        nc_prcp_href = nc_href_dict(nc_href)[Variable.PRCP]
+        read_href = modify_href(nc_prcp_href, read_href_modifier=read_href_modifier)
+        with open_dataset(read_href, session) as dataset:
+            mask = np.isfinite(dataset[Variable.PRCP.value].isel(time=0).values)
+            if dataset.lat.values[0] < dataset.lat.values[-1]:
+                mask = np.flipud(mask)
+        return cls(mask)
+
+    @classmethod
+    def read(cls, href: str) -> "LandMask":
+        """Reads a mask written with :py:meth:`write`.
+
+        Args:
+            href (str): HREF to the mask file.
+
+        Returns:
+            LandMask: The mask.
+        """
+        with fsspec.open(href, "rb") as f:
+            with np.load(f) as data:
+                shape = tuple(data["shape"])
+                mask = np.unpackbits(data["mask"], count=int(np.prod(shape)))
+        return cls(mask.reshape(shape).astype(bool))
+
+    def write(self, href: str) -> None:
+        """Writes the mask as a compressed, bit-packed NumPy .npz file.
+
+        Args:
+            href (str): Destination HREF.
+        """
+        with fsspec.open(href, "wb") as f:
+            np.savez_compressed(
+                f, mask=np.packbits(self.mask), shape=np.array(self.mask.shape)
+            )
+
+    def compress(self, values: NDArray[Any]) -> NDArray[Any]:
+        """Selects the valid pixels of one or more time slices.
+
+        Args:
+            values (NDArray[Any]): Time slice, or time slices stacked along
+                the first axis, oriented like the mask.
+
+        Returns:
+            NDArray[Any]: Valid pixel values, flattened over the grid axes.
+        """
+        flat = values.reshape(*values.shape[:-2], -1)
+        compressed: NDArray[Any] = flat[..., self.indices]
+        return compressed
+
+    def expand(self, values: NDArray[Any]) -> NDArray[Any]:
+        """Scatters valid pixel values, as returned by :py:meth:`compress` for
+        a single time slice, back onto the grid.
+
+        Args:
+            values (NDArray[Any]): Valid pixel values.
+
+        Returns:
+            NDArray[Any]: Grid with NaN outside the mask.
+        """
+        grid = np.full(self.mask.size, np.nan, dtype=values.dtype)
+        grid[self.indices] = values
+        return grid.reshape(self.mask.shape)
+
+    def footprint(self, tolerance: float = FOOTPRINT_TOLERANCE) -> Dict[str, Any]:
+        """Creates a GeoJSON geometry of the valid pixels.
+
+        Args:
+            tolerance (float): Simplification tolerance in degrees.
+
+        Returns:
+            Dict[str, Any]: A GeoJSON Polygon or MultiPolygon.
+        """
+        shapes = rasterio.features.shapes(
+            self.mask.astype(np.uint8),
+            mask=self.mask,
+            transform=rasterio.Affine(*TRANSFORM),
+        )
+        geometry = shapely.ops.unary_union(
+            [shapely.geometry.shape(shape) for shape, _ in shapes]
+        )
+        # Simplified parts can overlap; buffer(0) merges them into a valid
+        # geometry.
+        geometry = geometry.simplify(tolerance, preserve_topology=True).buffer(0)
+        return dict(shapely.geometry.mapping(geometry))
+
+
+def load_land_mask(
+    href: str,
+    nc_href: str,
+    read_href_modifier: Optional[ReadHrefModifier] = None,
+    session: Optional[FileSystemSession] = None,
+) -> LandMask:
+    """Reads a persisted land mask, or derives it from a set of netCDF files
+    and persists it if it does not exist yet.
+
+    Args:
+        href (str): HREF of the persisted mask.
+        nc_href (str): HREF to a netCDF containing data for one of the four
+            variables (prcp, tavg, tmax, tmin).
+        read_href_modifier (Optional[ReadHrefModifier]): An optional function
+            to modify an href (e.g., to add a token to a url).
+        session (Optional[FileSystemSession]): Optional shared filesystem
+            session used to open the netCDF file.
+
+    Returns:
+        LandMask: The mask.
+    """
+    if href_exists(href):
+        return LandMask.read(href)
+    logger.info(f"Deriving land mask from {nc_href}")
+    land_mask = LandMask.from_netcdf(
+        nc_href, read_href_modifier=read_href_modifier, session=session
+    )
+    land_mask.write(href)
+    return land_mask
@@ -0,0 +1,181 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import weakref
+from typing import Any, BinaryIO, Dict, List, Tuple
+from urllib.parse import urlsplit
+
+from fsspec import AbstractFileSystem
+
+from stactools.noaa_nclimgrid.hrefs import strip_query
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_SIZE = 10 * 2**30
+
+# Keys in fsspec `info` dictionaries that change when a remote file changes,
+# e.g., 'ETag' for HTTP and S3, 'etag' and 'last_modified' for Azure.
+VALIDATOR_KEYS = ["etag", "last_modified", "lastmodified", "last-modified", "mtime"]
+
+
+class MirrorCache:
+    """A size-bounded, on-disk mirror of remote files.
+
+    Remote files are downloaded once into `cache_dir` and read locally
+    afterwards. Cached files are revalidated against the remote ETag or
+    Last-Modified value (falling back to size) the first time they are used
+    by a MirrorCache instance, and re-downloaded if they changed. The least
+    recently used files are evicted when the cache grows beyond `max_size`.
+    The cache directory can be shared by several processes.
+
+    Revalidation uses the metadata request of the fsspec filesystem (`info`,
+    e.g., an HTTP HEAD request) rather than a conditional GET, which fsspec
+    does not offer across protocols. An unchanged file costs one request, as
+    a conditional GET would; a changed file costs one extra request.
+
+    Cache entries are keyed by HREF without its query string, so signed HREFs
+    for the same file share an entry. Files are opened while holding the lock
+    of their entry, and eviction skips entries whose lock is held, so a file
+    is never evicted between being validated and being opened. Evicting a
+    file that is already open only unlinks it.
+
+    Args:
+        cache_dir (str): Local directory for cached files.
+        max_size (int): Maximum total size, in bytes, of cached files. Default
+            is 10 GiB.
+    """
+
+    def __init__(self, cache_dir: str, max_size: int = DEFAULT_MAX_SIZE):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self._validated: Dict[str, str] = {}
+        # Locks are only referenced here weakly, so the lock of an entry is
+        # dropped once no thread is using the entry.
+        self._key_locks: "weakref.WeakValueDictionary[str, _KeyLock]" = (
+            weakref.WeakValueDictionary()
+        )
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def open(self, href: str, fs: AbstractFileSystem) -> BinaryIO:
+        """Opens a cached copy of a remote file, downloading it if it is
+        missing or stale.
+
+        Args:
+            href (str): HREF of the remote file.
+            fs (AbstractFileSystem): Filesystem used to read the remote file.
+
+        Returns:
+            BinaryIO: The cached file, open for binary reading.
+        """
+        key = _cache_key(href)
+        with self._lock:
+            key_lock = self._key_locks.get(key)
+            if key_lock is None:
+                key_lock = _KeyLock()
+                self._key_locks[key] = key_lock
+
+        with key_lock.lock:
+            path = self._fetch(href, key, fs)
+            file_object = open(path, "rb")
+            with self._lock:
+                self._validated[key] = path
+                self._evict()
+        return file_object
+
+    def _fetch(self, href: str, key: str, fs: AbstractFileSystem) -> str:
+        with self._lock:
+            path = self._validated.get(key)
+        if path is not None and os.path.exists(path):
+            _touch(path)
+            return path
+
+        path, meta_path = self._paths(href, key)
+        validators = _validators(fs.info(href))
+        cached_validators = None
+        if os.path.exists(path) and os.path.exists(meta_path):
+            with open(meta_path) as f:
+                cached_validators = json.load(f).get("validators")
+
+        if validators and cached_validators == validators:
+            _touch(path)
+        else:
+            logger.info(f"Mirroring {strip_query(href)} to {path}")
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            fs.get_file(href, temp_path)
+            os.replace(temp_path, path)
+            with open(meta_path, "w") as f:
+                json.dump({"href": strip_query(href), "validators": validators}, f)
+        return path
+
+    def size(self) -> int:
+        """Returns the total size, in bytes, of the cached files."""
+        return sum(size for _, size, _ in self._entries())
+
+    def _paths(self, href: str, key: str) -> Tuple[str, str]:
+        extension = os.path.splitext(urlsplit(href).path)[1]
+        path = os.path.join(self.cache_dir, f"{key}{extension}")
+        return path, os.path.join(self.cache_dir, f"{key}.json")
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith((".json", ".tmp")) or not entry.is_file():
+                continue
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            key = os.path.splitext(os.path.basename(path))[0]
+            key_lock = self._key_locks.get(key)
+            if key_lock is not None and not key_lock.lock.acquire(blocking=False):
+                continue
+            try:
+                logger.info(f"Evicting {path} from mirror cache")
+                for remove_path in [path, f"{os.path.splitext(path)[0]}.json"]:
+                    try:
+                        os.remove(remove_path)
+                    except FileNotFoundError:
+                        pass
+                self._validated.pop(key, None)
+            finally:
+                if key_lock is not None:
+                    key_lock.lock.release()
+            total -= size
+
+
+class _KeyLock:
+    """The lock of a cache entry, in an object that can be weakly
+    referenced."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+
+
+def _cache_key(href: str) -> str:
+    return hashlib.sha256(strip_query(href).encode("utf-8")).hexdigest()
+
+
+def _validators(info: Dict[str, Any]) -> Dict[str, str]:
+    lower_info = {key.lower(): value for key, value in info.items()}
+    validators = {
+        key: str(lower_info[key]) for key in VALIDATOR_KEYS if lower_info.get(key)
+    }
+    if not validators and info.get("size") is not None:
+        validators["size"] = str(info["size"])
+    return validators
+
+
+def _touch(path: str) -> None:
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
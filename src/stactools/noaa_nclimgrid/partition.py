@@ -0,0 +1,349 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import TemporaryDirectory
+from typing import Any, Dict, List, Optional, Tuple
+
+from fsspec.core import split_protocol
+from stactools.core.io import ReadHrefModifier
+
+from stactools.noaa_nclimgrid.cog import create_cogs, existing_cog_href
+from stactools.noaa_nclimgrid.constants import Frequency, Variable
+from stactools.noaa_nclimgrid.session import FileSystemSession, open_dataset
+from stactools.noaa_nclimgrid.timeindex import TimeIndex
+from stactools.noaa_nclimgrid.utils import (
+    cached_read_href_modifier,
+    day_index,
+    modify_href,
+    month_index,
+    nc_href_dict,
+)
+
+# Typical size, in bytes, of a float32 and a quantized NClimGrid COG, and
+# the time, in seconds, to read a time slice from a local netCDF file and
+# write it as a COG on a single core. Measured on the test data; use
+# `calibrate` to measure them on the machine that will run the job.
+COG_BYTES = {False: 1_300_000, True: 850_000}
+SECONDS_PER_COG = {False: 0.5, True: 0.25}
+
+# Number of threads used to look up existing COGs, which are one metadata
+# request each for remote COG locations.
+EXISTENCE_CHECK_WORKERS = 16
+
+
+def time_units(
+    nc_href: str,
+    read_href_modifier: Optional[ReadHrefModifier] = None,
+    session: Optional[FileSystemSession] = None,
+) -> List[Any]:
+    """Lists the temporal units, in ascending order, available in a set of
+    netCDF files.
+
+    A temporal unit is a day (int) for daily data or a YYYYMM date string for
+    monthly data.
+
+    Args:
+        nc_href (str): HREF to a netCDF containing data for one of the four
+            variables (prcp, tavg, tmax, tmin).
+        read_href_modifier (Optional[ReadHrefModifier]): An optional function
+            to modify an href (e.g., to add a token to a url).
+        session (Optional[FileSystemSession]): Optional shared filesystem
+            session used to open the netCDF file.
+
+    Returns:
+        List[Any]: List of days or YYYYMM date strings in ascending order.
+    """
+    index = _time_index(
+        nc_href_dict(nc_href)[Variable.PRCP],
+        read_href_modifier=read_href_modifier,
+        session=session,
+    )
+    if index.frequency == Frequency.DAILY:
+        return index.days()
+    return index.labels()
+
+
+def plan_shards(
+    nc_hrefs: List[str],
+    num_shards: int,
+    read_href_modifier: Optional[ReadHrefModifier] = None,
+    session: Optional[FileSystemSession] = None,
+) -> List[List[Dict[str, Any]]]:
+    """Splits the temporal units of one or more sets of netCDF files into
+    balanced shards.
+
+    Each shard is a list of tasks. A task is a dictionary containing an
+    `href` and either a `day_range` (daily data) or a `month_range` (monthly
+    data), which map directly onto the arguments of
+    :py:func:`stactools.noaa_nclimgrid.stac.create_items`. Shard sizes differ
+    by at most one temporal unit and the plan is deterministic for a given
+    list of HREFs.
+
+    Args:
+        nc_hrefs (List[str]): HREFs to netCDF files, one per group of four
+            variable files.
+        num_shards (int): Number of shards to create.
+        read_href_modifier (Optional[ReadHrefModifier]): An optional function
+            to modify an href (e.g., to add a token to a url).
+        session (Optional[FileSystemSession]): Optional shared filesystem
+            session used to open the netCDF files.
+
+    Returns:
+        List[List[Dict[str, Any]]]: A list of shards. Empty shards are
+            dropped, so fewer than `num_shards` may be returned when there
+            are fewer temporal units than shards.
+    """
+    if num_shards < 1:
+        raise ValueError("'num_shards' must be >= 1")
+
+    if session is None:
+        session = FileSystemSession()
+
+    units: List[Tuple[str, Any]] = []
+    for nc_href in nc_hrefs:
+        units.extend(
+            (nc_href, unit)
+            for unit in time_units(
+                nc_href, read_href_modifier=read_href_modifier, session=session
+            )
+        )
+
+    shards: List[List[Dict[str, Any]]] = []
+    for shard_index in range(num_shards):
+        start = shard_index * len(units) // num_shards
+        end = (shard_index + 1) * len(units) // num_shards
+        if start < end:
+            shards.append(_tasks(units[start:end]))
+
+    return shards
+
+
+def _tasks(units: List[Tuple[str, Any]]) -> List[Dict[str, Any]]:
+    tasks: List[Dict[str, Any]] = []
+    for nc_href, unit in units:
+        range_key = (
+            "day_range"
+            if Frequency.from_href(nc_href) == Frequency.DAILY
+            else "month_range"
+        )
+        if tasks and tasks[-1]["href"] == nc_href:
+            tasks[-1][range_key][1] = unit
+        else:
+            tasks.append({"href": nc_href, range_key: [unit, unit]})
+    return tasks
+
+
+def plan_items(
+    nc_href: str,
+    cog_check_href: Optional[str] = None,
+    day_range: Optional[Tuple[int, int]] = None,
+    month_range: Optional[Tuple[str, str]] = None,
+    read_href_modifier: Optional[ReadHrefModifier] = None,
+    session: Optional[FileSystemSession] = None,
+    quantized: bool = False,
+    calibration: Optional[Dict[str, float]] = None,
+) -> Dict[str, Any]:
+    """Plans a :py:func:`stactools.noaa_nclimgrid.stac.create_items` run
+    without creating any COGs or Items.
+
+    The temporal units are listed and existing COGs are looked up in
+    `cog_check_href` exactly as in `create_items`. Bytes read are estimated
+    from the netCDF file sizes and the number of time slices in each file,
+    and bytes written and time from typical COG sizes and encoding times, or
+    from a `calibration` measured with :py:func:`calibrate`.
+
+    Args:
+        nc_href (str): HREF to a netCDF containing data for one of the four
+            variables (prcp, tavg, tmax, tmin).
+        cog_check_href (Optional[str]): HREF to a location to check for
+            existing COG files.
+        day_range (Optional[Tuple[int, int]]): Optional start and end day of
+            month for daily data.
+        month_range (Optional[Tuple[str, str]]): Optional start and end
+            YYYYMM date strings for monthly data.
+        read_href_modifier (Optional[ReadHrefModifier]): An optional function
+            to modify an href (e.g., to add a token to a url).
+        session (Optional[FileSystemSession]): Optional shared filesystem
+            session used to open the netCDF files.
+        quantized (bool): Flag to plan quantized COGs. Default is False.
+        calibration (Optional[Dict[str, float]]): Optional measured
+            `cog_bytes` and `seconds_per_cog`, as returned by
+            :py:func:`calibrate`.
+
+    Returns:
+        Dict[str, Any]: The plan, with the number of temporal `units`, the
+            number of COGs to create (`cogs_to_create`) and reuse
+            (`cogs_existing`), and estimated `input_bytes`, `output_bytes`,
+            and `seconds`.
+    """
+    read_href_modifier = cached_read_href_modifier(read_href_modifier)
+    if session is None:
+        session = FileSystemSession()
+    if calibration is None:
+        calibration = {
+            "cog_bytes": COG_BYTES[quantized],
+            "seconds_per_cog": SECONDS_PER_COG[quantized],
+        }
+
+    nc_hrefs = nc_href_dict(nc_href)
+    units = _time_index(
+        nc_hrefs[Variable.PRCP],
+        day_range=day_range,
+        month_range=month_range,
+        read_href_modifier=read_href_modifier,
+        session=session,
+    ).units()
+
+    checks = [(var, unit) for var in nc_hrefs for unit in units]
+    existing = [False] * len(checks)
+    if cog_check_href is not None:
+        with ThreadPoolExecutor(max_workers=EXISTENCE_CHECK_WORKERS) as executor:
+            existing = list(
+                executor.map(
+                    lambda check: existing_cog_href(
+                        nc_hrefs[check[0]], check[0], cog_check_href, **check[1]
+                    )
+                    is not None,
+                    checks,
+                )
+            )
+
+    num_times = _num_times(nc_hrefs[Variable.PRCP], read_href_modifier, session)
+    slice_bytes = {
+        var: _size(var_href, read_href_modifier, session) / num_times
+        for var, var_href in nc_hrefs.items()
+    }
+    cogs_to_create = 0
+    input_bytes = 0
+    for (var, _), exists in zip(checks, existing):
+        if not exists:
+            cogs_to_create += 1
+            input_bytes += int(slice_bytes[var])
+
+    return {
+        "href": nc_href,
+        "units": len(units),
+        "cogs_to_create": cogs_to_create,
+        "cogs_existing": len(units) * len(nc_hrefs) - cogs_to_create,
+        "input_bytes": input_bytes,
+        "output_bytes": int(cogs_to_create * calibration["cog_bytes"]),
+        "seconds": round(cogs_to_create * calibration["seconds_per_cog"], 1),
+    }
+
+
+def calibrate(
+    nc_href: str,
+    read_href_modifier: Optional[ReadHrefModifier] = None,
+    session: Optional[FileSystemSession] = None,
+    quantized: bool = False,
+) -> Dict[str, float]:
+    """Measures the size of, and time to create, the COGs of the first
+    temporal unit of a set of netCDF files, in a temporary directory.
+
+    The first temporal unit is taken from the time index of the files, so
+    files that do not start on the first day of the month or in January
+    1895 are calibrated on their own data.
+
+    Args:
+        nc_href (str): HREF to a netCDF containing data for one of the four
+            variables (prcp, tavg, tmax, tmin).
+        read_href_modifier (Optional[ReadHrefModifier]): An optional function
+            to modify an href (e.g., to add a token to a url).
+        session (Optional[FileSystemSession]): Optional shared filesystem
+            session used to open the netCDF files.
+        quantized (bool): Flag to measure quantized COGs. Default is False.
+
+    Returns:
+        Dict[str, float]: The mean `cog_bytes` and `seconds_per_cog`.
+    """
+    nc_hrefs = nc_href_dict(nc_href)
+    index = _time_index(
+        nc_hrefs[Variable.PRCP], read_href_modifier=read_href_modifier, session=session
+    )
+    if not len(index):
+        raise ValueError(f"No time slices found in {nc_href}")
+    unit = index.head(1).units()[0]
+    file_info: Dict[str, Dict[str, Any]] = {}
+    with TemporaryDirectory() as cog_dir:
+        start = time.perf_counter()
+        cog_hrefs, _ = create_cogs(
+            nc_hrefs,
+            cog_dir,
+            read_href_modifier=read_href_modifier,
+            session=session,
+            quantized=quantized,
+            file_info=file_info,
+            **unit,
+        )
+        seconds = time.perf_counter() - start
+    cog_bytes = sum(properties["file:size"] for properties in file_info.values())
+    return {
+        "cog_bytes": cog_bytes / len(cog_hrefs),
+        "seconds_per_cog": seconds / len(cog_hrefs),
+    }
+
+
+def summarize_plans(plans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Totals the plans of several sets of netCDF files.
+
+    Args:
+        plans (List[Dict[str, Any]]): Plans, as returned by
+            :py:func:`plan_items`.
+
+    Returns:
+        Dict[str, Any]: Totals of each count and estimate, and the plans.
+    """
+    keys = [
+        "units",
+        "cogs_to_create",
+        "cogs_existing",
+        "input_bytes",
+        "output_bytes",
+        "seconds",
+    ]
+    total = {key: sum(plan[key] for plan in plans) for key in keys}
+    total["seconds"] = round(total["seconds"], 1)
+    return {**total, "plans": plans}
+
+
+def _time_index(
+    href: str,
+    day_range: Optional[Tuple[int, int]] = None,
+    month_range: Optional[Tuple[str, str]] = None,
+    read_href_modifier: Optional[ReadHrefModifier] = None,
+    session: Optional[FileSystemSession] = None,
+) -> TimeIndex:
+    if Frequency.from_href(href) == Frequency.DAILY:
+        index = day_index(
+            href,
+            day_range=day_range,
+            read_href_modifier=read_href_modifier,
+            session=session,
+        )
+    else:
+        index = month_index(
+            href,
+            month_range=month_range,
+            read_href_modifier=read_href_modifier,
+            session=session,
+        )
+    return index.ordered(descending=False)
+
+
+def _num_times(
+    href: str,
+    read_href_modifier: Optional[ReadHrefModifier],
+    session: Optional[FileSystemSession],
+) -> int:
+    read_href = modify_href(href, read_href_modifier=read_href_modifier)
+    with open_dataset(read_href, session) as dataset:
+        return int(dataset.sizes["time"])
+
+
+def _size(
+    href: str,
+    read_href_modifier: Optional[ReadHrefModifier],
+    session: FileSystemSession,
+) -> int:
+    read_href = modify_href(href, read_href_modifier=read_href_modifier)
+    fs = session.filesystem(split_protocol(read_href)[0] or "file")
+    return int(fs.size(read_href))
@@ -0,0 +1,165 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from stactools.noaa_nclimgrid.session import ReadMetrics
+
+
+class ProgressEvent:
+    """Progress of a run over temporal units (days or months).
+
+    Attributes:
+        done (int): Number of units done.
+        total (int): Number of units in the run.
+        unit (Optional[str]): Label of the last unit done, e.g., a day of
+            month or a YYYYMM date, or None for the start event.
+        cogs (int): Number of COGs created.
+        bytes_read (int): Number of bytes read from remote files. Reads of
+            local files are not counted.
+        bytes_written (int): Number of bytes of created COGs.
+        elapsed (float): Seconds since the start of the run.
+    """
+
+    def __init__(
+        self,
+        done: int,
+        total: int,
+        unit: Optional[str],
+        cogs: int,
+        bytes_read: int,
+        bytes_written: int,
+        elapsed: float,
+    ):
+        self.done = done
+        self.total = total
+        self.unit = unit
+        self.cogs = cogs
+        self.bytes_read = bytes_read
+        self.bytes_written = bytes_written
+        self.elapsed = elapsed
+
+    @property
+    def cogs_per_second(self) -> float:
+        """COGs created per second."""
+        return self.cogs / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def read_mb_per_second(self) -> float:
+        """Megabytes read from remote files per second."""
+        return self.bytes_read / 1e6 / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def write_mb_per_second(self) -> float:
+        """Megabytes of COGs written per second."""
+        return self.bytes_written / 1e6 / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Estimated seconds until the run completes, from the average time
+        per unit so far, or None before the first unit is done."""
+        if self.done == 0:
+            return None
+        return (self.total - self.done) * self.elapsed / self.done
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the event as a JSON-serializable dictionary.
+
+        Returns:
+            Dict[str, Any]: Attributes and rates of the event.
+        """
+        eta = self.eta
+        return {
+            "done": self.done,
+            "total": self.total,
+            "unit": self.unit,
+            "cogs": self.cogs,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "elapsed": round(self.elapsed, 3),
+            "cogs_per_second": round(self.cogs_per_second, 3),
+            "read_mb_per_second": round(self.read_mb_per_second, 3),
+            "write_mb_per_second": round(self.write_mb_per_second, 3),
+            "eta": None if eta is None else round(eta, 1),
+        }
+
+
+ProgressCallback = Callable[[ProgressEvent], None]
+
+
+class ProgressTracker:
+    """Thread-safe tracker that emits a :py:class:`ProgressEvent` to a
+    callback at the start of a run and each time a unit is done.
+
+    Callbacks are called while holding the tracker lock, so they are never
+    called concurrently and events arrive in order.
+
+    Args:
+        total (int): Number of units in the run.
+        callback (ProgressCallback): Function called with each event.
+        metrics (Optional[ReadMetrics]): Optional remote read counters, e.g.,
+            :py:attr:`FileSystemSession.metrics`, from which the bytes read
+            are taken.
+    """
+
+    def __init__(
+        self,
+        total: int,
+        callback: ProgressCallback,
+        metrics: Optional[ReadMetrics] = None,
+    ):
+        self.total = total
+        self.callback = callback
+        self.metrics = metrics
+        self.done = 0
+        self.cogs = 0
+        self.bytes_written = 0
+        self._initial_bytes_read = metrics.bytes if metrics else 0
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Emits the start event."""
+        with self._lock:
+            self._start = time.perf_counter()
+            self.callback(self._event(None))
+
+    def update(
+        self,
+        unit: str,
+        created_cogs: List[str],
+        file_info: Dict[str, Dict[str, Any]],
+    ) -> None:
+        """Records a unit as done and emits an event.
+
+        Args:
+            unit (str): Label of the unit.
+            created_cogs (List[str]): HREFs of the COGs created for the unit.
+            file_info (Dict[str, Dict[str, Any]]): Mapping of COG file names
+                to file properties, as filled in by :py:func:`create_cogs`,
+                from which the sizes of the created COGs are taken, so that
+                the COG directory is not accessed again.
+        """
+        nbytes = sum(
+            file_info.get(os.path.basename(href), {}).get("file:size", 0)
+            for href in created_cogs
+        )
+        with self._lock:
+            self.done += 1
+            self.cogs += len(created_cogs)
+            self.bytes_written += nbytes
+            self.callback(self._event(unit))
+
+    def _event(self, unit: Optional[str]) -> ProgressEvent:
+        bytes_read = 0
+        if self.metrics is not None:
+            bytes_read = self.metrics.bytes - self._initial_bytes_read
+        return ProgressEvent(
+            done=self.done,
+            total=self.total,
+            unit=unit,
+            cogs=self.cogs,
+            bytes_read=bytes_read,
+            bytes_written=self.bytes_written,
+            elapsed=time.perf_counter() - self._start,
+        )
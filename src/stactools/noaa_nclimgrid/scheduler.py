@@ -0,0 +1,186 @@
+import logging
+import os
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Copies of a time slice held at once while creating a COG: the decoded
+# array, its north-up copy, the GTiff MemoryFile, and the COG encoding
+# buffers.
+SLICE_COPIES = 4
+
+# Additional float32-sized copies held while quantizing a time slice, which
+# is done in float64.
+QUANTIZE_COPIES = 6
+
+_UNITS = {
+    "": 1,
+    "b": 1,
+    "kb": 10**3,
+    "mb": 10**6,
+    "gb": 10**9,
+    "tb": 10**12,
+    "kib": 2**10,
+    "mib": 2**20,
+    "gib": 2**30,
+    "tib": 2**40,
+}
+
+
+def parse_memory(value: str) -> int:
+    """Parses a memory size such as '4GB', '512MiB', or '1000000'.
+
+    Args:
+        value (str): Number of bytes, optionally followed by a decimal (KB,
+            MB, GB, TB) or binary (KiB, MiB, GiB, TiB) unit.
+
+    Returns:
+        int: Number of bytes.
+    """
+    match = re.fullmatch(r"\s*([0-9]*\.?[0-9]+)\s*([a-zA-Z]*)\s*", value)
+    if match is None or match.group(2).lower() not in _UNITS:
+        raise ValueError(f"Invalid memory size: '{value}'")
+    return int(float(match.group(1)) * _UNITS[match.group(2).lower()])
+
+
+def slice_memory(
+    shape: Tuple[int, int], dtype: str = "float32", quantized: bool = False
+) -> int:
+    """Estimates the peak memory used to create a COG from one time slice.
+
+    Args:
+        shape (Tuple[int, int]): Shape of the time slice.
+        dtype (str): Data type of the time slice. Default is float32.
+        quantized (bool): Flag indicating that the slice is quantized before
+            it is written. Default is False.
+
+    Returns:
+        int: Estimated number of bytes.
+    """
+    copies = SLICE_COPIES + (QUANTIZE_COPIES if quantized else 0)
+    return copies * int(np.prod(shape)) * np.dtype(dtype).itemsize
+
+
+def peak_rss() -> Optional[int]:
+    """Returns the peak resident set size of the current process.
+
+    Returns:
+        Optional[int]: Peak RSS in bytes, or None if it is not available on
+            this platform.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere.
+    return int(max_rss) if sys.platform == "darwin" else int(max_rss) * 1024
+
+
+def current_rss() -> Optional[int]:
+    """Returns the current resident set size of the current process.
+
+    Returns:
+        Optional[int]: Current RSS in bytes, or None if it is not available
+            on this platform.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+class MemoryBudget:
+    """A budget of memory shared by concurrently running tasks.
+
+    Tasks reserve their estimated memory use before they run and wait while
+    the reservations of running tasks would exceed the budget. A task whose
+    estimate alone exceeds the budget runs once no other task is running.
+
+    Args:
+        max_memory (int): Budget in bytes.
+    """
+
+    def __init__(self, max_memory: int):
+        self.max_memory = max_memory
+        self.reserved = 0
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def reserve(self, nbytes: int) -> Iterator[None]:
+        """Reserves memory for the duration of the context, waiting until
+        enough of the budget is free.
+
+        Args:
+            nbytes (int): Number of bytes to reserve.
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self.reserved == 0 or self.reserved + nbytes <= self.max_memory
+            )
+            self.reserved += nbytes
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.reserved -= nbytes
+                self._condition.notify_all()
+
+
+def map_with_budget(
+    func: Callable[[T], R],
+    tasks: Sequence[T],
+    task_memory: int,
+    max_memory: int,
+    max_workers: Optional[int] = None,
+) -> List[R]:
+    """Runs a function over tasks in a thread pool, with the number of
+    concurrent tasks limited by a memory budget.
+
+    The memory currently used by the process, measured as its current RSS
+    where the platform reports it, is subtracted from the budget, so the
+    budget can be set to the memory available to the process, e.g., the
+    memory limit of a worker. Elsewhere, only the estimated memory of the
+    tasks counts against the budget.
+
+    Args:
+        func (Callable[[T], R]): Function to run for each task.
+        tasks (Sequence[T]): Tasks.
+        task_memory (int): Estimated peak memory, in bytes, used by one task.
+        max_memory (int): Memory budget, in bytes, for the process.
+        max_workers (Optional[int]): Maximum number of threads. Defaults to
+            the number of CPUs.
+
+    Returns:
+        List[R]: Results, in the order of `tasks`.
+    """
+    baseline = current_rss() or 0
+    budget = MemoryBudget(max(max_memory - baseline, 0))
+    workers = max_workers or os.cpu_count() or 1
+    workers = max(1, min(workers, len(tasks), budget.max_memory // task_memory))
+    if budget.max_memory < task_memory:
+        logger.warning(
+            f"Memory budget of {max_memory} bytes leaves {budget.max_memory} "
+            f"bytes for tasks that need {task_memory} bytes; running one task "
+            "at a time"
+        )
+    logger.info(f"Running {len(tasks)} tasks with up to {workers} threads")
+
+    def run(task: T) -> R:
+        with budget.reserve(task_memory):
+            return func(task)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(run, tasks))
@@ -0,0 +1,584 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+import fsspec
+import fsspec.caching
+import xarray
+from fsspec import AbstractFileSystem
+from fsspec.core import split_protocol, strip_protocol
+
+from stactools.noaa_nclimgrid.hrefs import strip_query
+from stactools.noaa_nclimgrid.mirror import MirrorCache
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# NClimGrid netCDF variables are chunked as one (1, 596, 1385) float32 time
+# slice per chunk, which is ~1 MiB after compression.
+DEFAULT_BLOCK_SIZE = 2**20
+DEFAULT_CACHE_TYPE = "coalescing"
+LOCAL_PROTOCOLS = ["file", "local"]
+
+# Number of retries of a failed remote request, and the base and maximum
+# delay, in seconds, of the exponential backoff between retries.
+DEFAULT_RETRIES = 5
+DEFAULT_BACKOFF = 0.5
+MAX_BACKOFF = 30.0
+
+# Number of blocks kept by the coalescing cache of each open file.
+DEFAULT_MAX_BLOCKS = 32
+
+# HTTP status codes of transient errors.
+RETRY_STATUSES = [408, 429, 500, 502, 503, 504]
+
+# Number of netCDF datasets kept open by a dataset cache, and the number of
+# seconds after which a remote dataset is reopened to pick up re-issued files.
+DEFAULT_MAX_OPEN = 16
+DEFAULT_MAX_AGE = 300.0
+
+
+class ReadMetrics:
+    """Thread-safe counters of remote read requests.
+
+    Attributes:
+        requests (int): Number of range requests made.
+        bytes (int): Number of bytes received.
+        retries (int): Number of retried requests, including file opens.
+        failures (int): Number of requests that failed after all retries.
+    """
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.bytes = 0
+        self.retries = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def add(self, **counts: int) -> None:
+        """Adds to one or more counters.
+
+        Args:
+            counts (int): Increments, keyed by counter name.
+        """
+        with self._lock:
+            for name, count in counts.items():
+                setattr(self, name, getattr(self, name) + count)
+
+    def to_dict(self) -> Dict[str, int]:
+        """Returns the counters as a dictionary.
+
+        Returns:
+            Dict[str, int]: Counter values, keyed by counter name.
+        """
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "bytes": self.bytes,
+                "retries": self.retries,
+                "failures": self.failures,
+            }
+
+
+class CoalescingBlockCache(fsspec.caching.BaseCache):  # type: ignore[misc]
+    """An fsspec cache of fixed-size blocks that fetches each run of
+    adjacent missing blocks with a single range request.
+
+    fsspec's 'blockcache' requests every block separately, so a compressed
+    HDF5 chunk spanning two blocks costs two requests. This cache requests
+    the chunk with one, and keeps the most recently used blocks for reads of
+    the chunk index and neighboring chunks.
+
+    Args:
+        blocksize (int): Block size in bytes.
+        fetcher (Callable[[int, int], bytes]): Function fetching a byte
+            range of the file.
+        size (int): Size of the file in bytes.
+        maxblocks (int): Maximum number of blocks kept.
+    """
+
+    name = "coalescing"
+
+    def __init__(
+        self,
+        blocksize: int,
+        fetcher: Callable[[int, int], bytes],
+        size: int,
+        maxblocks: int = DEFAULT_MAX_BLOCKS,
+    ) -> None:
+        super().__init__(blocksize, fetcher, size)
+        self.maxblocks = maxblocks
+        self._blocks: "OrderedDict[int, bytes]" = OrderedDict()
+
+    def _fetch(self, start: Optional[int], stop: Optional[int]) -> bytes:
+        start = 0 if start is None else start
+        stop = self.size if stop is None else min(stop, self.size)
+        if start >= stop:
+            return b""
+
+        first = start // self.blocksize
+        last = (stop - 1) // self.blocksize
+        missing = [n for n in range(first, last + 1) if n not in self._blocks]
+        for run in _runs(missing):
+            run_start = run[0] * self.blocksize
+            run_stop = min((run[-1] + 1) * self.blocksize, self.size)
+            data = self.fetcher(run_start, run_stop)
+            for n in run:
+                offset = (n - run[0]) * self.blocksize
+                block_stop = offset + self.blocksize
+                self._blocks[n] = data[offset:block_stop]
+
+        parts = []
+        for n in range(first, last + 1):
+            self._blocks.move_to_end(n)
+            parts.append(self._blocks[n])
+        while len(self._blocks) > max(self.maxblocks, last - first + 1):
+            self._blocks.popitem(last=False)
+
+        offset = first * self.blocksize
+        part_start, part_stop = start - offset, stop - offset
+        return b"".join(parts)[part_start:part_stop]
+
+
+fsspec.caching.caches[CoalescingBlockCache.name] = CoalescingBlockCache
+
+
+def _runs(blocks: List[int]) -> List[List[int]]:
+    runs: List[List[int]] = []
+    for block in blocks:
+        if runs and runs[-1][-1] == block - 1:
+            runs[-1].append(block)
+        else:
+            runs.append([block])
+    return runs
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """Returns True if an error of a remote request is likely transient,
+    e.g., a dropped connection, a timeout, or a 5xx HTTP status.
+
+    Args:
+        error (BaseException): The error.
+
+    Returns:
+        bool: True if the request should be retried.
+    """
+    status = getattr(error, "status", None) or getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status in RETRY_STATUSES
+    if isinstance(error, (FileNotFoundError, PermissionError, IsADirectoryError)):
+        return False
+    if isinstance(error, (OSError, asyncio.TimeoutError)):
+        return True
+    # Errors of the async HTTP client that are not OSErrors, e.g.,
+    # aiohttp.ServerDisconnectedError and aiohttp.ClientPayloadError, or
+    # fsspec.exceptions.FSTimeoutError.
+    return type(error).__module__.split(".")[0] in ["aiohttp", "fsspec"]
+
+
+def retry_call(
+    func: Callable[[], T],
+    retries: int = DEFAULT_RETRIES,
+    backoff: float = DEFAULT_BACKOFF,
+    metrics: Optional[ReadMetrics] = None,
+) -> T:
+    """Calls a function, retrying transient errors with exponential backoff
+    and full jitter.
+
+    Args:
+        func (Callable[[], T]): Function to call.
+        retries (int): Maximum number of retries.
+        backoff (float): Base delay in seconds. The delay before retry `n`
+            is drawn uniformly from [0, min(30, backoff * 2 ** n)].
+        metrics (Optional[ReadMetrics]): Optional counters to which retries
+            and failures are added.
+
+    Returns:
+        T: The return value of `func`.
+    """
+    attempt = 0
+    while True:
+        try:
+            return func()
+        except Exception as error:
+            if attempt >= retries or not is_transient_error(error):
+                if metrics is not None:
+                    metrics.add(failures=1)
+                raise
+            delay = random.uniform(0, min(MAX_BACKOFF, backoff * 2**attempt))
+            logger.warning(
+                f"Retrying after {type(error).__name__}: {error} "
+                f"(retry {attempt + 1} of {retries} in {delay:.1f}s)"
+            )
+            if metrics is not None:
+                metrics.add(retries=1)
+            time.sleep(delay)
+            attempt += 1
+
+
+class _OpenDataset:
+    def __init__(self, href: str, validator: Optional[Any]) -> None:
+        self.href = href
+        self.file_object: Any = None
+        self.dataset: Any = None
+        self.validator = validator
+        self.opened = time.monotonic()
+        self.lock = threading.Lock()
+        # Set once the entry is closed or fails to load; threads that were
+        # waiting for it open the HREF again.
+        self.closed = False
+        # Set when a stale entry is replaced while in use; the thread using
+        # it closes it on release.
+        self.retired = False
+
+    def close(self) -> None:
+        self.closed = True
+        if self.dataset is not None:
+            self.dataset.close()
+        if self.file_object is not None:
+            self.file_object.close()
+
+
+def _load_xarray(file_object: Any) -> xarray.Dataset:
+    # Without cache=False, xarray keeps the values of every variable that is
+    # read in full, e.g., for a reduction, in memory for as long as the
+    # dataset is open.
+    return xarray.open_dataset(file_object, cache=False)
+
+
+class DatasetCache:
+    """A least recently used cache of open netCDF datasets.
+
+    Opening a netCDF file reads its superblock, metadata, and chunk indices,
+    which costs several round trips for remote files. A long-running process
+    that reads the same files repeatedly, e.g., a worker serving many
+    requests, can keep them open instead. Local files are reopened when
+    their modification time or size changes, and remote files when they have
+    been open for longer than `max_age`, so re-issued files are picked up.
+
+    Datasets are keyed by HREF without its query string, so signed HREFs for
+    the same file share an entry, and by the function that loads them, e.g.,
+    xarray or a :py:class:`SliceReader`. A dataset is only used by one thread
+    at a time, since reads through a shared file object are not thread-safe.
+
+    Args:
+        max_open (int): Maximum number of open datasets. Default is 16.
+        max_age (float): Maximum number of seconds a remote dataset is kept
+            open. Default is 300.
+    """
+
+    def __init__(
+        self, max_open: int = DEFAULT_MAX_OPEN, max_age: float = DEFAULT_MAX_AGE
+    ):
+        self.max_open = max_open
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, str], _OpenDataset]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def open(
+        self,
+        href: str,
+        opener: Callable[[], Any],
+        loader: Callable[[Any], Any] = _load_xarray,
+    ) -> Iterator[Any]:
+        """Returns a context manager for the open dataset of an HREF, opening
+        it on first use.
+
+        Args:
+            href (str): HREF of the netCDF file.
+            opener (Callable[[], Any]): Function opening the HREF as a
+                binary file-like object, e.g., :py:meth:`FileSystemSession.open`.
+            loader (Callable[[Any], Any]): Function creating the dataset from
+                the file-like object. The dataset must have a `close` method.
+                Default opens an xarray Dataset.
+
+        Returns:
+            Iterator[Any]: The open dataset, which must not be used after the
+                context exits.
+        """
+        key = (loader.__qualname__, strip_query(href))
+        validator = _local_validator(href)
+        while True:
+            # The cache lock is only held to look up or reserve the entry.
+            # Opening and loading, and waiting for another thread to finish
+            # with the dataset, happen outside of it.
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and self._is_stale(entry, validator):
+                    self._retire(key, entry)
+                    entry = None
+                loading = entry is None
+                if entry is None:
+                    self.misses += 1
+                    entry = _OpenDataset(key[1], validator)
+                    entry.lock.acquire()
+                    self._entries[key] = entry
+                else:
+                    self.hits += 1
+                self._entries.move_to_end(key)
+                self._evict()
+
+            if loading:
+                try:
+                    entry.file_object = opener()
+                    entry.dataset = loader(entry.file_object)
+                except Exception:
+                    with self._lock:
+                        if self._entries.get(key) is entry:
+                            del self._entries[key]
+                    self._close(entry)
+                    entry.lock.release()
+                    raise
+                break
+
+            entry.lock.acquire()
+            if not entry.closed:
+                break
+            # Evicted, or failed to load, while waiting.
+            entry.lock.release()
+
+        try:
+            yield entry.dataset
+        finally:
+            self._release(entry)
+
+    def close(self) -> None:
+        """Closes all open datasets. Datasets in use are closed when they are
+        released."""
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                self._retire(key, entry)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _is_stale(self, entry: _OpenDataset, validator: Optional[Any]) -> bool:
+        if validator is not None or entry.validator is not None:
+            return validator != entry.validator
+        return time.monotonic() - entry.opened > self.max_age
+
+    def _evict(self) -> None:
+        for key, entry in list(self._entries.items()):
+            if len(self._entries) <= self.max_open:
+                break
+            # Datasets in use by another thread are evicted on a later open.
+            if entry.lock.acquire(blocking=False):
+                try:
+                    del self._entries[key]
+                    self._close(entry)
+                finally:
+                    entry.lock.release()
+
+    def _retire(self, key: Tuple[str, str], entry: _OpenDataset) -> None:
+        # Called with the cache lock held. A dataset in use by another thread
+        # is closed by that thread when it is released.
+        del self._entries[key]
+        if entry.lock.acquire(blocking=False):
+            try:
+                self._close(entry)
+            finally:
+                entry.lock.release()
+        else:
+            entry.retired = True
+
+    def _release(self, entry: _OpenDataset) -> None:
+        with self._lock:
+            if not entry.retired:
+                entry.lock.release()
+                return
+        self._close(entry)
+        entry.lock.release()
+
+    def _close(self, entry: _OpenDataset) -> None:
+        try:
+            entry.close()
+        except Exception as error:
+            logger.warning(f"Error closing {entry.href}: {error}")
+
+
+def _local_validator(href: str) -> Optional[Tuple[int, int]]:
+    protocol = split_protocol(href)[0] or "file"
+    if protocol not in LOCAL_PROTOCOLS:
+        return None
+    try:
+        stat = os.stat(strip_protocol(href))
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class FileSystemSession:
+    """Shared fsspec filesystems and read settings for opening netCDF files.
+
+    One filesystem instance is created per protocol and reused for every file
+    opened through the session, so remote reads share a connection pool.
+    Files are opened with the session cache type and block size, which
+    controls how fsspec groups the random reads made by the HDF5 library into
+    range requests.
+
+    Remote opens and range requests are retried with exponential backoff
+    when they fail with a transient error, and counted in :py:attr:`metrics`.
+
+    If a :py:class:`MirrorCache` is given, remote files are read from a local
+    mirror instead, which is populated and revalidated on first use.
+
+    If a :py:class:`DatasetCache` is given, netCDF datasets opened with
+    :py:func:`open_dataset` are kept open for reuse.
+
+    Args:
+        cache_type (str): fsspec cache type for opened files, e.g.,
+            'coalescing' (:py:class:`CoalescingBlockCache`), 'readahead',
+            'bytes', or 'none'. Default is 'coalescing'.
+        block_size (int): Block size, in bytes, for opened files. Default is
+            1 MiB, matching the compressed size of a single time slice chunk.
+        storage_options (Optional[Dict[str, Dict[str, Any]]]): Optional
+            mapping of protocol (e.g., 'https') to keyword arguments for the
+            filesystem, e.g., `client_kwargs` for aiohttp connection limits.
+        mirror (Optional[MirrorCache]): Optional on-disk mirror for remote
+            files.
+        retries (int): Maximum number of retries of a failed remote request.
+            Default is 5.
+        backoff (float): Base delay, in seconds, of the exponential backoff
+            between retries. Default is 0.5.
+        datasets (Optional[DatasetCache]): Optional cache of open netCDF
+            datasets.
+    """
+
+    def __init__(
+        self,
+        cache_type: str = DEFAULT_CACHE_TYPE,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        storage_options: Optional[Dict[str, Dict[str, Any]]] = None,
+        mirror: Optional[MirrorCache] = None,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+        datasets: Optional[DatasetCache] = None,
+    ):
+        self.cache_type = cache_type
+        self.block_size = block_size
+        self.storage_options = storage_options or {}
+        self.mirror = mirror
+        self.retries = retries
+        self.backoff = backoff
+        self.datasets = datasets
+        self.metrics = ReadMetrics()
+        self._filesystems: Dict[str, AbstractFileSystem] = {}
+        self._lock = threading.Lock()
+
+    def filesystem(self, protocol: str) -> AbstractFileSystem:
+        """Returns the session filesystem for a protocol, creating it on first
+        use.
+
+        Args:
+            protocol (str): fsspec protocol, e.g., 'file' or 'https'.
+
+        Returns:
+            AbstractFileSystem: The shared filesystem.
+        """
+        with self._lock:
+            if protocol not in self._filesystems:
+                self._filesystems[protocol] = fsspec.filesystem(
+                    protocol, **self.storage_options.get(protocol, {})
+                )
+            return self._filesystems[protocol]
+
+    def open(self, href: str) -> Any:
+        """Opens an HREF for binary reading.
+
+        Args:
+            href (str): HREF to open.
+
+        Returns:
+            Any: An open, binary file-like object, which can be used as a
+                context manager.
+        """
+        protocol = split_protocol(href)[0] or "file"
+        if protocol in LOCAL_PROTOCOLS:
+            return self.filesystem(protocol).open(href, mode="rb")
+
+        fs = self.filesystem(protocol)
+        if self.mirror is not None:
+            mirror = self.mirror
+            return self._retry(lambda: mirror.open(href, fs))
+
+        file_object = self._retry(
+            lambda: fs.open(
+                href,
+                mode="rb",
+                block_size=self.block_size,
+                cache_type=self.cache_type,
+            )
+        )
+        cache = getattr(file_object, "cache", None)
+        if cache is not None and getattr(cache, "fetcher", None) is not None:
+            cache.fetcher = self._fetcher(cache.fetcher)
+        return file_object
+
+    def _retry(self, func: Callable[[], T]) -> T:
+        return retry_call(func, self.retries, self.backoff, self.metrics)
+
+    def _fetcher(
+        self, fetcher: Callable[[int, int], bytes]
+    ) -> Callable[[int, int], bytes]:
+        def fetch(start: int, stop: int) -> bytes:
+            data = self._retry(lambda: fetcher(start, stop))
+            self.metrics.add(requests=1, bytes=len(data))
+            return data
+
+        return fetch
+
+
+def open_href(href: str, session: Optional[FileSystemSession] = None) -> Any:
+    """Opens an HREF for binary reading, through a session if provided.
+
+    Args:
+        href (str): HREF to open.
+        session (Optional[FileSystemSession]): Optional session to open the
+            HREF with. If None, the HREF is opened with fsspec defaults.
+
+    Returns:
+        Any: An open, binary file-like object, which can be used as a context
+            manager.
+    """
+    if session is None:
+        return fsspec.open(href).open()
+    return session.open(href)
+
+
+@contextmanager
+def open_dataset(
+    href: str, session: Optional[FileSystemSession] = None
+) -> Iterator[xarray.Dataset]:
+    """Opens a netCDF HREF as an xarray Dataset, through a session if
+    provided.
+
+    If the session has a :py:class:`DatasetCache`, the dataset is taken from
+    or added to the cache and stays open when the context exits. Otherwise,
+    the dataset and file are closed.
+
+    Args:
+        href (str): HREF to open.
+        session (Optional[FileSystemSession]): Optional session to open the
+            HREF with.
+
+    Returns:
+        Iterator[xarray.Dataset]: The open dataset.
+    """
+    if session is not None and session.datasets is not None:
+        opener = session.open
+        with session.datasets.open(href, lambda: opener(href)) as dataset:
+            yield dataset
+    else:
+        with open_href(href, session) as file_object:
+            with xarray.open_dataset(file_object) as dataset:
+                yield dataset
@@ -1,36 +1,239 @@
+import logging
 import os
 from calendar import monthrange
+from copy import deepcopy
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Tuple
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
 
 import stactools.core.create
 from pystac import Asset, Collection, Item
 from pystac.extensions.item_assets import AssetDefinition, ItemAssetsExtension
 from pystac.extensions.scientific import ScientificExtension
-from pystac.utils import make_absolute_href
+from pystac.utils import datetime_to_str, make_absolute_href
+from shapely.geometry import shape
 from stactools.core.io import ReadHrefModifier
 
-from stactools.noaa_nclimgrid import constants
-from stactools.noaa_nclimgrid.cog import create_cogs
+from stactools.noaa_nclimgrid import constants, dask_backend
+from stactools.noaa_nclimgrid.cog import (
+    GTIFF_PROFILE,
+    create_cogs,
+    read_file_manifest,
+    read_hash_manifest,
+    write_file_manifest,
+    write_hash_manifest,
+)
 from stactools.noaa_nclimgrid.constants import CollectionType, Frequency, Variable
+from stactools.noaa_nclimgrid.mask import LandMask
+from stactools.noaa_nclimgrid.progress import ProgressCallback, ProgressTracker
+from stactools.noaa_nclimgrid.scheduler import map_with_budget, peak_rss, slice_memory
+from stactools.noaa_nclimgrid.session import FileSystemSession
 from stactools.noaa_nclimgrid.utils import (
+    cached_read_href_modifier,
     cog_asset_dict,
-    day_indices,
-    month_indices,
+    day_index,
+    month_index,
     nc_asset_dict,
     nc_creation_date_dict,
     nc_href_dict,
 )
+from stactools.noaa_nclimgrid.validation import CogValidator, format_invalid
+
+logger = logging.getLogger(__name__)
+
+
+class ItemFactory:
+    """Creates STAC Items for many temporal units.
+
+    Asset templates are built once per frequency and the geometry, bbox, and
+    projection information are read from the first COG only, since all
+    NClimGrid COGs share the same grid. Use a single factory for all Items
+    created from the same COG writer, e.g., for a :py:func:`create_items`
+    run.
+
+    Args:
+        geometry (Optional[Dict[str, Any]]): Optional GeoJSON geometry to use
+            for all Items instead of the grid extent, e.g., the footprint of
+            valid pixels from :py:meth:`LandMask.footprint`. The Item bbox is
+            set to the bounds of the geometry.
+        quantized (bool): Flag to describe quantized integer COGs in the COG
+            asset `raster:bands`. Default is False.
+    """
+
+    def __init__(
+        self, geometry: Optional[Dict[str, Any]] = None, quantized: bool = False
+    ) -> None:
+        self._cog_assets: Dict[Frequency, Dict[Variable, Mapping[str, Any]]] = {}
+        self._nc_assets: Dict[Frequency, Dict[Variable, Mapping[str, Any]]] = {}
+        self._spatial: Optional[Item] = None
+        self._geometry = geometry
+        self._bbox = list(shape(geometry).bounds) if geometry else None
+        self._quantized = quantized
+
+    @property
+    def quantized(self) -> bool:
+        """Flag indicating that Items describe quantized integer COGs."""
+        return self._quantized
+
+    def create_item(
+        self,
+        cog_hrefs: Dict[Variable, str],
+        nc_hrefs: Optional[Dict[Variable, str]] = None,
+        nc_creation_dates: Optional[Dict[Variable, str]] = None,
+        file_info: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> Item:
+        """Creates a STAC Item with COG assets for a single temporal unit.
+
+        Args:
+            cog_hrefs (Dict[Variable, str]): A dictionary mapping variables
+                (keys) to COG HREFs (values).
+            nc_hrefs (Optional[Dict[Variable, str]]): An optional dictionary
+                mapping variables (keys) to netCDF HREFs (values). If present,
+                assets for the source netCDF files will be included in the
+                created Item.
+            nc_creation_dates (Optional[Dict[Variable, datetime]): An optional
+                dictionary mapping variables to netCDF file creation dates.
+            file_info (Optional[Dict[str, Dict[str, Any]]]): An optional
+                dictionary mapping COG file names to their `file:size` and
+                `file:checksum`, as computed by :py:func:`create_cogs`. COG
+                assets found in it are described with the STAC file
+                extension.
+
+        Returns:
+            Item: A STAC Item.
+        """
+        frequency = Frequency.from_href(cog_hrefs[Variable.PRCP])
+        collection_type = CollectionType.from_href(cog_hrefs[Variable.PRCP])
+        basename = os.path.splitext(os.path.basename(cog_hrefs[Variable.PRCP]))[0]
+
+        nominal_datetime: Optional[datetime] = None
+        if frequency == Frequency.DAILY:
+            id = basename[5:]
+            year = int(id[0:4])
+            month = int(id[4:6])
+            day = int(id[-2:])
+            start_datetime = datetime(year, month, day)
+            end_datetime = datetime(year, month, day, 23, 59, 59)
+            nominal_datetime = start_datetime
+        else:
+            id = f"nclimgrid-{basename[-6:]}"
+            year = int(id[-6:-2])
+            month = int(id[-2:])
+            start_datetime = datetime(year, month, 1)
+            end_datetime = datetime(year, month, monthrange(year, month)[1], 23, 59, 59)
+            nominal_datetime = None
+
+        item = self._item(
+            id, start_datetime, end_datetime, nominal_datetime, cog_hrefs[Variable.PRCP]
+        )
+
+        if "daily" in collection_type:
+            item.properties["nclimgrid:daily_type"] = collection_type[6:]
+
+        cog_assets, nc_assets = self._asset_templates(frequency)
+        for var in Variable:
+            asset = {**cog_assets[var], "href": make_absolute_href(cog_hrefs[var])}
+            if file_info:
+                asset.update(file_info.get(os.path.basename(cog_hrefs[var]), {}))
+            item.add_asset(var.value, Asset.from_dict(asset))
+        if any("file:checksum" in asset.extra_fields for asset in item.assets.values()):
+            item.stac_extensions.append(constants.FILE_EXTENSION_V21)
+        if nc_hrefs:
+            for var in Variable:
+                asset = {**nc_assets[var], "href": make_absolute_href(nc_hrefs[var])}
+                if nc_creation_dates:
+                    asset["created"] = nc_creation_dates[var]
+                item.add_asset(f"{var.value}_source", Asset.from_dict(asset))
+
+        return item
+
+    def create_derived_item(
+        self,
+        id: str,
+        start_datetime: datetime,
+        end_datetime: datetime,
+        assets: Dict[str, Dict[str, Any]],
+    ) -> Item:
+        """Creates a STAC Item for a product derived from NClimGrid data, e.g.,
+        climate normals, with the same geometry and projection information as
+        the Items created by :py:meth:`create_item`.
+
+        Args:
+            id (str): Item ID.
+            start_datetime (datetime): Start of the period the Item covers.
+            end_datetime (datetime): End of the period the Item covers.
+            assets (Dict[str, Dict[str, Any]]): Mapping of asset keys to
+                assets in dictionary form, including HREFs to COGs on the
+                NClimGrid grid.
+
+        Returns:
+            Item: A STAC Item.
+        """
+        first_asset = next(iter(assets.values()))
+        item = self._item(id, start_datetime, end_datetime, None, first_asset["href"])
+        for key, asset in assets.items():
+            asset = {**asset, "href": make_absolute_href(asset["href"])}
+            item.add_asset(key, Asset.from_dict(asset))
+        return item
+
+    def _item(
+        self,
+        id: str,
+        start_datetime: datetime,
+        end_datetime: datetime,
+        nominal_datetime: Optional[datetime],
+        cog_href: str,
+    ) -> Item:
+        if self._spatial is None:
+            self._spatial = stactools.core.create.item(cog_href)
+        properties = {
+            key: deepcopy(value)
+            for key, value in self._spatial.properties.items()
+            if key.startswith("proj:")
+        }
+        properties["start_datetime"] = datetime_to_str(start_datetime)
+        properties["end_datetime"] = datetime_to_str(end_datetime)
+
+        item = Item(
+            id=id,
+            geometry=deepcopy(self._geometry or self._spatial.geometry),
+            bbox=list(self._bbox or self._spatial.bbox or []),
+            datetime=nominal_datetime,
+            properties=properties,
+            stac_extensions=[
+                *self._spatial.stac_extensions,
+                constants.RASTER_EXTENSION_V11,
+            ],
+        )
+        item.common_metadata.created = datetime.now(tz=timezone.utc)
+        return item
+
+    def _asset_templates(
+        self, frequency: Frequency
+    ) -> Tuple[Dict[Variable, Mapping[str, Any]], Dict[Variable, Mapping[str, Any]]]:
+        if frequency not in self._cog_assets:
+            self._cog_assets[frequency] = {
+                var: MappingProxyType(
+                    cog_asset_dict(frequency, var, quantized=self._quantized)
+                )
+                for var in Variable
+            }
+            self._nc_assets[frequency] = {
+                var: MappingProxyType(nc_asset_dict(frequency, var)) for var in Variable
+            }
+        return self._cog_assets[frequency], self._nc_assets[frequency]
 
 
 def create_item(
     cog_hrefs: Dict[Variable, str],
     nc_hrefs: Optional[Dict[Variable, str]] = None,
     nc_creation_dates: Optional[Dict[Variable, str]] = None,
+    quantized: bool = False,
 ) -> Item:
     """Creates a STAC Item with COG assets for a single temporal unit.
 
-    A temporal unit is a day for daily data or a month for monthly data.
+    A temporal unit is a day for daily data or a month for monthly data. Use
+    an :py:class:`ItemFactory` when creating many Items.
 
     Args:
         cog_hrefs (Dict[Variable, str]): A dictionary mapping variables (keys) to
@@ -40,57 +243,15 @@ def create_item(
             the source netCDF files will be included in the created Item.
         nc_creation_dates (Optional[Dict[Variable, datetime]): An optional
             dictionary mapping variables to netCDF file creation dates.
+        quantized (bool): Flag indicating that the COGs are quantized integer
+            COGs. Default is False.
 
     Returns:
         Item: A STAC Item.
     """
-    frequency = Frequency.from_href(cog_hrefs[Variable.PRCP])
-    collection_type = CollectionType.from_href(cog_hrefs[Variable.PRCP])
-    basename = os.path.splitext(os.path.basename(cog_hrefs[Variable.PRCP]))[0]
-
-    nominal_datetime: Optional[datetime] = None
-    if frequency == Frequency.DAILY:
-        id = basename[5:]
-        year = int(id[0:4])
-        month = int(id[4:6])
-        day = int(id[-2:])
-        start_datetime = datetime(year, month, day)
-        end_datetime = datetime(year, month, day, 23, 59, 59)
-        nominal_datetime = start_datetime
-    else:
-        id = f"nclimgrid-{basename[-6:]}"
-        year = int(id[-6:-2])
-        month = int(id[-2:])
-        start_datetime = datetime(year, month, 1)
-        end_datetime = datetime(year, month, monthrange(year, month)[1], 23, 59, 59)
-        nominal_datetime = None
-
-    item = stactools.core.create.item(cog_hrefs[Variable.PRCP])
-    item.id = id
-    item.datetime = nominal_datetime
-    item.common_metadata.start_datetime = start_datetime
-    item.common_metadata.end_datetime = end_datetime
-    item.common_metadata.created = datetime.now(tz=timezone.utc)
-
-    if "daily" in collection_type:
-        item.properties["nclimgrid:daily_type"] = collection_type[6:]
-
-    item.assets.pop("data")
-    for var in Variable:
-        asset = cog_asset_dict(frequency, var)
-        asset["href"] = make_absolute_href(cog_hrefs[var])
-        item.add_asset(var.value, Asset.from_dict(asset))
-    if nc_hrefs:
-        for var in Variable:
-            asset = nc_asset_dict(frequency, var)
-            asset["href"] = make_absolute_href(nc_hrefs[var])
-            if nc_creation_dates:
-                asset["created"] = nc_creation_dates[var]
-            item.add_asset(f"{var.value}_source", Asset.from_dict(asset))
-
-    item.stac_extensions.append(constants.RASTER_EXTENSION_V11)
-
-    return item
+    return ItemFactory(quantized=quantized).create_item(
+        cog_hrefs, nc_hrefs, nc_creation_dates
+    )
 
 
 def create_items(
@@ -101,6 +262,17 @@ def create_items(
     day_range: Optional[Tuple[int, int]] = None,
     month_range: Optional[Tuple[str, str]] = None,
     read_href_modifier: Optional[ReadHrefModifier] = None,
+    dask_client: Optional[Any] = None,
+    session: Optional[FileSystemSession] = None,
+    hash_manifest: Optional[str] = None,
+    land_mask: Optional[LandMask] = None,
+    footprint: bool = False,
+    quantized: bool = False,
+    max_memory: Optional[int] = None,
+    item_factory: Optional[ItemFactory] = None,
+    progress: Optional[ProgressCallback] = None,
+    validate_cogs: bool = False,
+    file_manifest: Optional[str] = None,
 ) -> Tuple[List[Item], List[str]]:
     """Creates STAC Items for temporal units in set of netCDF files.
 
@@ -128,70 +300,230 @@ def create_items(
             start and end YYYYMM date strings. For example: (<start_YYYYMM>,
             <end_YYYYMM>).
         read_href_modifier (Optional[ReadHrefModifier]): An optional function
-            to modify an href (e.g., to add a token to a url).
+            to modify an href (e.g., to add a token to a url). Modified HREFs
+            are cached until shortly before they expire. Pass a
+            :py:class:`CachedReadHrefModifier` to share the cache across
+            calls.
+        dask_client (Optional[distributed.Client]): An optional Dask
+            distributed client. If present, COGs are created on the cluster
+            by delayed tasks that hold only HREFs: one per variable and group
+            of :py:data:`dask_backend.TIME_CHUNK` time slices. Each task
+            opens its netCDF HREF on its worker with the settings of
+            `session`, so `nc_href` and any HREF returned by
+            `read_href_modifier` must be readable from the workers, and
+            `cog_dir` writable by them. Requires the 'dask' extra.
+        session (Optional[FileSystemSession]): Optional filesystem session
+            used for all netCDF reads. If None, a session with the default
+            cache type and block size is created for the run.
+        hash_manifest (Optional[str]): Optional HREF to a JSON manifest of
+            COG data hashes. If present, existing COGs found with
+            `cog_check_href` are only reused if the hash of the source data
+            is unchanged, so re-issued files only produce COGs for changed
+            days or months. Existing COGs missing from the manifest are
+            hashed from their data. The manifest is created or updated at
+            the end of the run, also if the run fails. Not supported with
+            `dask_client`.
+        land_mask (Optional[LandMask]): Optional static mask of valid pixels,
+            e.g., from :py:func:`load_land_mask`, used for `footprint`.
+        footprint (bool): Flag to use the footprint of valid pixels as the
+            Item geometry instead of the grid extent. The footprint is
+            derived from `land_mask`, or from the netCDF files if no mask is
+            given. Default is False.
+        quantized (bool): Flag to create int16 (temperature) and uint16
+            (precipitation) COGs with a scale and offset instead of float32
+            COGs, which halves their size. Existing COGs found with
+            `cog_check_href` must have been created with the same setting.
+            Default is False.
+        max_memory (Optional[int]): Optional memory budget, in bytes, for
+            the process. If present, temporal units are processed
+            concurrently in threads, with the number of concurrent units
+            limited so that their estimated memory use, plus the memory
+            already used by the process, stays within the budget. The peak
+            RSS is logged at the end of the run. Not supported with
+            `dask_client`.
+        item_factory (Optional[ItemFactory]): Optional factory to reuse
+            across calls, e.g., in a long-running worker, created with the
+            same `quantized` setting. Not supported with `footprint`.
+        progress (Optional[ProgressCallback]): Optional function called with
+            a :py:class:`ProgressEvent` at the start of the run and after each
+            day or month, with the number of units done, COG and byte
+            throughput, and an estimated time to completion. With
+            `dask_client`, units are reported when all of them are done.
+        validate_cogs (bool): Flag to check that created COGs are valid
+            Cloud-Optimized GeoTIFFs with :py:func:`validate_cog`. COGs are
+            validated in a thread pool while the next days or months are
+            created, and a ValueError listing the problems of each invalid
+            COG is raised at the end of the run. Default is False.
+        file_manifest (Optional[str]): Optional HREF to a JSON manifest of
+            COG file sizes and checksums, created or updated by the run. The
+            `file:size` and `file:checksum` of created COGs are always
+            computed while they are written and recorded in their Item
+            assets; with a manifest, they are also recorded for existing
+            COGs reused from an earlier run.
 
     Returns:
         Tuple[List[Item], List[str]]:
             1. A list of created STAC Items.
             2. A list of HREFs to any newly created COGs.
     """
+    if hash_manifest is not None and dask_client is not None:
+        raise ValueError("'hash_manifest' is not supported with 'dask_client'")
+    if max_memory is not None and dask_client is not None:
+        raise ValueError("'max_memory' is not supported with 'dask_client'")
+    if item_factory is not None:
+        if footprint:
+            raise ValueError("'item_factory' is not supported with 'footprint'")
+        if item_factory.quantized != quantized:
+            raise ValueError("'item_factory' and 'quantized' do not match")
+
     frequency = Frequency.from_href(nc_href)
     nc_hrefs = nc_href_dict(nc_href)
+    read_href_modifier = cached_read_href_modifier(read_href_modifier)
+    if session is None:
+        session = FileSystemSession()
 
     if nc_assets:
         nc_creation_dates = nc_creation_date_dict(
-            nc_hrefs, read_href_modifier=read_href_modifier
+            nc_hrefs, read_href_modifier=read_href_modifier, session=session
         )
 
-    items: List[Item] = []
-    created_cogs: List[str] = []
     if frequency == Frequency.DAILY:
-        days = day_indices(
+        index = day_index(
             nc_hrefs[Variable.PRCP],
             day_range=day_range,
             read_href_modifier=read_href_modifier,
+            session=session,
         )
-        for day in days:
-            cog_hrefs, created_cog_hrefs = create_cogs(
-                nc_hrefs,
-                cog_dir,
-                day=day,
-                cog_check_href=cog_check_href,
-                read_href_modifier=read_href_modifier,
-            )
-            created_cogs.extend(created_cog_hrefs)
-
-            if nc_assets:
-                items.append(create_item(cog_hrefs, nc_hrefs, nc_creation_dates))
-            else:
-                items.append(create_item(cog_hrefs))
-
     else:
-        months = month_indices(
+        index = month_index(
             nc_hrefs[Variable.PRCP],
             month_range=month_range,
             read_href_modifier=read_href_modifier,
+            session=session,
+        )
+    units = index.units()
+
+    tracker = None
+    if progress is not None:
+        tracker = ProgressTracker(len(units), progress, metrics=session.metrics)
+        tracker.start()
+
+    data_hashes = None
+    if hash_manifest is not None:
+        data_hashes = read_hash_manifest(
+            hash_manifest, read_href_modifier=read_href_modifier
         )
-        for month in months:
-            cog_hrefs, created_cog_hrefs = create_cogs(
+
+    file_info: Dict[str, Dict[str, Any]] = {}
+    if file_manifest is not None:
+        file_info = read_file_manifest(
+            file_manifest, read_href_modifier=read_href_modifier
+        )
+
+    validator = CogValidator() if validate_cogs else None
+    try:
+        if dask_client is not None:
+            unit_cogs = dask_backend.create_cogs(
                 nc_hrefs,
                 cog_dir,
-                month=month,
+                units,
+                dask_client,
                 cog_check_href=cog_check_href,
                 read_href_modifier=read_href_modifier,
+                session=session,
+                quantized=quantized,
+                file_info=file_info,
             )
-            created_cogs.extend(created_cog_hrefs)
+            if tracker is not None:
+                for unit, (_, created_cog_hrefs) in zip(units, unit_cogs):
+                    tracker.update(_unit_label(unit), created_cog_hrefs, file_info)
+        else:
 
-            if nc_assets:
-                items.append(create_item(cog_hrefs, nc_hrefs, nc_creation_dates))
+            def create_unit_cogs(
+                unit: Dict[str, Any]
+            ) -> Tuple[Dict[Variable, str], List[str]]:
+                result = create_cogs(
+                    nc_hrefs,
+                    cog_dir,
+                    cog_check_href=cog_check_href,
+                    read_href_modifier=read_href_modifier,
+                    session=session,
+                    data_hashes=data_hashes,
+                    quantized=quantized,
+                    file_info=file_info,
+                    **unit,
+                )
+                if tracker is not None:
+                    tracker.update(_unit_label(unit), result[1], file_info)
+                if validator is not None:
+                    validator.submit(result[1])
+                return result
+
+            if max_memory is not None:
+                task_memory = slice_memory(
+                    (GTIFF_PROFILE["height"], GTIFF_PROFILE["width"]),
+                    quantized=quantized,
+                )
+                unit_cogs = map_with_budget(
+                    create_unit_cogs, units, task_memory, max_memory
+                )
+                logger.info(f"Peak RSS: {peak_rss()} bytes")
             else:
-                items.append(create_item(cog_hrefs))
+                unit_cogs = [create_unit_cogs(unit) for unit in units]
+
+        if validator is not None:
+            if dask_client is not None:
+                validator.submit(href for _, hrefs in unit_cogs for href in hrefs)
+            invalid = validator.invalid()
+            if invalid:
+                raise ValueError(
+                    f"{len(invalid)} invalid COGs:\n{format_invalid(invalid)}"
+                )
+    finally:
+        if validator is not None:
+            validator.close()
+        # Record the COGs written so far even if the run fails, so that a
+        # rerun reuses them.
+        if hash_manifest is not None and data_hashes is not None:
+            write_hash_manifest(hash_manifest, data_hashes)
+        if file_manifest is not None:
+            write_file_manifest(file_manifest, file_info)
+
+    geometry = None
+    if footprint:
+        if land_mask is None:
+            land_mask = LandMask.from_netcdf(
+                nc_href, read_href_modifier=read_href_modifier, session=session
+            )
+        geometry = land_mask.footprint()
+
+    if item_factory is None:
+        item_factory = ItemFactory(geometry=geometry, quantized=quantized)
+    items: List[Item] = []
+    created_cogs: List[str] = []
+    for cog_hrefs, created_cog_hrefs in unit_cogs:
+        created_cogs.extend(created_cog_hrefs)
+
+        if nc_assets:
+            items.append(
+                item_factory.create_item(
+                    cog_hrefs, nc_hrefs, nc_creation_dates, file_info=file_info
+                )
+            )
+        else:
+            items.append(item_factory.create_item(cog_hrefs, file_info=file_info))
 
     return (items, created_cogs)
 
 
+def _unit_label(unit: Dict[str, Any]) -> str:
+    if "day" in unit:
+        return str(unit["day"])
+    return str(unit["month"]["date"])
+
+
 def create_collection(
-    collection_type: CollectionType, nc_assets: bool = False
+    collection_type: CollectionType, nc_assets: bool = False, quantized: bool = False
 ) -> Collection:
     """Creates a STAC Collection for monthly or daily NClimGrid data.
 
@@ -200,6 +532,8 @@ def create_collection(
             'daily-scaled'.
         nc_assets (bool): Flag to include Item assets for the source netCDF
             files. Default is False.
+        quantized (bool): Flag to describe quantized integer COGs in the
+            Item assets. Default is False.
 
     Returns:
         Collection: A STAC collection for monthly or daily NClimGrid data.
@@ -227,7 +561,9 @@ def create_collection(
         else Frequency.DAILY
     )
     for var in Variable:
-        item_assets[var.value] = AssetDefinition(cog_asset_dict(frequency, var))
+        item_assets[var.value] = AssetDefinition(
+            cog_asset_dict(frequency, var, quantized=quantized)
+        )
     if nc_assets:
         for var in Variable:
             item_assets[f"{var.value}_source"] = AssetDefinition(
@@ -0,0 +1,164 @@
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from numpy.typing import NDArray
+
+from stactools.noaa_nclimgrid.constants import Frequency
+
+
+class TimeIndex:
+    """Time slices of a netCDF file, stored as parallel NumPy arrays.
+
+    Each time slice has a zero-based position in the netCDF time dimension
+    and an integer date: YYYYMM for monthly data and YYYYMMDD for daily
+    data. The arrays are kept in ascending date order, so selecting a range
+    of dates is a binary search and slicing does not copy, and the iteration
+    order is a flag. Temporal units in the form taken by
+    :py:func:`create_cogs` are only built for the selected time slices.
+
+    Args:
+        frequency (Frequency): Frequency of the data.
+        positions (NDArray[np.int64]): Zero-based positions in the time
+            dimension.
+        dates (NDArray[np.int64]): Dates of the time slices, in ascending
+            order.
+        descending (bool): Flag to iterate from the latest to the earliest
+            time slice. Default is False.
+    """
+
+    def __init__(
+        self,
+        frequency: Frequency,
+        positions: NDArray[np.int64],
+        dates: NDArray[np.int64],
+        descending: bool = False,
+    ) -> None:
+        if positions.shape != dates.shape:
+            raise ValueError("'positions' and 'dates' must have the same shape")
+        self.frequency = frequency
+        self.positions = positions
+        self.dates = dates
+        self.descending = descending
+
+    @classmethod
+    def from_times(cls, times: NDArray[Any], frequency: Frequency) -> "TimeIndex":
+        """Creates an index from the values of a netCDF time coordinate.
+
+        Args:
+            times (NDArray[Any]): Times, convertible to numpy.datetime64.
+            frequency (Frequency): Frequency of the data.
+
+        Returns:
+            TimeIndex: Index of the time slices, in ascending order.
+        """
+        times = np.asarray(times, dtype="datetime64[ns]")
+        months = times.astype("datetime64[M]").astype(np.int64)
+        dates = (months // 12 + 1970) * 100 + months % 12 + 1
+        if frequency == Frequency.DAILY:
+            days = (
+                times.astype("datetime64[D]") - times.astype("datetime64[M]")
+            ).astype(np.int64)
+            dates = dates * 100 + days + 1
+        positions = np.arange(len(dates), dtype=np.int64)
+        if np.any(np.diff(dates) < 0):
+            order = np.argsort(dates, kind="stable")
+            positions, dates = positions[order], dates[order]
+        return cls(frequency, positions, dates)
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @property
+    def first(self) -> Optional[int]:
+        """Earliest date, or None if the index is empty."""
+        return int(self.dates[0]) if len(self) else None
+
+    @property
+    def last(self) -> Optional[int]:
+        """Latest date, or None if the index is empty."""
+        return int(self.dates[-1]) if len(self) else None
+
+    def select(self, start: int, end: int) -> "TimeIndex":
+        """Selects the time slices in an inclusive range of dates.
+
+        Args:
+            start (int): Start date, in the format of :py:attr:`dates`.
+            end (int): End date, in the format of :py:attr:`dates`.
+
+        Returns:
+            TimeIndex: The selected time slices, in the same order.
+        """
+        lower = np.searchsorted(self.dates, start, side="left")
+        upper = np.searchsorted(self.dates, end, side="right")
+        return self._slice(slice(lower, upper))
+
+    def head(self, count: int) -> "TimeIndex":
+        """Selects the earliest time slices.
+
+        Args:
+            count (int): Number of time slices.
+
+        Returns:
+            TimeIndex: The selected time slices, in the same order.
+        """
+        return self._slice(slice(0, max(count, 0)))
+
+    def ordered(self, descending: bool) -> "TimeIndex":
+        """Returns the index with another iteration order.
+
+        Args:
+            descending (bool): Flag to iterate from the latest to the
+                earliest time slice.
+
+        Returns:
+            TimeIndex: The index, sharing the arrays of this one.
+        """
+        return TimeIndex(self.frequency, self.positions, self.dates, descending)
+
+    def labels(self) -> List[str]:
+        """Returns the dates as strings, in iteration order.
+
+        Returns:
+            List[str]: YYYYMM or YYYYMMDD date strings.
+        """
+        labels: List[str] = self._ordered(self.dates).astype(str).tolist()
+        return labels
+
+    def days(self) -> List[int]:
+        """Returns the days of month, in iteration order.
+
+        Returns:
+            List[int]: Days of month of daily time slices.
+        """
+        days: List[int] = (self._ordered(self.dates) % 100).tolist()
+        return days
+
+    def units(self) -> List[Dict[str, Any]]:
+        """Returns the temporal units, in iteration order, in the form taken
+        by :py:func:`create_cogs`.
+
+        Returns:
+            List[Dict[str, Any]]: Dictionaries with a `day` (day of month) key
+                for daily data, or a `month` key with the one-based `idx`
+                into the time dimension and the YYYYMM `date` for monthly
+                data.
+        """
+        if self.frequency == Frequency.DAILY:
+            return [{"day": day} for day in self.days()]
+        return [
+            {"month": {"idx": idx, "date": date}}
+            for idx, date in zip(
+                (self._ordered(self.positions) + 1).tolist(), self.labels()
+            )
+        ]
+
+    def _ordered(self, values: NDArray[np.int64]) -> NDArray[np.int64]:
+        return values[::-1] if self.descending else values
+
+    def _slice(self, selection: slice) -> "TimeIndex":
+        return TimeIndex(
+            self.frequency,
+            self.positions[selection],
+            self.dates[selection],
+            self.descending,
+        )
@@ -0,0 +1,200 @@
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas
+import xarray
+from numpy.typing import ArrayLike, NDArray
+from stactools.core.io import ReadHrefModifier
+
+from stactools.noaa_nclimgrid.cog import GTIFF_PROFILE, TRANSFORM
+from stactools.noaa_nclimgrid.constants import Variable
+from stactools.noaa_nclimgrid.session import FileSystemSession, open_href
+from stactools.noaa_nclimgrid.utils import modify_href, nc_href_dict
+
+# Number of time slices read at once. Each netCDF chunk is a single time
+# slice, so a block of 32 slices is ~100 MiB of float32 data.
+TIME_BLOCK = 32
+
+
+def grid_indices(
+    lats: ArrayLike, lons: ArrayLike
+) -> Tuple[NDArray[np.int64], NDArray[np.int64]]:
+    """Maps latitudes and longitudes to row and column indices in the
+    NClimGrid grid.
+
+    Rows are counted from the northern edge of the grid, as in the COGs
+    created by this package.
+
+    Args:
+        lats (ArrayLike): Latitudes in decimal degrees.
+        lons (ArrayLike): Longitudes in decimal degrees.
+
+    Returns:
+        Tuple[NDArray[np.int64], NDArray[np.int64]]: Row and column indices.
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    if lats.shape != lons.shape:
+        raise ValueError("'lats' and 'lons' must have the same shape")
+
+    x_size, _, x_origin, _, y_size, y_origin = TRANSFORM
+    rows = np.floor((lats - y_origin) / y_size).astype(np.int64)
+    cols = np.floor((lons - x_origin) / x_size).astype(np.int64)
+
+    outside = (
+        (rows < 0)
+        | (rows >= GTIFF_PROFILE["height"])
+        | (cols < 0)
+        | (cols >= GTIFF_PROFILE["width"])
+    )
+    if np.any(outside):
+        index = int(np.argmax(outside))
+        raise ValueError(
+            f"{int(np.sum(outside))} point(s) are outside the NClimGrid grid, "
+            f"e.g., ({lats.flat[index]}, {lons.flat[index]})"
+        )
+
+    return rows, cols
+
+
+def extract_timeseries(
+    nc_href: str,
+    lats: ArrayLike,
+    lons: ArrayLike,
+    ids: Optional[Sequence[Any]] = None,
+    read_href_modifier: Optional[ReadHrefModifier] = None,
+    session: Optional[FileSystemSession] = None,
+) -> pandas.DataFrame:
+    """Extracts the time series of all four variables at one or more points
+    from a set of netCDF files.
+
+    Each netCDF file is read once, in blocks of :py:data:`TIME_BLOCK` time
+    slices, regardless of the number of points. Time slices containing
+    precipitation fill data (not yet available days in daily files) are
+    dropped.
+
+    Args:
+        nc_href (str): HREF to a netCDF containing data for one of the four
+            variables (prcp, tavg, tmax, tmin). The netCDF files for the
+            remaining three variables must exist alongside `nc_href`.
+        lats (ArrayLike): Point latitudes in decimal degrees.
+        lons (ArrayLike): Point longitudes in decimal degrees.
+        ids (Optional[Sequence[Any]]): Optional point identifiers, e.g.,
+            station IDs. Defaults to the point index.
+        read_href_modifier (Optional[ReadHrefModifier]): An optional function
+            to modify an href (e.g., to add a token to a url).
+        session (Optional[FileSystemSession]): Optional shared filesystem
+            session used to open the netCDF files.
+
+    Returns:
+        pandas.DataFrame: One row per point and time, ordered by point and
+            then time, with 'id', 'lat', 'lon', and 'time' columns and one
+            column per variable.
+    """
+    lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+    lons = np.atleast_1d(np.asarray(lons, dtype=np.float64))
+    rows, cols = grid_indices(lats, lons)
+    if ids is None:
+        ids = list(range(len(lats)))
+    elif len(ids) != len(lats):
+        raise ValueError("'ids' must have the same length as 'lats' and 'lons'")
+
+    times = None
+    values: Dict[Variable, NDArray[Any]] = {}
+    for var, href in nc_href_dict(nc_href).items():
+        read_href = modify_href(href, read_href_modifier=read_href_modifier)
+        var_times, values[var] = _read_points(read_href, var, rows, cols, session)
+        if times is None:
+            times = var_times
+        elif not np.array_equal(times, var_times):
+            raise ValueError(f"Time coordinates of {href} do not match {nc_href}")
+    assert times is not None
+
+    valid = ~np.any(values[Variable.PRCP] < 0, axis=1)
+    num_times = int(np.sum(valid))
+    data: Dict[str, Any] = {
+        "id": np.repeat(np.asarray(ids, dtype=object), num_times),
+        "lat": np.repeat(lats, num_times),
+        "lon": np.repeat(lons, num_times),
+        "time": np.tile(times[valid], len(lats)),
+    }
+    for var in Variable:
+        data[var.value] = values[var][valid].T.ravel()
+    return pandas.DataFrame(data)
+
+
+def _read_points(
+    href: str,
+    var: str,
+    rows: NDArray[np.int64],
+    cols: NDArray[np.int64],
+    session: Optional[FileSystemSession],
+) -> Tuple[NDArray[Any], NDArray[Any]]:
+    with open_href(href, session) as file_object:
+        with xarray.open_dataset(file_object) as dataset:
+            if dataset.lat.values[0] < dataset.lat.values[-1]:
+                rows = GTIFF_PROFILE["height"] - 1 - rows
+            data_array = dataset[var]
+            num_times = data_array.sizes["time"]
+            values = np.empty((num_times, len(rows)), dtype=data_array.dtype)
+            for start in range(0, num_times, TIME_BLOCK):
+                stop = start + TIME_BLOCK
+                block = data_array.isel(time=slice(start, stop)).values
+                values[start:stop] = block[:, rows, cols]
+            return dataset.time.values, values
+
+
+def read_points(href: str) -> pandas.DataFrame:
+    """Reads point locations from a CSV file.
+
+    Args:
+        href (str): HREF to a CSV file with 'lat' and 'lon' columns and an
+            optional 'id' column.
+
+    Returns:
+        pandas.DataFrame: The points.
+    """
+    points = pandas.read_csv(href)
+    missing = [column for column in ["lat", "lon"] if column not in points.columns]
+    if missing:
+        raise ValueError(f"Points file {href} is missing column(s): {missing}")
+    return points
+
+
+def write_timeseries(timeseries: pandas.DataFrame, href: str) -> None:
+    """Writes time series to a CSV or, if `href` ends with '.parquet', a
+    Parquet file. Parquet output requires the 'geoparquet' extra.
+
+    Args:
+        timeseries (pandas.DataFrame): Time series, as returned by
+            :py:func:`extract_timeseries`.
+        href (str): Destination HREF.
+    """
+    if os.path.splitext(href)[1] == ".parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError(
+                "Writing Parquet requires the 'geoparquet' extra: "
+                "pip install stactools-noaa-nclimgrid[geoparquet]"
+            )
+        timeseries.to_parquet(href, index=False)
+    else:
+        timeseries.to_csv(href, index=False)
+
+
+def concat_timeseries(timeseries: List[pandas.DataFrame]) -> pandas.DataFrame:
+    """Concatenates time series extracted from several sets of netCDF files,
+    sorted by point and time.
+
+    Args:
+        timeseries (List[pandas.DataFrame]): Time series, as returned by
+            :py:func:`extract_timeseries`.
+
+    Returns:
+        pandas.DataFrame: The concatenated time series.
+    """
+    combined = pandas.concat(timeseries, ignore_index=True)
+    order = np.lexsort((combined["time"].values, pandas.factorize(combined["id"])[0]))
+    return combined.iloc[order].reset_index(drop=True)
@@ -1,16 +1,35 @@
-import operator
+import json
 import os
-from typing import Any, Dict, List, Optional, Tuple
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
 
 import fsspec
-import xarray
 from dateutil import parser
-from pystac import MediaType
+from fsspec.core import split_protocol
+from pystac import Item, MediaType
 from pystac.utils import datetime_to_str
 from stactools.core.io import ReadHrefModifier
+from stactools.core.utils import href_exists
 
 from stactools.noaa_nclimgrid import constants
 from stactools.noaa_nclimgrid.constants import Frequency, Variable
+from stactools.noaa_nclimgrid.session import FileSystemSession, open_dataset
+from stactools.noaa_nclimgrid.timeindex import TimeIndex
+
+try:
+    import orjson
+
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# Number of threads used to relocate asset files. Renames are metadata
+# operations, so the pool mostly helps copies across filesystems.
+RELOCATE_WORKERS = 16
 
 
 def modify_href(
@@ -32,6 +51,106 @@ def modify_href(
         return href
 
 
+class CachedReadHrefModifier:
+    """Wraps a ReadHrefModifier so that each HREF is only modified once until
+    the modified HREF is about to expire.
+
+    Expiry is read from the signature parameters of the modified HREF: Azure
+    SAS tokens (`se`) and AWS or Google Cloud presigned URLs
+    (`X-Amz-Date`/`X-Amz-Expires` or `X-Goog-Date`/`X-Goog-Expires`). Modified
+    HREFs without recognizable expiry parameters are cached for `max_age`
+    seconds, or indefinitely if `max_age` is None.
+
+    Args:
+        read_href_modifier (ReadHrefModifier): The function to wrap.
+        refresh_margin (float): Number of seconds before expiry at which a
+            cached HREF is considered stale and is modified again. Default is
+            300.
+        max_age (Optional[float]): Optional number of seconds to cache HREFs
+            that do not contain an expiry.
+    """
+
+    def __init__(
+        self,
+        read_href_modifier: ReadHrefModifier,
+        refresh_margin: float = 300,
+        max_age: Optional[float] = None,
+    ):
+        self.read_href_modifier = read_href_modifier
+        self.refresh_margin = timedelta(seconds=refresh_margin)
+        self.max_age = None if max_age is None else timedelta(seconds=max_age)
+        self._cache: Dict[str, Tuple[str, Optional[datetime]]] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, href: str) -> str:
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            cached = self._cache.get(href)
+        if cached is not None:
+            modified_href, expiry = cached
+            if expiry is None or now < expiry - self.refresh_margin:
+                return modified_href
+
+        modified_href = self.read_href_modifier(href)
+        expiry = href_expiry(modified_href)
+        if expiry is None and self.max_age is not None:
+            expiry = now + self.max_age
+        with self._lock:
+            self._cache[href] = (modified_href, expiry)
+        return modified_href
+
+
+def cached_read_href_modifier(
+    read_href_modifier: Optional[ReadHrefModifier],
+) -> Optional[ReadHrefModifier]:
+    """Wraps a ReadHrefModifier in a :py:class:`CachedReadHrefModifier`,
+    unless it is None or already cached.
+
+    Args:
+        read_href_modifier (Optional[ReadHrefModifier]): An optional function
+            to modify an href (e.g., to add a token to a url).
+
+    Returns:
+        Optional[ReadHrefModifier]: The cached ReadHrefModifier or None.
+    """
+    if read_href_modifier is None or isinstance(
+        read_href_modifier, CachedReadHrefModifier
+    ):
+        return read_href_modifier
+    return CachedReadHrefModifier(read_href_modifier)
+
+
+def href_expiry(href: str) -> Optional[datetime]:
+    """Returns the expiry time of a signed HREF.
+
+    Args:
+        href (str): An HREF that may contain an Azure SAS token or an AWS or
+            Google Cloud presigned URL signature.
+
+    Returns:
+        Optional[datetime]: The UTC expiry time, or None if the HREF does not
+            contain a recognizable expiry.
+    """
+    query = {
+        key.lower(): values[0] for key, values in parse_qs(urlparse(href).query).items()
+    }
+    try:
+        if "se" in query:
+            expiry = parser.isoparse(query["se"])
+            if expiry.tzinfo is None:
+                expiry = expiry.replace(tzinfo=timezone.utc)
+            return expiry
+        for prefix in ["x-amz-", "x-goog-"]:
+            if f"{prefix}date" in query and f"{prefix}expires" in query:
+                signed = datetime.strptime(
+                    query[f"{prefix}date"], "%Y%m%dT%H%M%SZ"
+                ).replace(tzinfo=timezone.utc)
+                return signed + timedelta(seconds=int(query[f"{prefix}expires"]))
+    except ValueError:
+        return None
+    return None
+
+
 def nc_href_dict(nc_href: str) -> Dict[Variable, str]:
     """Creates a dictionary mapping variables to netCDF HREFs.
 
@@ -58,18 +177,19 @@ def nc_href_dict(nc_href: str) -> Dict[Variable, str]:
     return href_dict
 
 
-def day_indices(
+def day_index(
     nc_prcp_href: str,
     day_range: Optional[Tuple[int, int]] = None,
     read_href_modifier: Optional[ReadHrefModifier] = None,
-) -> List[int]:
-    """Creates a list of days, in descending order, with valid precipitation
-    data in a daily 'prcp' netCDF file.
+    session: Optional[FileSystemSession] = None,
+) -> TimeIndex:
+    """Creates a :py:class:`TimeIndex`, in descending order, of the days with
+    valid precipitation data in a daily 'prcp' netCDF file.
 
     The passed HREF must contain precipitation data. Daily netCDF precipitation
     files for the current month contain 'fill' data (negative values) for those
     days that do not yet contain data. This method detects the fill data and
-    does not include those days in the returned list.
+    does not include those days in the returned index.
 
     Args:
         nc_prcp_href (str): HREF to daily netCDF precipitation file.
@@ -78,18 +198,21 @@ def day_indices(
             <end_day_of_month>).
         read_href_modifier (Optional[ReadHrefModifier]): An optional function
             to modify an href (e.g., to add a token to a url).
+        session (Optional[FileSystemSession]): Optional shared filesystem
+            session used to open the netCDF file.
 
     Returns:
-        List[int]: List of days, in descending order, that have valid data.
+        TimeIndex: Index of the days that have valid data, in descending
+            order.
     """
     if Variable.PRCP not in os.path.basename(nc_prcp_href):
         raise ValueError(f"'{Variable.PRCP}' not detected in HREF: {nc_prcp_href}")
 
     read_nc_prcp_href = modify_href(nc_prcp_href, read_href_modifier=read_href_modifier)
-    with fsspec.open(read_nc_prcp_href) as fobj:
-        with xarray.open_dataset(fobj) as dataset:
-            min_prcp = dataset.prcp.min(dim=("lat", "lon"), skipna=True).values
-            days = sum(min_prcp >= 0)
+    with open_dataset(read_nc_prcp_href, session) as dataset:
+        min_prcp = dataset.prcp.min(dim=("lat", "lon"), skipna=True).values
+        days = int(sum(min_prcp >= 0))
+        index = TimeIndex.from_times(dataset.time.values, Frequency.DAILY).head(days)
 
     if day_range:
         if day_range[0] < 1:
@@ -102,24 +225,51 @@ def day_indices(
             raise ValueError(
                 "The second element of 'day_range' must be >= to the first element."
             )
-        else:
-            day_start = day_range[0] if day_range[0] > 1 else 1
-            day_end = day_range[1] if day_range[1] < days else days
-    else:
-        day_start = 1
-        day_end = days
+        # YYYYMM00 of the month of the file, to which days of month are added.
+        month = (index.first or 0) // 100 * 100
+        index = index.select(month + day_range[0], month + day_range[1])
 
-    return list(range(day_end, day_start - 1, -1))
+    return index.ordered(descending=True)
 
 
-def month_indices(
+def day_indices(
+    nc_prcp_href: str,
+    day_range: Optional[Tuple[int, int]] = None,
+    read_href_modifier: Optional[ReadHrefModifier] = None,
+    session: Optional[FileSystemSession] = None,
+) -> List[int]:
+    """Creates a list of days, in descending order, with valid precipitation
+    data in a daily 'prcp' netCDF file, as selected by :py:func:`day_index`.
+
+    Args:
+        nc_prcp_href (str): HREF to daily netCDF precipitation file.
+        day_range (Optional[Tuple[int, int]]): An optional tuple of desired
+            start and end day of month. For example: (<start_day_of_month>,
+            <end_day_of_month>).
+        read_href_modifier (Optional[ReadHrefModifier]): An optional function
+            to modify an href (e.g., to add a token to a url).
+        session (Optional[FileSystemSession]): Optional shared filesystem
+            session used to open the netCDF file.
+
+    Returns:
+        List[int]: List of days, in descending order, that have valid data.
+    """
+    return day_index(
+        nc_prcp_href,
+        day_range=day_range,
+        read_href_modifier=read_href_modifier,
+        session=session,
+    ).days()
+
+
+def month_index(
     nc_href: str,
     month_range: Optional[Tuple[str, str]] = None,
     read_href_modifier: Optional[ReadHrefModifier] = None,
-) -> List[Dict[str, Any]]:
-    """Creates a list of dictionaries, where each dictionary contains an index
-    into the monthly netCDF data timestack and a corresponding yyyymm string
-    indicating the year and month.
+    session: Optional[FileSystemSession] = None,
+) -> TimeIndex:
+    """Creates a :py:class:`TimeIndex`, in descending order, of the months in
+    a monthly netCDF file.
 
     Args:
         nc_href (str): HREF to a monthly netCDF file.
@@ -128,61 +278,112 @@ def month_indices(
             <end_YYYYMM>).
         read_href_modifier (Optional[ReadHrefModifier]): An optional function
             to modify an href (e.g., to add a token to a url).
+        session (Optional[FileSystemSession]): Optional shared filesystem
+            session used to open the netCDF file.
 
     Returns:
-        List[Dict[str, Any]]: List of dictionaries with indices into the NetCDF
-            timestack and corresponding YYYYMM date strings for each time slice.
+        TimeIndex: Index of the months, in descending order.
     """
     read_nc_href = modify_href(nc_href, read_href_modifier=read_href_modifier)
-    with fsspec.open(read_nc_href) as fobj:
-        with xarray.open_dataset(fobj) as ds:
-            years = ds.time.dt.year.data.tolist()
-            months = ds.time.dt.month.data.tolist()
-
-    idx_month: List[Dict[str, Any]] = []
-    for idx, (year, month) in enumerate(zip(years, months), start=1):
-        idx_month.append({"idx": idx, "date": f"{year}{month:02d}"})
+    with open_dataset(read_nc_href, session) as ds:
+        index = TimeIndex.from_times(ds.time.values, Frequency.MONTHLY)
 
     if month_range:
-        idx_month.sort(key=operator.itemgetter("idx"))
-        if int(month_range[0]) < int(idx_month[0]["date"]):
+        start, end = int(month_range[0]), int(month_range[1])
+        if index.first is None or start < index.first:
             raise ValueError(
                 f"'month_range' start YYYYMM ({month_range[0]}) is prior to available data"
             )
-        elif int(month_range[1]) > int(idx_month[-1]["date"]):
+        elif index.last is None or end > index.last:
             raise ValueError(
                 f"'month_range' start YYYYMM ({month_range[1]}) is posterior to available data"
             )
-        elif int(month_range[0]) > int(month_range[1]):
+        elif start > end:
             raise ValueError(
                 "The second element of 'month_range' must be >= to the first element."
             )
-        else:
-            idx_month = [
-                m
-                for m in idx_month
-                if int(month_range[0]) <= int(m["date"]) <= int(month_range[1])
-            ]
+        index = index.select(start, end)
 
-    idx_month.sort(key=operator.itemgetter("idx"), reverse=True)
+    return index.ordered(descending=True)
 
-    return idx_month
 
+def month_indices(
+    nc_href: str,
+    month_range: Optional[Tuple[str, str]] = None,
+    read_href_modifier: Optional[ReadHrefModifier] = None,
+    session: Optional[FileSystemSession] = None,
+) -> List[Dict[str, Any]]:
+    """Creates a list of dictionaries, where each dictionary contains an index
+    into the monthly netCDF data timestack and a corresponding yyyymm string
+    indicating the year and month. Use :py:func:`month_index` to select
+    months without building a dictionary per month.
 
-def cog_asset_dict(frequency: Frequency, var: Variable) -> Dict[str, Any]:
+    Args:
+        nc_href (str): HREF to a monthly netCDF file.
+        month_range (Optional[Tuple[str, str]]): An optional tuple of desired
+            start and end YYYYMM date strings. For example: (<start_YYYYMM>,
+            <end_YYYYMM>).
+        read_href_modifier (Optional[ReadHrefModifier]): An optional function
+            to modify an href (e.g., to add a token to a url).
+        session (Optional[FileSystemSession]): Optional shared filesystem
+            session used to open the netCDF file.
+
+    Returns:
+        List[Dict[str, Any]]: List of dictionaries with indices into the NetCDF
+            timestack and corresponding YYYYMM date strings for each time slice.
+    """
+    index = month_index(
+        nc_href,
+        month_range=month_range,
+        read_href_modifier=read_href_modifier,
+        session=session,
+    )
+    return [unit["month"] for unit in index.units()]
+
+
+def cog_asset_dict(
+    frequency: Frequency, var: Variable, quantized: bool = False
+) -> Dict[str, Any]:
     """Returns a COG asset, less the HREF, in dictionary form.
 
     Args:
         var (Variable):  One of 'prcp', 'tavg', 'tmax', or 'tmin'.
+        quantized (bool): Flag to describe a quantized integer COG, with the
+            `data_type`, `nodata`, `scale`, and `offset` of
+            :py:data:`constants.QUANTIZED_RASTER_BANDS`. Default is False.
 
     Returns:
         Dict[str, Any]: A partial dictionary of STAC Asset components.
     """
+    raster_bands = constants.COG_RASTER_BANDS[var]
+    if quantized:
+        raster_bands = [
+            {**band, **constants.QUANTIZED_RASTER_BANDS[frequency][var]}
+            for band in raster_bands
+        ]
     return {
         "type": MediaType.COG,
         "roles": constants.COG_ROLES,
         "title": f"{frequency.capitalize()} {constants.COG_ASSET_TITLES[var]}",
-        "raster:bands": constants.COG_RASTER_BANDS[var],
+        "raster:bands": raster_bands,
+    }
+
+
+def vrt_asset_dict(frequency: Frequency, var: Variable) -> Dict[str, Any]:
+    """Returns a time stack VRT asset, less the HREF, in dictionary form.
+
+    Args:
+        var (Variable):  One of 'prcp', 'tavg', 'tmax', or 'tmin'.
+
+    Returns:
+        Dict[str, Any]: A partial dictionary of STAC Asset components.
+    """
+    return {
+        "type": constants.VRT_MEDIA_TYPE,
+        "roles": constants.VRT_ROLES,
+        "title": (
+            f"{frequency.capitalize()} {constants.COG_ASSET_TITLES[var]} Time Stack"
+        ),
     }
 
 
@@ -203,7 +404,9 @@ def nc_asset_dict(frequency: Frequency, var: Variable) -> Dict[str, Any]:
 
 
 def nc_creation_date_dict(
-    nc_hrefs: Dict[Variable, str], read_href_modifier: Optional[ReadHrefModifier] = None
+    nc_hrefs: Dict[Variable, str],
+    read_href_modifier: Optional[ReadHrefModifier] = None,
+    session: Optional[FileSystemSession] = None,
 ) -> Dict[Variable, str]:
     """Returns a dictionary mapping variables to netCDF file creation dates.
 
@@ -212,6 +415,8 @@ def nc_creation_date_dict(
             HREFS.
         read_href_modifier (Optional[ReadHrefModifier]): An optional function
             to modify an href (e.g., to add a token to a url).
+        session (Optional[FileSystemSession]): Optional shared filesystem
+            session used to open the netCDF files.
 
     Returns:
         Dict[Variable, str]: A dictionary mapping variables to netCDF file
@@ -220,9 +425,129 @@ def nc_creation_date_dict(
     nc_creation_dates: Dict[Variable, str] = {}
     for var in Variable:
         read_nc_href = modify_href(nc_hrefs[var], read_href_modifier=read_href_modifier)
-        with fsspec.open(read_nc_href) as fobj:
-            with xarray.open_dataset(fobj) as ds:
-                nc_creation_dates[var] = datetime_to_str(
-                    parser.parse(ds.attrs["date_created"])
-                )
+        with open_dataset(read_nc_href, session) as ds:
+            nc_creation_dates[var] = datetime_to_str(
+                parser.parse(ds.attrs["date_created"])
+            )
     return nc_creation_dates
+
+
+def json_dumps(json_dict: Dict[str, Any]) -> bytes:
+    """Serializes a dictionary to indented JSON, using orjson if it is
+    installed.
+
+    Args:
+        json_dict (Dict[str, Any]): JSON-serializable dictionary.
+
+    Returns:
+        bytes: UTF-8 encoded JSON.
+    """
+    if HAS_ORJSON:
+        return orjson.dumps(json_dict, option=orjson.OPT_INDENT_2)
+    return json.dumps(json_dict, indent=2).encode("utf-8")
+
+
+def json_dumps_line(json_dict: Dict[str, Any]) -> bytes:
+    """Serializes a dictionary to a single line of compact JSON, including the
+    trailing newline, using orjson if it is installed.
+
+    Args:
+        json_dict (Dict[str, Any]): Dictionary to serialize.
+
+    Returns:
+        bytes: UTF-8 encoded JSON line.
+    """
+    if HAS_ORJSON:
+        return orjson.dumps(json_dict, option=orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(json_dict, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def save_item(item: Item) -> None:
+    """Saves an Item to its self HREF, without a self link.
+
+    This is equivalent to `item.save_object(include_self_link=False)` but
+    serializes with :py:func:`json_dumps`, which is considerably faster when
+    orjson is installed.
+
+    Args:
+        item (Item): The Item to save. Its self HREF must be set.
+    """
+    href = item.get_self_href()
+    if href is None:
+        raise ValueError(f"Self HREF is not available for item {item.id}")
+    json_bytes = json_dumps(item.to_dict(include_self_link=False))
+    if split_protocol(href)[0] is None:
+        os.makedirs(os.path.dirname(os.path.abspath(href)), exist_ok=True)
+        with open(href, "wb") as f:
+            f.write(json_bytes)
+    else:
+        with fsspec.open(href, "wb") as f:
+            f.write(json_bytes)
+
+
+def relocate_assets(
+    items: Iterable[Item],
+    asset_keys: Iterable[str],
+    copy: bool = False,
+    max_workers: int = RELOCATE_WORKERS,
+) -> int:
+    """Moves or copies asset files into the directories of their Items and
+    updates the asset HREFs.
+
+    Local files are moved with an atomic rename, falling back to a copy
+    and delete when the source and destination are on different
+    filesystems. Copies, and moves to or from remote filesystems, run in a
+    thread pool. Existing destination files are left in place.
+
+    Args:
+        items (Iterable[Item]): Items, with self HREFs set.
+        asset_keys (Iterable[str]): Keys of the assets to relocate.
+        copy (bool): Flag to copy instead of move the files. Default is
+            False.
+        max_workers (int): Maximum number of files relocated concurrently.
+
+    Returns:
+        int: Number of files moved or copied.
+    """
+    asset_keys = list(asset_keys)
+    relocations = []
+    for item in items:
+        self_href = item.get_self_href()
+        if self_href is None:
+            raise ValueError(f"Self HREF is not available for item {item.id}")
+        item_dir = os.path.dirname(self_href)
+        for key in asset_keys:
+            asset = item.assets[key]
+            source = asset.get_absolute_href() or asset.href
+            destination = os.path.join(item_dir, os.path.basename(source))
+            asset.href = destination
+            if source != destination:
+                relocations.append((source, destination))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(_relocate, source, destination, copy)
+            for source, destination in relocations
+        ]
+        return sum(future.result() for future in futures)
+
+
+def _relocate(source: str, destination: str, copy: bool) -> bool:
+    if href_exists(destination):
+        return False
+    if split_protocol(source)[0] is None and split_protocol(destination)[0] is None:
+        os.makedirs(os.path.dirname(os.path.abspath(destination)), exist_ok=True)
+        if not copy:
+            try:
+                os.rename(source, destination)
+                return True
+            except OSError:
+                pass
+        shutil.copyfile(source, destination)
+    else:
+        with fsspec.open(source, "rb") as f_source:
+            with fsspec.open(destination, "wb") as f_destination:
+                shutil.copyfileobj(f_source, f_destination)
+    if not copy:
+        fsspec.filesystem(split_protocol(source)[0] or "file").rm(source)
+    return True
@@ -0,0 +1,187 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+import rasterio
+from rasterio.errors import RasterioIOError
+
+from stactools.noaa_nclimgrid.cog import COG_BLOCKSIZE
+
+# Number of COGs validated concurrently. Validation only reads TIFF headers,
+# so a few threads keep up with COG creation.
+VALIDATE_WORKERS = 4
+
+
+def validate_cog(href: str, blocksize: int = COG_BLOCKSIZE) -> List[str]:
+    """Checks that a file is a Cloud-Optimized GeoTIFF with the layout
+    written by :py:func:`write_cog`.
+
+    The checks follow GDAL's COG validation: the file is a tiled GeoTIFF
+    with square `blocksize` tiles and the COG layout marker, has overviews
+    down to a single tile, its image file directories (IFDs) precede the
+    image data with the full-resolution IFD first, and tile data is ordered
+    from the smallest overview to the full-resolution image, so that clients
+    can read the headers and any overview with few range requests.
+
+    Args:
+        href (str): HREF of the file.
+        blocksize (int): Expected tile width and height. Default is the
+            block size of created COGs, 512.
+
+    Returns:
+        List[str]: Descriptions of the problems found. Empty if the file is
+            a valid COG.
+    """
+    try:
+        with rasterio.open(href) as dataset:
+            if dataset.driver != "GTiff":
+                return [f"Not a GeoTIFF: {dataset.driver}"]
+
+            errors = []
+            block_shapes = set(dataset.block_shapes)
+            if not dataset.profile.get("tiled", False):
+                errors.append("Not tiled")
+            elif block_shapes != {(blocksize, blocksize)}:
+                errors.append(
+                    f"Tiles are {sorted(block_shapes)}, not " f"{blocksize}x{blocksize}"
+                )
+            if dataset.tags(ns="IMAGE_STRUCTURE").get("LAYOUT") != "COG":
+                errors.append("Missing the COG layout marker (LAYOUT=COG)")
+
+            overviews = dataset.overviews(1)
+            size = max(dataset.width, dataset.height)
+            if size > blocksize and not overviews:
+                errors.append("Missing overviews")
+            elif overviews and size / overviews[-1] > blocksize:
+                errors.append(
+                    f"Smallest overview (factor {overviews[-1]}) is larger than a "
+                    "single tile"
+                )
+
+            # Offsets of the IFDs and of the first tile of the full resolution
+            # image (index None) and of each overview.
+            levels: List[Optional[int]] = [None, *range(len(overviews))]
+            items = [
+                dataset.get_tag_item(name, "TIFF", bidx=1, ovr=ovr)
+                for name in ["IFD_OFFSET", "BLOCK_OFFSET_0_0"]
+                for ovr in levels
+            ]
+            if None in items:
+                errors.append("Missing IFD or tile offsets")
+                return errors
+            offsets = [int(item) for item in items]
+            count = len(levels)
+            ifd_offsets, data_offsets = offsets[:count], offsets[count:]
+            if ifd_offsets != sorted(ifd_offsets):
+                errors.append(
+                    "IFDs are not ordered from full resolution to the smallest "
+                    f"overview: {ifd_offsets}"
+                )
+            if max(ifd_offsets) > min(data_offsets):
+                errors.append("IFDs do not all precede the image data")
+            if data_offsets != sorted(data_offsets, reverse=True):
+                errors.append(
+                    "Image data is not ordered from the smallest overview to full "
+                    f"resolution: {data_offsets}"
+                )
+            return errors
+    except RasterioIOError as error:
+        return [f"Unreadable: {error}"]
+
+
+class CogValidator:
+    """Validates COGs with :py:func:`validate_cog` in a thread pool, so that
+    COGs are validated while more are being created.
+
+    Args:
+        max_workers (int): Number of COGs validated concurrently. Default is
+            4.
+        blocksize (int): Expected tile width and height.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = VALIDATE_WORKERS,
+        blocksize: int = COG_BLOCKSIZE,
+    ):
+        self.blocksize = blocksize
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._futures: Dict[str, "Future[List[str]]"] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, hrefs: Iterable[str]) -> None:
+        """Queues COGs for validation.
+
+        Args:
+            hrefs (Iterable[str]): HREFs of the COGs.
+        """
+        for href in hrefs:
+            future = self._executor.submit(validate_cog, href, self.blocksize)
+            with self._lock:
+                self._futures[href] = future
+
+    def results(self) -> Dict[str, List[str]]:
+        """Waits for the queued COGs to be validated.
+
+        Returns:
+            Dict[str, List[str]]: Problems found, keyed by COG HREF, for all
+                queued COGs.
+        """
+        with self._lock:
+            futures = dict(self._futures)
+        return {href: future.result() for href, future in futures.items()}
+
+    def invalid(self) -> Dict[str, List[str]]:
+        """Waits for the queued COGs to be validated and returns the invalid
+        ones.
+
+        Returns:
+            Dict[str, List[str]]: Problems found, keyed by COG HREF, for the
+                invalid COGs.
+        """
+        return {href: errors for href, errors in self.results().items() if errors}
+
+    def close(self) -> None:
+        """Shuts down the thread pool, cancelling queued validations."""
+        with self._lock:
+            futures = list(self._futures.values())
+        for future in futures:
+            future.cancel()
+        self._executor.shutdown(wait=True)
+
+
+def validate_cogs(
+    hrefs: Iterable[str],
+    max_workers: int = VALIDATE_WORKERS,
+    blocksize: int = COG_BLOCKSIZE,
+) -> Dict[str, List[str]]:
+    """Validates COGs concurrently.
+
+    Args:
+        hrefs (Iterable[str]): HREFs of the COGs.
+        max_workers (int): Number of COGs validated concurrently. Default is
+            4.
+        blocksize (int): Expected tile width and height.
+
+    Returns:
+        Dict[str, List[str]]: Problems found, keyed by COG HREF. Valid COGs
+            have an empty list.
+    """
+    validator = CogValidator(max_workers=max_workers, blocksize=blocksize)
+    try:
+        validator.submit(hrefs)
+        return validator.results()
+    finally:
+        validator.close()
+
+
+def format_invalid(invalid: Dict[str, List[str]]) -> str:
+    """Formats the problems of invalid COGs as one line per COG.
+
+    Args:
+        invalid (Dict[str, List[str]]): Problems found, keyed by COG HREF.
+
+    Returns:
+        str: The report.
+    """
+    return "\n".join(f"{href}: {'; '.join(errors)}" for href, errors in invalid.items())
@@ -0,0 +1,111 @@
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, List, Sequence
+
+import fsspec
+from pystac import Item
+from pystac.utils import is_absolute_href, make_relative_href
+from rasterio.crs import CRS
+
+from stactools.noaa_nclimgrid.cog import COG_PROFILE, GTIFF_PROFILE, TRANSFORM
+from stactools.noaa_nclimgrid.constants import Variable
+
+# GDAL names of the COG data types.
+GDAL_DATA_TYPES = {"float32": "Float32", "int16": "Int16", "uint16": "UInt16"}
+
+
+def create_time_stack_vrt(items: Sequence[Item], var: Variable, href: str) -> int:
+    """Writes a multi-band GDAL VRT of a variable's COGs, one band per Item in
+    time order.
+
+    The VRT is written directly, without opening the COGs, since all
+    NClimGrid COGs share the same grid. Each band records the size, data
+    type, and block size of its COG, so GDAL only opens the COGs of the bands
+    that are read. Bands are described by the Item datetime (or start
+    datetime), and their nodata value, scale, and offset are taken from the
+    Item `raster:bands`.
+
+    Args:
+        items (Sequence[Item]): Items with a COG asset for `var`. COG HREFs
+            that are relative to the Item are resolved against its self
+            HREF.
+        var (Variable): Variable.
+        href (str): Destination HREF for the VRT. COG HREFs on the same
+            filesystem are written relative to it.
+
+    Returns:
+        int: Number of bands written.
+    """
+    width, height = GTIFF_PROFILE["width"], GTIFF_PROFILE["height"]
+    x_size, _, x_origin, _, y_size, y_origin = TRANSFORM
+    dataset = ET.Element("VRTDataset", rasterXSize=str(width), rasterYSize=str(height))
+    srs = ET.SubElement(dataset, "SRS", dataAxisToSRSAxisMapping="2,1")
+    srs.text = CRS.from_string(GTIFF_PROFILE["crs"]).to_wkt()
+    ET.SubElement(
+        dataset, "GeoTransform"
+    ).text = f"{x_origin}, {x_size}, 0.0, {y_origin}, 0.0, {y_size}"
+
+    bands = sorted(_time_stack_bands(items, var, href), key=lambda b: b["datetime"])
+    for number, band in enumerate(bands, start=1):
+        data_type = GDAL_DATA_TYPES[band["data_type"]]
+        element = ET.SubElement(
+            dataset, "VRTRasterBand", dataType=data_type, band=str(number)
+        )
+        ET.SubElement(element, "Description").text = band["datetime"]
+        metadata = ET.SubElement(element, "Metadata")
+        ET.SubElement(metadata, "MDI", key="datetime").text = band["datetime"]
+        ET.SubElement(metadata, "MDI", key="item_id").text = band["item_id"]
+        ET.SubElement(element, "NoDataValue").text = str(band["nodata"])
+        if "scale" in band:
+            ET.SubElement(element, "Offset").text = str(band["offset"])
+            ET.SubElement(element, "Scale").text = str(band["scale"])
+
+        source = ET.SubElement(element, "SimpleSource")
+        ET.SubElement(
+            source, "SourceFilename", relativeToVRT=band["relative"]
+        ).text = band["href"]
+        ET.SubElement(source, "SourceBand").text = "1"
+        ET.SubElement(
+            source,
+            "SourceProperties",
+            RasterXSize=str(width),
+            RasterYSize=str(height),
+            DataType=data_type,
+            BlockXSize=str(COG_PROFILE["blocksize"]),
+            BlockYSize=str(COG_PROFILE["blocksize"]),
+        )
+        for rect in ["SrcRect", "DstRect"]:
+            ET.SubElement(
+                source, rect, xOff="0", yOff="0", xSize=str(width), ySize=str(height)
+            )
+
+    with fsspec.open(href, "wb") as f:
+        f.write(ET.tostring(dataset))
+    return len(bands)
+
+
+def _time_stack_bands(
+    items: Sequence[Item], var: Variable, vrt_href: str
+) -> List[Dict[str, Any]]:
+    bands = []
+    for item in items:
+        asset = item.assets[var]
+        cog_href = asset.get_absolute_href() or asset.href
+        relative_href = make_relative_href(cog_href, vrt_href)
+        is_relative = not is_absolute_href(relative_href)
+        bands.append(
+            {
+                **asset.extra_fields["raster:bands"][0],
+                "datetime": item.properties.get("datetime")
+                or item.properties["start_datetime"],
+                "item_id": item.id,
+                "href": relative_href if is_relative else _gdal_href(cog_href),
+                "relative": "1" if is_relative else "0",
+            }
+        )
+    return bands
+
+
+def _gdal_href(href: str) -> str:
+    if href.startswith(("http://", "https://")):
+        return f"/vsicurl/{href}"
+    return href
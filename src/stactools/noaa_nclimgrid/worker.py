@@ -0,0 +1,263 @@
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import IO, Any, Dict, Optional, Tuple
+
+from stactools.core.io import ReadHrefModifier
+
+from stactools.noaa_nclimgrid import stac
+from stactools.noaa_nclimgrid.session import DatasetCache, FileSystemSession
+from stactools.noaa_nclimgrid.stac import ItemFactory
+from stactools.noaa_nclimgrid.utils import cached_read_href_modifier
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+
+# Keys of a job, with the create_items keyword argument they map to.
+JOB_KEYS = {
+    "href": "nc_href",
+    "cog_dir": "cog_dir",
+    "nc_assets": "nc_assets",
+    "cog_check_href": "cog_check_href",
+    "day_range": "day_range",
+    "month_range": "month_range",
+    "quantized": "quantized",
+}
+
+
+class Worker:
+    """Creates COGs and STAC Items for jobs in a long-running process.
+
+    Starting a run costs more than its first COG: Python and library imports,
+    filesystem and connection setup, opening each netCDF file and reading
+    its chunk index, and loading the STAC JSON schemas. A worker pays these
+    once and keeps them warm across jobs: netCDF datasets stay open in a
+    :py:class:`DatasetCache`, and the filesystem session, signed HREFs, Item
+    factories, and validation schemas are shared by all jobs.
+
+    A job is a dictionary with an 'href' to a netCDF file and, optionally, a
+    'cog_dir' (defaulting to the worker `cog_dir`), 'day_range' or
+    'month_range', 'cog_check_href', 'nc_assets', and 'quantized', with the
+    meanings of the :py:func:`create_items` arguments.
+
+    Jobs are run one at a time, since each job already uses the memory of a
+    time slice per variable and the worker may be one of many.
+
+    Args:
+        cog_dir (str): Default destination directory for created COGs.
+        session (Optional[FileSystemSession]): Optional filesystem session.
+            If it has no dataset cache, one is added.
+        read_href_modifier (Optional[ReadHrefModifier]): An optional function
+            to modify an href (e.g., to add a token to a url).
+        validate (bool): Flag to validate Items before they are returned.
+            Default is True.
+    """
+
+    def __init__(
+        self,
+        cog_dir: str,
+        session: Optional[FileSystemSession] = None,
+        read_href_modifier: Optional[ReadHrefModifier] = None,
+        validate: bool = True,
+    ):
+        self.cog_dir = cog_dir
+        self.session = session or FileSystemSession()
+        if self.session.datasets is None:
+            self.session.datasets = DatasetCache()
+        self.read_href_modifier = cached_read_href_modifier(read_href_modifier)
+        self.validate = validate
+        self.jobs = 0
+        self.failures = 0
+        self._item_factories: Dict[bool, ItemFactory] = {}
+        self._lock = threading.Lock()
+
+    def run(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Runs a job.
+
+        Args:
+            job (Dict[str, Any]): The job.
+
+        Returns:
+            Dict[str, Any]: A dictionary with the created Items as 'items', a
+                list of Item dictionaries, the HREFs of newly created COGs as
+                'cogs', and the run time in seconds as 'seconds'.
+        """
+        kwargs = _job_kwargs(job)
+        kwargs.setdefault("cog_dir", self.cog_dir)
+        quantized = kwargs.get("quantized", False)
+        with self._lock:
+            start = time.perf_counter()
+            try:
+                item_factory = self._item_factories.setdefault(
+                    quantized, ItemFactory(quantized=quantized)
+                )
+                items, cogs = stac.create_items(
+                    read_href_modifier=self.read_href_modifier,
+                    session=self.session,
+                    item_factory=item_factory,
+                    **kwargs,
+                )
+                if self.validate:
+                    for item in items:
+                        item.validate()
+            except Exception:
+                self.failures += 1
+                raise
+            finally:
+                self.jobs += 1
+            seconds = time.perf_counter() - start
+        logger.info(
+            f"Created {len(items)} Items and {len(cogs)} COGs from "
+            f"{kwargs['nc_href']} in {seconds:.2f}s"
+        )
+        return {
+            "items": [item.to_dict(include_self_link=False) for item in items],
+            "cogs": cogs,
+            "seconds": seconds,
+        }
+
+    def status(self) -> Dict[str, Any]:
+        """Returns counters of the jobs run and of the warm state.
+
+        Returns:
+            Dict[str, Any]: Numbers of jobs and failed jobs, open datasets,
+                dataset cache hits and misses, and remote read metrics.
+        """
+        datasets = self.session.datasets
+        assert datasets is not None
+        return {
+            "jobs": self.jobs,
+            "failures": self.failures,
+            "open_datasets": len(datasets),
+            "dataset_hits": datasets.hits,
+            "dataset_misses": datasets.misses,
+            "reads": self.session.metrics.to_dict(),
+        }
+
+    def close(self) -> None:
+        """Closes the open datasets."""
+        if self.session.datasets is not None:
+            self.session.datasets.close()
+
+
+def _job_kwargs(job: Dict[str, Any]) -> Dict[str, Any]:
+    if not isinstance(job, dict):
+        raise ValueError("A job must be a JSON object")
+    unknown = sorted(set(job) - set(JOB_KEYS))
+    if unknown:
+        raise ValueError(f"Unknown job keys: {', '.join(unknown)}")
+    if "href" not in job:
+        raise ValueError("A job must have an 'href'")
+    kwargs = {JOB_KEYS[key]: value for key, value in job.items()}
+    for key in ["day_range", "month_range"]:
+        if kwargs.get(key) is not None:
+            kwargs[key] = _range(key, kwargs[key])
+    return kwargs
+
+
+def _range(key: str, value: Any) -> Tuple[Any, Any]:
+    if not isinstance(value, (list, tuple)) or len(value) != 2:
+        raise ValueError(f"'{key}' must be a list of a start and an end")
+    return value[0], value[1]
+
+
+def serve_stream(worker: Worker, input: IO[str], output: IO[str]) -> int:
+    """Runs jobs read from a stream of JSON lines, e.g., stdin or a named
+    pipe, and writes one JSON line per job to an output stream.
+
+    Each output line is the result of :py:meth:`Worker.run`, or a dictionary
+    with an 'error' message if the job failed. Blank input lines are
+    skipped.
+
+    Args:
+        worker (Worker): The worker.
+        input (IO[str]): Stream of jobs, one JSON object per line.
+        output (IO[str]): Stream for the results.
+
+    Returns:
+        int: Number of failed jobs.
+    """
+    failures = 0
+    for line in input:
+        if not line.strip():
+            continue
+        try:
+            result = worker.run(json.loads(line))
+        except Exception as error:
+            logger.exception("Job failed")
+            failures += 1
+            result = {"error": f"{type(error).__name__}: {error}"}
+        output.write(json.dumps(result) + "\n")
+        output.flush()
+    return failures
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "WorkerServer"
+
+    def do_GET(self) -> None:
+        if self.path.rstrip("/") == "/status":
+            self._send(200, self.server.worker.status())
+        else:
+            self._send(404, {"error": f"Not found: {self.path}"})
+
+    def do_POST(self) -> None:
+        if self.path.rstrip("/") != "/items":
+            self._send(404, {"error": f"Not found: {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            job = json.loads(self.rfile.read(length))
+            kwargs = _job_kwargs(job)
+        except ValueError as error:
+            self._send(400, {"error": str(error)})
+            return
+        try:
+            self._send(200, self.server.worker.run(job))
+        except Exception as error:
+            logger.exception(f"Job failed: {kwargs['nc_href']}")
+            self._send(500, {"error": f"{type(error).__name__}: {error}"})
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.info(f"{self.address_string()} {format % args}")
+
+    def _send(self, status: int, body: Dict[str, Any]) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class WorkerServer(HTTPServer):
+    """A small HTTP server for a :py:class:`Worker`.
+
+    Jobs are posted as JSON objects to `/items` and answered with the result
+    of :py:meth:`Worker.run`, with status 400 for invalid jobs and 500 for
+    failed jobs. `GET /status` returns :py:meth:`Worker.status`. Requests
+    are handled one at a time.
+
+    Args:
+        worker (Worker): The worker.
+        address (Tuple[str, int]): Host and port to listen on. Port 0 picks
+            a free port.
+    """
+
+    def __init__(
+        self, worker: Worker, address: Tuple[str, int] = (DEFAULT_HOST, DEFAULT_PORT)
+    ):
+        self.worker = worker
+        super().__init__(address, _Handler)
+
+    @property
+    def url(self) -> str:
+        """The URL of the server."""
+        host, port = self.server_address[:2]
+        if isinstance(host, bytes):
+            host = host.decode("utf-8")
+        return f"http://{host}:{port}"
@@ -0,0 +1,87 @@
+import os
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import pandas
+import rasterio
+import xarray
+
+from stactools.noaa_nclimgrid import aggregate
+from stactools.noaa_nclimgrid.cog import GTIFF_PROFILE, read_time_slice
+from stactools.noaa_nclimgrid.constants import Aggregation, Variable
+from tests import test_data
+
+
+def test_daily_aggregate() -> None:
+    values = np.array(
+        [[[1.0, np.nan], [2.0, np.nan]], [[3.0, 4.0], [np.nan, np.nan]]],
+        dtype=np.float32,
+    )
+    daily_aggregate = aggregate.DailyAggregate((2, 2))
+    for var in Variable:
+        daily_aggregate.add(var, values)
+
+    np.testing.assert_array_equal(
+        daily_aggregate.values(Variable.PRCP), [[4.0, 4.0], [2.0, np.nan]]
+    )
+    np.testing.assert_array_equal(
+        daily_aggregate.values(Variable.TMAX), [[2.0, 4.0], [2.0, np.nan]]
+    )
+
+
+def test_create_monthly_aggregate() -> None:
+    nc_href = test_data.get_path(
+        "data-files/netcdf/daily/beta/by-month/2022/01/prcp-202201-grd-prelim.nc"
+    )
+    with TemporaryDirectory() as tmp_dir:
+        items, cogs = aggregate.create_aggregate_items([nc_href], tmp_dir)
+        assert len(cogs) == 4
+        assert len(items) == 1
+        item = items[0]
+        assert item.id == "202201-grd-prelim-monthly"
+        assert item.properties["start_datetime"] == "2022-01-01T00:00:00Z"
+        assert item.properties["end_datetime"] == "2022-01-01T23:59:59Z"
+        assert item.properties["nclimgrid:aggregated_days"] == 1
+        item.validate()
+
+        with rasterio.open(item.assets["tmax"].href) as dataset:
+            np.testing.assert_array_equal(
+                dataset.read(1),
+                read_time_slice(nc_href.replace("prcp", "tmax"), "tmax", 0),
+            )
+
+
+def test_create_annual_aggregate_skips_fill_days() -> None:
+    shape = (GTIFF_PROFILE["height"], GTIFF_PROFILE["width"])
+    lats = np.linspace(24.5625, 49.3542, shape[0])
+    lons = np.linspace(-124.6875, -67.0208, shape[1])
+    with TemporaryDirectory() as tmp_dir:
+        nc_hrefs = []
+        for month, fill_days in [("01", 0), ("02", 1)]:
+            times = pandas.date_range(f"2022-{month}-01", periods=3)
+            for var in Variable:
+                values = np.full((3, *shape), 2.0, dtype=np.float32)
+                if fill_days:
+                    values[-fill_days:] = -999.0
+                dataset = xarray.Dataset(
+                    {var.value: (("time", "lat", "lon"), values)},
+                    coords={"time": times, "lat": lats, "lon": lons},
+                )
+                nc_path = os.path.join(
+                    tmp_dir, f"{var.value}-2022{month}-grd-prelim.nc"
+                )
+                dataset.to_netcdf(nc_path, engine="h5netcdf")
+            nc_hrefs.append(nc_path)
+
+        items, _ = aggregate.create_aggregate_items(
+            nc_hrefs, tmp_dir, aggregation=Aggregation.ANNUAL
+        )
+        assert len(items) == 1
+        item = items[0]
+        assert item.id == "2022-grd-prelim-annual"
+        assert item.properties["end_datetime"] == "2022-02-02T23:59:59Z"
+        assert item.properties["nclimgrid:aggregated_days"] == 5
+        with rasterio.open(item.assets["prcp"].href) as dataset:
+            assert (dataset.read(1) == 10.0).all()
+        with rasterio.open(item.assets["tavg"].href) as dataset:
+            assert (dataset.read(1) == 2.0).all()
@@ -0,0 +1,77 @@
+import os
+from tempfile import TemporaryDirectory
+from typing import Any
+
+import numpy as np
+import pytest
+import rasterio
+from numpy.typing import NDArray
+
+from stactools.noaa_nclimgrid import climatology
+from stactools.noaa_nclimgrid.cog import read_time_slice
+from tests import test_data
+
+
+def test_monthly_accumulator() -> None:
+    rng = np.random.default_rng(0)
+    values = rng.normal(10.0, 3.0, (30, 4, 5)).astype(np.float32)
+    values[:5, 0, 0] = np.nan
+    values[:, 1, 1] = np.nan
+    values[1:, 2, 2] = np.nan
+
+    accumulator = climatology.MonthlyAccumulator((4, 5))
+    for time_slice in values:
+        accumulator.add(7, time_slice)
+    mean, std = accumulator.statistics(7)
+
+    with np.testing.suppress_warnings() as sup:
+        sup.filter(RuntimeWarning)
+        expected_mean = np.nanmean(values, axis=0)
+        expected_std = np.nanstd(values, axis=0, ddof=1)
+    np.testing.assert_allclose(mean, expected_mean, rtol=1e-5)
+    np.testing.assert_allclose(std, expected_std, rtol=1e-5)
+    assert np.isnan(mean[1, 1])
+    assert not np.isnan(mean[2, 2]) and np.isnan(std[2, 2])
+    assert np.isnan(accumulator.statistics(1)[0]).all()
+
+
+def test_create_climatology() -> None:
+    nc_href = test_data.get_path("data-files/netcdf/monthly/nclimgrid_prcp.nc")
+    with TemporaryDirectory() as tmp_dir:
+        items, cogs = climatology.create_climatology(
+            nc_href,
+            tmp_dir,
+            period=("189501", "189502"),
+            anomaly_range=("189502", "189502"),
+        )
+        assert len(cogs) == 4 * (12 * 2 + 1)
+        assert [item.id for item in items][::12] == [
+            "nclimgrid-normals-1895-1895-01",
+            "nclimgrid-anomaly-189502",
+        ]
+        for item in items:
+            item.validate()
+
+        def read(name: str) -> NDArray[Any]:
+            with rasterio.open(os.path.join(tmp_dir, name)) as dataset:
+                return dataset.read(1)
+
+        tavg_href = nc_href.replace("prcp", "tavg")
+        np.testing.assert_array_equal(
+            read("nclimgrid-tavg-normal-mean-1895-1895-01.tif"),
+            read_time_slice(tavg_href, "tavg", 0),
+        )
+        np.testing.assert_array_equal(
+            read("nclimgrid-tavg-anomaly-189502.tif"),
+            read_time_slice(tavg_href, "tavg", 1)
+            - read("nclimgrid-tavg-normal-mean-1895-1895-02.tif"),
+        )
+        assert np.isnan(read("nclimgrid-tavg-normal-std-1895-1895-02.tif")).all()
+
+
+def test_create_climatology_daily() -> None:
+    nc_href = test_data.get_path(
+        "data-files/netcdf/daily/beta/by-month/2022/01/prcp-202201-grd-prelim.nc"
+    )
+    with pytest.raises(ValueError):
+        climatology.create_climatology(nc_href, "")
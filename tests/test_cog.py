@@ -1,7 +1,18 @@
+import hashlib
+import os
 from tempfile import TemporaryDirectory
+from typing import Dict
+
+import numpy as np
+import pytest
+import rasterio
 
 from stactools.noaa_nclimgrid import cog
-from stactools.noaa_nclimgrid.constants import Variable
+from stactools.noaa_nclimgrid.constants import (
+    QUANTIZED_RASTER_BANDS,
+    Frequency,
+    Variable,
+)
 from tests import test_data
 
 
@@ -55,3 +66,128 @@ def test_create_cogs() -> None:
         )
         assert len(cog_hrefs) == 4
         assert len(created_cog_hrefs) == 4
+
+
+def test_create_cogs_with_data_hashes() -> None:
+    nc_hrefs = {
+        var: test_data.get_path(f"data-files/netcdf/monthly/nclimgrid_{var.value}.nc")
+        for var in Variable
+    }
+    with TemporaryDirectory() as cog_dir:
+        month = {"idx": 1, "date": "189501"}
+        data_hashes: Dict[str, str] = {}
+        _, created_cog_hrefs = cog.create_cogs(
+            nc_hrefs, cog_dir, month=month, data_hashes=data_hashes
+        )
+        assert len(created_cog_hrefs) == 4
+        assert len(data_hashes) == 4
+
+        _, created_cog_hrefs = cog.create_cogs(
+            nc_hrefs,
+            cog_dir,
+            month=month,
+            cog_check_href=cog_dir,
+            data_hashes=data_hashes,
+        )
+        assert len(created_cog_hrefs) == 0
+
+        data_hashes["nclimgrid-tmax-189501.tif"] = "stale"
+        _, created_cog_hrefs = cog.create_cogs(
+            nc_hrefs,
+            cog_dir,
+            month=month,
+            cog_check_href=cog_dir,
+            data_hashes=data_hashes,
+        )
+        assert created_cog_hrefs == [
+            cog.get_cog_href(
+                nc_hrefs[Variable.TMAX], Variable.TMAX, cog_dir, month=month
+            )
+        ]
+
+        seeded: Dict[str, str] = {}
+        _, created_cog_hrefs = cog.create_cogs(
+            nc_hrefs,
+            cog_dir,
+            month=month,
+            cog_check_href=cog_dir,
+            data_hashes=seeded,
+        )
+        assert created_cog_hrefs == []
+        assert seeded == data_hashes
+
+
+def test_create_cogs_records_data_hash_after_write() -> None:
+    nc_hrefs = {
+        var: test_data.get_path(f"data-files/netcdf/monthly/nclimgrid_{var.value}.nc")
+        for var in Variable
+    }
+    month = {"idx": 1, "date": "189501"}
+    with TemporaryDirectory() as cog_dir:
+        # A directory in place of the tmax COG makes writing it fail.
+        os.mkdir(
+            cog.get_cog_href(
+                nc_hrefs[Variable.TMAX], Variable.TMAX, cog_dir, month=month
+            )
+        )
+        data_hashes: Dict[str, str] = {}
+        with pytest.raises(OSError):
+            cog.create_cogs(nc_hrefs, cog_dir, month=month, data_hashes=data_hashes)
+        assert sorted(data_hashes) == [
+            "nclimgrid-prcp-189501.tif",
+            "nclimgrid-tavg-189501.tif",
+        ]
+
+
+def test_quantize() -> None:
+    band = QUANTIZED_RASTER_BANDS[Frequency.MONTHLY][Variable.TAVG]
+    values = np.array([[-12.34, 0.0], [np.nan, 31.07]], dtype=np.float32)
+    quantized = cog.quantize(values, band)
+    assert quantized.dtype == np.int16
+    assert quantized.tolist() == [[-1234, 0], [-32768, 3107]]
+
+    with pytest.raises(ValueError):
+        cog.quantize(np.array([400.0]), band)
+    with pytest.raises(ValueError):
+        cog.quantize(
+            np.array([-1.0]), QUANTIZED_RASTER_BANDS[Frequency.MONTHLY][Variable.PRCP]
+        )
+
+
+def test_create_quantized_cogs() -> None:
+    nc_hrefs = {
+        var: test_data.get_path(f"data-files/netcdf/monthly/nclimgrid_{var.value}.nc")
+        for var in Variable
+    }
+    with TemporaryDirectory() as cog_dir:
+        month = {"idx": 1, "date": "189501"}
+        cog_hrefs, _ = cog.create_cogs(nc_hrefs, cog_dir, month=month, quantized=True)
+        for var, cog_href in cog_hrefs.items():
+            band = QUANTIZED_RASTER_BANDS[Frequency.MONTHLY][var]
+            with rasterio.open(cog_href) as dataset:
+                assert dataset.dtypes[0] == band["data_type"]
+                assert dataset.nodata == band["nodata"]
+                assert dataset.scales == (band["scale"],)
+                assert dataset.offsets == (band["offset"],)
+                values = dataset.read(1, masked=True)
+            expected = cog.read_time_slice(nc_hrefs[var], var, 0)
+            assert np.array_equal(values.mask, np.isnan(expected))
+            decoded = values.compressed() * band["scale"] + band["offset"]
+            assert np.allclose(
+                decoded, expected[~np.isnan(expected)], atol=band["scale"] / 2 + 1e-6
+            )
+
+
+def test_write_cog_file_properties() -> None:
+    values = np.zeros(
+        (cog.GTIFF_PROFILE["height"], cog.GTIFF_PROFILE["width"]), dtype="float32"
+    )
+    with TemporaryDirectory() as cog_dir:
+        cog_path = os.path.join(cog_dir, "zeros.tif")
+        properties = cog.write_cog(values, cog_path)
+        with open(cog_path, "rb") as f:
+            data = f.read()
+    assert properties == {
+        "file:size": len(data),
+        "file:checksum": "1220" + hashlib.sha256(data).hexdigest(),
+    }
@@ -1,12 +1,19 @@
 import glob
+import json
+import os
 from tempfile import TemporaryDirectory
 from typing import Callable, List
 
+import numpy as np
 import pystac
+import rasterio
 from click import Command, Group
 from stactools.testing.cli_test import CliTestCase
 
-from stactools.noaa_nclimgrid.commands import create_noaa_nclimgrid_command
+from stactools.noaa_nclimgrid.commands import (
+    _read_infile,
+    create_noaa_nclimgrid_command,
+)
 from tests import test_data
 
 
@@ -29,6 +36,69 @@ class CommandsTest(CliTestCase):
                 item = pystac.read_file(item_file)
                 item.validate()
 
+    def test_create_daily_items_with_max_memory(self) -> None:
+        nc_href = test_data.get_path(
+            "data-files/netcdf/daily/beta/by-month/2022/01/prcp-202201-grd-prelim.nc"
+        )
+        with TemporaryDirectory() as tmp_dir:
+            cmd = (
+                f"noaa-nclimgrid create-items {nc_href} {tmp_dir} {tmp_dir} "
+                "--max-memory 4GB"
+            )
+            result = self.run_command(cmd)
+
+            assert "Peak RSS" in result.output
+            assert len(glob.glob(f"{tmp_dir}/*tif")) == 4
+
+    def test_create_monthly_items_with_validate_cogs(self) -> None:
+        nc_href = test_data.get_path("data-files/netcdf/monthly/nclimgrid_prcp.nc")
+        with TemporaryDirectory() as tmp_dir:
+            cmd = (
+                f"noaa-nclimgrid create-items {nc_href} {tmp_dir} {tmp_dir} "
+                "--validate-cogs"
+            )
+            self.run_command(cmd)
+            cog_files = sorted(glob.glob(f"{tmp_dir}/*tif"))
+            assert len(cog_files) == 8
+
+            result = self.run_command(
+                f"noaa-nclimgrid validate-cogs {' '.join(cog_files)}"
+            )
+            assert result.exit_code == 0
+            reports = [json.loads(line) for line in result.output.splitlines()]
+            assert [report["errors"] for report in reports] == [[]] * 8
+
+            with rasterio.open(
+                f"{tmp_dir}/striped.tif",
+                "w",
+                driver="GTiff",
+                width=8,
+                height=8,
+                count=1,
+                dtype="uint8",
+            ) as dst:
+                dst.write(np.zeros((1, 8, 8), dtype="uint8"))
+            result = self.run_command(
+                f"noaa-nclimgrid validate-cogs {cog_files[0]} {tmp_dir}/striped.tif"
+            )
+            assert result.exit_code != 0
+            assert "1 of 2 COGs are invalid" in result.output
+
+    def test_create_items_dry_run(self) -> None:
+        nc_href = test_data.get_path("data-files/netcdf/monthly/nclimgrid_prcp.nc")
+        with TemporaryDirectory() as tmp_dir:
+            cmd = (
+                f"noaa-nclimgrid create-items {nc_href} {tmp_dir} {tmp_dir} "
+                "--dry-run --month-range 189502 189502"
+            )
+            result = self.run_command(cmd)
+
+            plan = json.loads(result.output)
+            assert plan["units"] == 1
+            assert plan["cogs_to_create"] == 4
+            assert plan["plans"][0]["href"] == nc_href
+            assert os.listdir(tmp_dir) == []
+
     def test_create_daily_items(self) -> None:
         nc_href = test_data.get_path(
             "data-files/netcdf/daily/beta/by-month/2022/01/prcp-202201-grd-prelim.nc"
@@ -46,6 +116,23 @@ class CommandsTest(CliTestCase):
                 item = pystac.read_file(item_file)
                 item.validate()
 
+    def test_create_monthly_items_ndjson(self) -> None:
+        nc_href = test_data.get_path("data-files/netcdf/monthly/nclimgrid_prcp.nc")
+        with TemporaryDirectory() as tmp_dir:
+            cmd = (
+                f"noaa-nclimgrid create-items {nc_href} {tmp_dir} {tmp_dir} "
+                "--format ndjson"
+            )
+            self.run_command(cmd)
+
+            assert glob.glob(f"{tmp_dir}/*.json") == []
+            with open(f"{tmp_dir}/items.ndjson") as f:
+                lines = f.read().splitlines()
+            assert len(lines) == 2
+            for line in lines:
+                item = pystac.Item.from_dict(json.loads(line))
+                item.validate()
+
     def test_create_monthly_collection(self) -> None:
         with TemporaryDirectory() as tmp_dir:
             file_list_path = f"{tmp_dir}/test_monthly.txt"
@@ -66,3 +153,208 @@ class CommandsTest(CliTestCase):
 
             collection = pystac.read_file(f"{tmp_dir}/monthly/collection.json")
             collection.validate()
+
+    def test_create_daily_collection_with_discovery(self) -> None:
+        root = test_data.get_path("data-files/netcdf/daily/beta")
+        with TemporaryDirectory() as tmp_dir:
+            cmd = f"noaa-nclimgrid create-collection --discover {root} {tmp_dir}"
+            result = self.run_command(cmd)
+            assert result.exit_code != 0
+            assert "--collection-type" in result.output
+
+            cmd = (
+                f"noaa-nclimgrid create-collection --discover {root} {tmp_dir} "
+                "--collection-type daily-scaled"
+            )
+            self.run_command(cmd)
+            item_files = glob.glob(f"{tmp_dir}/daily-scaled/*/*.json")
+            assert len(item_files) == 2
+            collection = pystac.read_file(f"{tmp_dir}/daily-scaled/collection.json")
+            collection.validate()
+
+    def test_create_monthly_items_with_jsonl_progress(self) -> None:
+        nc_href = test_data.get_path("data-files/netcdf/monthly/nclimgrid_prcp.nc")
+        with TemporaryDirectory() as tmp_dir:
+            cmd = (
+                f"noaa-nclimgrid create-items {nc_href} {tmp_dir} {tmp_dir} "
+                "--progress jsonl"
+            )
+            result = self.run_command(cmd)
+            events = [
+                json.loads(line)
+                for line in result.output.splitlines()
+                if line.startswith("{")
+            ]
+            assert [event["done"] for event in events] == [0, 1, 2]
+            assert events[-1]["total"] == 2
+            assert events[-1]["href"] == "nclimgrid_prcp.nc"
+
+    def test_create_monthly_collection_with_time_stacks(self) -> None:
+        with TemporaryDirectory() as tmp_dir:
+            file_list_path = f"{tmp_dir}/test_monthly.txt"
+            with open(file_list_path, "w") as f:
+                f.write(
+                    test_data.get_path("data-files/netcdf/monthly/nclimgrid_prcp.nc")
+                )
+
+            cmd = (
+                f"noaa-nclimgrid create-collection {file_list_path} {tmp_dir} "
+                "--time-stacks --quantize"
+            )
+            self.run_command(cmd)
+
+            collection = pystac.read_file(f"{tmp_dir}/monthly/collection.json")
+            collection.validate()
+            asset = collection.assets["tavg_time_stack"]
+            with rasterio.open(asset.get_absolute_href()) as dataset:
+                assert dataset.count == 2
+                assert dataset.descriptions == (
+                    "1895-01-01T00:00:00Z",
+                    "1895-02-01T00:00:00Z",
+                )
+                assert dataset.dtypes[0] == "int16"
+                assert dataset.scales == (0.01, 0.01)
+                values = dataset.read(2)
+            cog_path = f"{tmp_dir}/monthly/nclimgrid-189502/nclimgrid-tavg-189502.tif"
+            with rasterio.open(cog_path) as dataset:
+                assert np.array_equal(values, dataset.read(1))
+
+    def test_create_items_footprint(self) -> None:
+        nc_href = test_data.get_path("data-files/netcdf/monthly/nclimgrid_prcp.nc")
+        with TemporaryDirectory() as tmp_dir:
+            mask_path = f"{tmp_dir}/mask.npz"
+            cmd = (
+                f"noaa-nclimgrid create-items {nc_href} {tmp_dir} {tmp_dir} "
+                f"--land-mask {mask_path} --footprint"
+            )
+            self.run_command(cmd)
+
+            assert os.path.exists(mask_path)
+            item = pystac.read_file(f"{tmp_dir}/nclimgrid-189501.json")
+            assert item.geometry["type"] == "MultiPolygon"
+            item.validate()
+
+    def test_create_items_progress(self) -> None:
+        nc_href = test_data.get_path("data-files/netcdf/monthly/nclimgrid_prcp.nc")
+        for progress_format in ["bar", "jsonl", "none"]:
+            with TemporaryDirectory() as tmp_dir:
+                result = self.run_command(
+                    f"noaa-nclimgrid create-items {nc_href} {tmp_dir} {tmp_dir} "
+                    f"--progress {progress_format}"
+                )
+                assert result.exit_code == 0, result.output
+                assert len(glob.glob(f"{tmp_dir}/*.json")) == 2
+
+    def test_create_items_land_mask_requires_footprint(self) -> None:
+        nc_href = test_data.get_path("data-files/netcdf/monthly/nclimgrid_prcp.nc")
+        with TemporaryDirectory() as tmp_dir:
+            mask_path = f"{tmp_dir}/mask.npz"
+            result = self.run_command(
+                f"noaa-nclimgrid create-items {nc_href} {tmp_dir} {tmp_dir} "
+                f"--land-mask {mask_path}"
+            )
+            assert result.exit_code != 0
+            assert "--land-mask requires --footprint" in result.output
+            assert not os.path.exists(mask_path)
+
+    def test_aggregate(self) -> None:
+        nc_href = test_data.get_path(
+            "data-files/netcdf/daily/beta/by-month/2022/01/prcp-202201-grd-scaled.nc"
+        )
+        with TemporaryDirectory() as tmp_dir:
+            cmd = f"noaa-nclimgrid aggregate {nc_href} {tmp_dir} {tmp_dir}"
+            self.run_command(cmd)
+
+            cog_files = glob.glob(f"{tmp_dir}/*-202201-grd-scaled-monthly.tif")
+            assert len(cog_files) == 4
+            item = pystac.read_file(f"{tmp_dir}/202201-grd-scaled-monthly.json")
+            item.validate()
+
+    def test_create_climatology(self) -> None:
+        nc_href = test_data.get_path("data-files/netcdf/monthly/nclimgrid_prcp.nc")
+        with TemporaryDirectory() as tmp_dir:
+            cmd = (
+                f"noaa-nclimgrid create-climatology {nc_href} {tmp_dir} {tmp_dir} "
+                "--period 189501 189502 --anomaly-range 189502 189502"
+            )
+            self.run_command(cmd)
+
+            assert len(glob.glob(f"{tmp_dir}/*-normal-*.tif")) == 4 * 12 * 2
+            assert len(glob.glob(f"{tmp_dir}/*-anomaly-*.tif")) == 4
+            item_files = glob.glob(f"{tmp_dir}/*.json")
+            assert len(item_files) == 13
+            for item_file in item_files:
+                item = pystac.read_file(item_file)
+                item.validate()
+
+    def test_timeseries(self) -> None:
+        nc_href = test_data.get_path("data-files/netcdf/monthly/nclimgrid_prcp.nc")
+        with TemporaryDirectory() as tmp_dir:
+            points_path = f"{tmp_dir}/points.csv"
+            with open(points_path, "w") as f:
+                f.write(
+                    "id,lat,lon\nUSW00023062,39.83,-104.66\nUSW00094728,40.78,-73.97\n"
+                )
+            outfile = f"{tmp_dir}/timeseries.csv"
+            cmd = f"noaa-nclimgrid timeseries {nc_href} {points_path} {outfile}"
+            self.run_command(cmd)
+
+            with open(outfile) as f:
+                lines = f.read().splitlines()
+            assert lines[0] == "id,lat,lon,time,prcp,tavg,tmax,tmin"
+            assert len(lines) == 5
+            assert lines[1].startswith("USW00023062,39.83,-104.66,1895-01-01,")
+            assert lines[4].startswith("USW00094728,40.78,-73.97,1895-02-01,")
+
+    def test_plan_and_merge(self) -> None:
+        nc_href = test_data.get_path("data-files/netcdf/monthly/nclimgrid_prcp.nc")
+        with TemporaryDirectory() as tmp_dir:
+            plan_path = f"{tmp_dir}/plan.json"
+            cmd = f"noaa-nclimgrid plan {nc_href} {plan_path} --shards 2"
+            self.run_command(cmd)
+
+            with open(plan_path) as f:
+                plan = json.load(f)
+            assert plan["collection_type"] == "monthly"
+            assert len(plan["shards"]) == 2
+
+            shard_dirs = []
+            for index, shard in enumerate(plan["shards"]):
+                shard_dir = f"{tmp_dir}/shard-{index}"
+                shard_dirs.append(shard_dir)
+                os.mkdir(shard_dir)
+                for task in shard:
+                    start, end = task["month_range"]
+                    cmd = (
+                        f"noaa-nclimgrid create-items {task['href']} {shard_dir} "
+                        f"{shard_dir} --month-range {start} {end}"
+                    )
+                    self.run_command(cmd)
+
+            outdir = f"{tmp_dir}/merged"
+            cmd = f"noaa-nclimgrid merge {' '.join(shard_dirs)} {outdir}"
+            self.run_command(cmd)
+
+            collection = pystac.read_file(f"{outdir}/monthly/collection.json")
+            items = list(collection.get_all_items())
+            assert [item.id for item in items] == [
+                "nclimgrid-189501",
+                "nclimgrid-189502",
+            ]
+            for item in items:
+                assert len(glob.glob(f"{outdir}/monthly/{item.id}/*.tif")) == 4
+            collection.validate()
+
+
+def test_read_infile() -> None:
+    assert _read_infile("https://example.com/nclimgrid_prcp.nc") == [
+        "https://example.com/nclimgrid_prcp.nc"
+    ]
+    with TemporaryDirectory() as tmp_dir:
+        infile = os.path.join(tmp_dir, "files.txt")
+        with open(infile, "w") as f:
+            f.write("data/nclimgrid_prcp.nc\n\n  s3://bucket/nclimgrid_tavg.nc \n")
+        assert _read_infile(infile) == [
+            os.path.abspath("data/nclimgrid_prcp.nc"),
+            "s3://bucket/nclimgrid_tavg.nc",
+        ]
@@ -0,0 +1,78 @@
+import os
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import pytest
+import rasterio
+
+from stactools.noaa_nclimgrid import stac
+from tests import test_data
+
+distributed = pytest.importorskip("distributed")
+
+
+def test_create_monthly_items_dask() -> None:
+    nc_href = test_data.get_path("data-files/netcdf/monthly/nclimgrid_prcp.nc")
+    with distributed.LocalCluster(
+        n_workers=2, threads_per_worker=1, processes=False
+    ) as cluster, distributed.Client(cluster) as client:
+        with TemporaryDirectory() as cog_dir:
+            items, cogs = stac.create_items(nc_href, cog_dir, dask_client=client)
+            assert [item.id for item in items] == [
+                "nclimgrid-189502",
+                "nclimgrid-189501",
+            ]
+            assert len(cogs) == 8
+            for cog in cogs:
+                assert os.path.exists(cog)
+            for item in items:
+                for asset in item.assets.values():
+                    assert asset.extra_fields["file:size"] > 0
+
+
+def test_create_daily_items_dask_with_existing_cogs() -> None:
+    nc_href = test_data.get_path(
+        "data-files/netcdf/daily/beta/by-month/2022/01/prcp-202201-grd-prelim.nc"
+    )
+    with distributed.LocalCluster(
+        n_workers=1, threads_per_worker=2, processes=False
+    ) as cluster, distributed.Client(cluster) as client:
+        with TemporaryDirectory() as cog_dir:
+            _, cogs = stac.create_items(nc_href, cog_dir, dask_client=client)
+            assert len(cogs) == 4
+            items, cogs = stac.create_items(
+                nc_href, cog_dir, cog_check_href=cog_dir, dask_client=client
+            )
+            assert len(items) == 1
+            assert len(cogs) == 0
+
+
+def test_create_quantized_items_dask() -> None:
+    nc_href = test_data.get_path("data-files/netcdf/monthly/nclimgrid_prcp.nc")
+    with distributed.LocalCluster(
+        n_workers=1, threads_per_worker=2, processes=False
+    ) as cluster, distributed.Client(cluster) as client:
+        with TemporaryDirectory() as cog_dir:
+            _, cogs = stac.create_items(
+                nc_href, cog_dir, dask_client=client, quantized=True
+            )
+            for cog in cogs:
+                with rasterio.open(cog) as dataset:
+                    assert dataset.dtypes[0] in ("int16", "uint16")
+
+
+def test_create_items_dask_worker_processes() -> None:
+    nc_href = test_data.get_path("data-files/netcdf/monthly/nclimgrid_prcp.nc")
+    with distributed.LocalCluster(
+        n_workers=2, threads_per_worker=1, processes=True
+    ) as cluster, distributed.Client(cluster) as client:
+        with TemporaryDirectory() as dask_dir, TemporaryDirectory() as local_dir:
+            _, cogs = stac.create_items(nc_href, dask_dir, dask_client=client)
+            _, local_cogs = stac.create_items(nc_href, local_dir)
+            assert len(cogs) == len(local_cogs) == 8
+            for cog, local_cog in zip(sorted(cogs), sorted(local_cogs)):
+                assert os.path.basename(cog) == os.path.basename(local_cog)
+                with rasterio.open(cog) as dataset, rasterio.open(local_cog) as local:
+                    assert np.array_equal(
+                        dataset.read(1), local.read(1), equal_nan=True
+                    )
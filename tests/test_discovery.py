@@ -0,0 +1,72 @@
+import os
+import shutil
+from tempfile import TemporaryDirectory
+
+import fsspec
+
+from stactools.noaa_nclimgrid.constants import CollectionType, Variable
+from stactools.noaa_nclimgrid.discovery import discover_inputs, group_files, list_files
+from tests import test_data
+
+
+def test_list_files() -> None:
+    root = test_data.get_path("data-files/netcdf/daily/beta/by-month")
+    hrefs = list_files(root)
+    assert len(hrefs) == 8
+    assert hrefs[0] == os.path.join(root, "2022", "01", "prcp-202201-grd-prelim.nc")
+
+
+def test_list_files_remote() -> None:
+    fs = fsspec.filesystem("memory")
+    for month in ["01", "02"]:
+        for var in Variable:
+            fs.pipe(
+                f"/nclimgrid/2022/{month}/{var.value}-2022{month}-grd-scaled.nc", b""
+            )
+    fs.pipe("/nclimgrid/2022/readme.txt", b"")
+    hrefs = list_files("memory://nclimgrid")
+    assert len(hrefs) == 8
+    assert hrefs[0] == "memory:///nclimgrid/2022/01/prcp-202201-grd-scaled.nc"
+    fs.rm("/nclimgrid", recursive=True)
+
+
+def test_group_files() -> None:
+    hrefs = [
+        f"/data/{month}/{var.value}-2022{month}-grd-prelim.nc"
+        for month in ["01", "02"]
+        for var in Variable
+        if not (month == "02" and var == Variable.TMIN)
+    ] + [f"/monthly/nclimgrid_{var.value}.nc" for var in Variable]
+    hrefs.append("/data/01/notes.nc")
+    discovery = group_files(hrefs)
+    assert discovery.complete == [
+        "/data/01/prcp-202201-grd-prelim.nc",
+        "/monthly/nclimgrid_prcp.nc",
+    ]
+    assert discovery.incomplete == {
+        "/data/02/prcp-202202-grd-prelim.nc": [Variable.TMIN]
+    }
+    assert discovery.collection_types() == [
+        CollectionType.DAILY_PRELIM,
+        CollectionType.MONTHLY,
+    ]
+    monthly = discovery.filter(CollectionType.MONTHLY)
+    assert monthly.complete == ["/monthly/nclimgrid_prcp.nc"]
+    assert monthly.incomplete == {}
+
+
+def test_discover_inputs() -> None:
+    source = test_data.get_path("data-files/netcdf/daily/beta/by-month/2022/01")
+    with TemporaryDirectory() as tmp_dir:
+        month_dir = os.path.join(tmp_dir, "2022", "01")
+        os.makedirs(month_dir)
+        for name in os.listdir(source):
+            if not name.startswith("tmax-") or "prelim" in name:
+                shutil.copy(os.path.join(source, name), month_dir)
+        discovery = discover_inputs(tmp_dir)
+        assert discovery.complete == [
+            os.path.join(month_dir, "prcp-202201-grd-prelim.nc")
+        ]
+        assert discovery.incomplete == {
+            os.path.join(month_dir, "prcp-202201-grd-scaled.nc"): [Variable.TMAX]
+        }
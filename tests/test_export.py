@@ -0,0 +1,58 @@
+import json
+import os
+from tempfile import TemporaryDirectory
+from typing import List
+
+import pystac
+import pytest
+
+from stactools.noaa_nclimgrid import export, stac
+from stactools.noaa_nclimgrid.constants import Variable
+from tests import test_data
+
+
+def _items() -> List[pystac.Item]:
+    cog_hrefs = {
+        var: test_data.get_path(
+            f"data-files/cog/monthly/nclimgrid-{var.value}-189501.tif"
+        )
+        for var in Variable
+    }
+    item = stac.ItemFactory().create_item(cog_hrefs)
+    clone = item.clone()
+    clone.id = "nclimgrid-189502"
+    return [item, clone]
+
+
+def test_write_ndjson() -> None:
+    items = _items()
+    with TemporaryDirectory() as tmp_dir:
+        ndjson_path = os.path.join(tmp_dir, "items.ndjson")
+        assert export.write_ndjson(iter(items), ndjson_path) == 2
+
+        with open(ndjson_path) as f:
+            lines = f.read().splitlines()
+        assert len(lines) == 2
+        for item, line in zip(items, lines):
+            assert json.loads(line) == json.loads(
+                json.dumps(item.to_dict(include_self_link=False))
+            )
+            pystac.Item.from_dict(json.loads(line)).validate()
+
+
+def test_write_geoparquet() -> None:
+    pq = pytest.importorskip("pyarrow.parquet")
+    items = _items()
+    with TemporaryDirectory() as tmp_dir:
+        parquet_path = os.path.join(tmp_dir, "items.parquet")
+        assert export.write_geoparquet(iter(items), parquet_path) == 2
+
+        table = pq.read_table(parquet_path)
+        assert table.num_rows == 2
+        assert table["id"].to_pylist() == [item.id for item in items]
+        assert str(table.schema.field("start_datetime").type) == "timestamp[us, tz=UTC]"
+        geo = json.loads(table.schema.metadata[b"geo"])
+        assert geo["primary_column"] == "geometry"
+        assert (
+            table["assets"][0].as_py()["prcp"]["href"] == items[0].assets["prcp"].href
+        )
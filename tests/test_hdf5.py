@@ -0,0 +1,90 @@
+import os
+from tempfile import TemporaryDirectory
+
+import h5netcdf
+import numpy as np
+import xarray
+
+from stactools.noaa_nclimgrid.hdf5 import SliceReader, open_slice_reader
+from stactools.noaa_nclimgrid.session import DatasetCache, FileSystemSession
+from tests import test_data
+
+
+def _xarray_slice(href: str, var: str, time_index: int) -> np.ndarray:
+    with xarray.open_dataset(href) as dataset:
+        values = dataset[var].isel(time=time_index).values
+        if dataset.lat.values[0] < dataset.lat.values[-1]:
+            values = np.flipud(values)
+    return values
+
+
+def test_slice_reader_matches_xarray() -> None:
+    daily_dir = "data-files/netcdf/daily/beta/by-month/2022/01"
+    cases = [
+        ("data-files/netcdf/monthly/nclimgrid_prcp.nc", "prcp", 2),
+        ("data-files/netcdf/monthly/nclimgrid_tavg.nc", "tavg", 2),
+        (f"{daily_dir}/tmin-202201-grd-prelim.nc", "tmin", 1),
+    ]
+    for path, var, count in cases:
+        href = test_data.get_path(path)
+        with open_slice_reader(href) as reader:
+            for time_index in range(count):
+                values = reader.read(var, time_index)
+                expected = _xarray_slice(href, var, time_index)
+                assert values.dtype == expected.dtype
+                assert np.array_equal(values, expected, equal_nan=True)
+
+
+def _write_packed(href: str, raw: np.ndarray) -> None:
+    # Written with h5netcdf directly, so the file holds the packed int16 data
+    # and its CF attributes as given, independent of xarray's encoder.
+    with h5netcdf.File(href, "w") as f:
+        f.dimensions = {"time": 2, "lat": 3, "lon": 4}
+        f.create_variable("time", ("time",), data=np.array([0, 1], dtype=np.int32))
+        f.variables["time"].attrs["units"] = "days since 1895-01-01"
+        f.create_variable("lat", ("lat",), data=np.array([24.0, 25.0, 26.0]))
+        f.create_variable("lon", ("lon",), data=np.arange(-100.0, -96.0))
+        tavg = f.create_variable(
+            "tavg", ("time", "lat", "lon"), dtype=np.int16, fillvalue=-32768
+        )
+        tavg[...] = raw
+        tavg.attrs["scale_factor"] = np.float32(0.01)
+        tavg.attrs["add_offset"] = np.float32(1.0)
+
+
+def test_slice_reader_decodes_like_xarray() -> None:
+    raw = np.arange(24, dtype=np.int16).reshape(2, 3, 4)
+    raw[0, 0, 0] = -32768
+    with TemporaryDirectory() as tmp_dir:
+        href = os.path.join(tmp_dir, "tavg.nc")
+        _write_packed(href, raw)
+        with open(href, "rb") as f:
+            reader = SliceReader(f)
+            assert reader.flip
+            slices = [reader.read("tavg", time_index) for time_index in range(2)]
+            reader.close()
+        for time_index, values in enumerate(slices):
+            expected = _xarray_slice(href, "tavg", time_index)
+            assert values.dtype == expected.dtype == np.float32
+            assert np.array_equal(values, expected, equal_nan=True)
+
+    # Rows are flipped to north-up, the fill value is NaN, and the other
+    # values are unpacked with the scale and offset.
+    unpacked = np.flipud(raw[0] * np.float32(0.01) + np.float32(1.0))
+    unpacked[-1, 0] = np.nan
+    assert np.allclose(slices[0], unpacked, equal_nan=True)
+
+
+def test_slice_reader_with_dataset_cache() -> None:
+    href = test_data.get_path("data-files/netcdf/monthly/nclimgrid_prcp.nc")
+    session = FileSystemSession(datasets=DatasetCache())
+    with open_slice_reader(href, session) as reader:
+        first = reader
+        reader.read("prcp", 0)
+    with open_slice_reader(href, session) as reader:
+        assert reader is first
+        values = reader.read("prcp", 1)
+    assert np.array_equal(values, _xarray_slice(href, "prcp", 1), equal_nan=True)
+    assert session.datasets is not None
+    assert (session.datasets.hits, session.datasets.misses) == (1, 1)
+    session.datasets.close()
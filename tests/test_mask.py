@@ -0,0 +1,87 @@
+import os
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import rasterio
+import shapely.geometry
+
+from stactools.noaa_nclimgrid import climatology, stac
+from stactools.noaa_nclimgrid.cog import read_time_slice
+from stactools.noaa_nclimgrid.mask import LandMask, load_land_mask
+from tests import test_data
+
+MONTHLY_HREF = "data-files/netcdf/monthly/nclimgrid_prcp.nc"
+DAILY_HREF = "data-files/netcdf/daily/beta/by-month/2022/01/prcp-202201-grd-prelim.nc"
+
+
+def test_land_mask() -> None:
+    nc_href = test_data.get_path(DAILY_HREF)
+    land_mask = LandMask.from_netcdf(nc_href)
+    values = read_time_slice(nc_href, "prcp", 0)
+    np.testing.assert_array_equal(land_mask.mask, np.isfinite(values))
+    assert 0.4 < land_mask.mask.mean() < 0.6
+
+    monthly_mask = LandMask.from_netcdf(test_data.get_path(MONTHLY_HREF))
+    np.testing.assert_array_equal(monthly_mask.mask, land_mask.mask)
+
+    compressed = land_mask.compress(values)
+    assert compressed.shape == (land_mask.mask.sum(),)
+    np.testing.assert_array_equal(land_mask.expand(compressed), values)
+
+    with TemporaryDirectory() as tmp_dir:
+        mask_path = os.path.join(tmp_dir, "mask.npz")
+        land_mask.write(mask_path)
+        np.testing.assert_array_equal(LandMask.read(mask_path).mask, land_mask.mask)
+        assert os.path.getsize(mask_path) < 50000
+
+
+def test_load_land_mask() -> None:
+    nc_href = test_data.get_path(MONTHLY_HREF)
+    with TemporaryDirectory() as tmp_dir:
+        mask_path = os.path.join(tmp_dir, "mask.npz")
+        land_mask = load_land_mask(mask_path, nc_href)
+        assert os.path.exists(mask_path)
+        np.testing.assert_array_equal(
+            load_land_mask(mask_path, "does-not-exist.nc").mask, land_mask.mask
+        )
+
+
+def test_footprint() -> None:
+    land_mask = LandMask.from_netcdf(test_data.get_path(MONTHLY_HREF))
+    footprint = shapely.geometry.shape(land_mask.footprint())
+    assert footprint.is_valid
+    minx, miny, maxx, maxy = footprint.bounds
+    assert -124.8 < minx < -124.0 and -67.5 < maxx < -66.9
+    assert 24.4 < miny < 25.5 and 48.9 < maxy < 49.4
+
+
+def test_create_items_footprint() -> None:
+    nc_href = test_data.get_path(MONTHLY_HREF)
+    with TemporaryDirectory() as tmp_dir:
+        items, _ = stac.create_items(nc_href, tmp_dir, footprint=True)
+        footprint = LandMask.from_netcdf(nc_href).footprint()
+        for item in items:
+            assert item.geometry == footprint
+            assert item.bbox == list(shapely.geometry.shape(footprint).bounds)
+            item.validate()
+
+
+def test_create_climatology_with_land_mask() -> None:
+    nc_href = test_data.get_path(MONTHLY_HREF)
+    land_mask = LandMask.from_netcdf(nc_href)
+    with TemporaryDirectory() as tmp_dir:
+        masked_dir = os.path.join(tmp_dir, "masked")
+        os.mkdir(masked_dir)
+        for cog_dir, mask in [(tmp_dir, None), (masked_dir, land_mask)]:
+            climatology.create_climatology(
+                nc_href,
+                cog_dir,
+                period=("189501", "189502"),
+                land_mask=mask,
+            )
+
+        cog_name = "nclimgrid-tmin-normal-mean-1895-1895-02.tif"
+        with rasterio.open(os.path.join(tmp_dir, cog_name)) as dataset:
+            expected = dataset.read(1)
+        with rasterio.open(os.path.join(masked_dir, cog_name)) as dataset:
+            np.testing.assert_array_equal(dataset.read(1), expected)
@@ -0,0 +1,84 @@
+import glob
+import os
+from tempfile import TemporaryDirectory
+
+import fsspec
+
+from stactools.noaa_nclimgrid import stac
+from stactools.noaa_nclimgrid.mirror import MirrorCache, _KeyLock
+from stactools.noaa_nclimgrid.session import FileSystemSession
+from tests import test_data
+
+
+def test_mirror_revalidates() -> None:
+    fs = fsspec.filesystem("memory")
+    fs.pipe("memory://mirror/revalidate.nc", b"first")
+    with TemporaryDirectory() as cache_dir:
+        with MirrorCache(cache_dir).open("memory://mirror/revalidate.nc", fs) as f:
+            assert f.read() == b"first"
+
+        fs.pipe("memory://mirror/revalidate.nc", b"changed")
+        with MirrorCache(cache_dir).open("memory://mirror/revalidate.nc", fs) as f:
+            assert f.read() == b"changed"
+        assert len(glob.glob(os.path.join(cache_dir, "*.nc"))) == 1
+
+
+def test_mirror_evicts_least_recently_used() -> None:
+    fs = fsspec.filesystem("memory")
+    fs.pipe("memory://mirror/a.nc", b"a" * 100)
+    fs.pipe("memory://mirror/b.nc", b"b" * 100)
+    with TemporaryDirectory() as cache_dir:
+        mirror = MirrorCache(cache_dir, max_size=150)
+        with mirror.open("memory://mirror/a.nc", fs) as f:
+            a_path = f.name
+        os.utime(a_path, (0, 0))
+        with mirror.open("memory://mirror/b.nc", fs) as f:
+            b_path = f.name
+        assert not os.path.exists(a_path)
+        assert os.path.exists(b_path)
+        assert mirror.size() == 100
+
+
+def test_mirror_does_not_evict_entries_in_use() -> None:
+    fs = fsspec.filesystem("memory")
+    fs.pipe("memory://mirror/a.nc", b"a" * 100)
+    fs.pipe("memory://mirror/b.nc", b"b" * 100)
+    with TemporaryDirectory() as cache_dir:
+        mirror = MirrorCache(cache_dir, max_size=150)
+        with mirror.open("memory://mirror/a.nc", fs) as f:
+            a_path = f.name
+        os.utime(a_path, (0, 0))
+        a_key = os.path.splitext(os.path.basename(a_path))[0]
+        a_lock = mirror._key_locks.get(a_key)
+        assert a_lock is None
+
+        # Simulate another thread that holds the entry of a.nc, e.g., while
+        # it opens the file.
+        with mirror._lock:
+            a_lock = _KeyLock()
+            mirror._key_locks[a_key] = a_lock
+        with a_lock.lock:
+            with mirror.open("memory://mirror/b.nc", fs):
+                pass
+        assert os.path.exists(a_path)
+        assert mirror.size() == 200
+
+        del a_lock
+        with mirror.open("memory://mirror/b.nc", fs):
+            pass
+        assert not os.path.exists(a_path)
+        assert len(mirror._key_locks) == 0
+
+
+def test_create_items_with_mirror() -> None:
+    fs = fsspec.filesystem("memory")
+    for path in glob.glob(test_data.get_path("data-files/netcdf/monthly/*.nc")):
+        fs.put_file(path, f"memory://mirror/monthly/{os.path.basename(path)}")
+
+    with TemporaryDirectory() as cache_dir, TemporaryDirectory() as cog_dir:
+        session = FileSystemSession(mirror=MirrorCache(cache_dir))
+        items, _ = stac.create_items(
+            "memory://mirror/monthly/nclimgrid_prcp.nc", cog_dir, session=session
+        )
+        assert len(items) == 2
+        assert len(glob.glob(os.path.join(cache_dir, "*.nc"))) == 4
@@ -0,0 +1,67 @@
+import os
+from tempfile import TemporaryDirectory
+
+from stactools.noaa_nclimgrid import cog, partition
+from stactools.noaa_nclimgrid.utils import nc_href_dict
+from tests import test_data
+
+
+def test_plan_monthly_shards() -> None:
+    nc_href = test_data.get_path("data-files/netcdf/monthly/nclimgrid_prcp.nc")
+    shards = partition.plan_shards([nc_href], 2)
+    assert shards == [
+        [{"href": nc_href, "month_range": ["189501", "189501"]}],
+        [{"href": nc_href, "month_range": ["189502", "189502"]}],
+    ]
+
+
+def test_plan_more_shards_than_units() -> None:
+    nc_href = test_data.get_path(
+        "data-files/netcdf/daily/beta/by-month/2022/01/prcp-202201-grd-prelim.nc"
+    )
+    shards = partition.plan_shards([nc_href], 3)
+    assert shards == [[{"href": nc_href, "day_range": [1, 1]}]]
+
+
+def test_plan_single_shard() -> None:
+    nc_href = test_data.get_path("data-files/netcdf/monthly/nclimgrid_prcp.nc")
+    shards = partition.plan_shards([nc_href], 1)
+    assert shards == [[{"href": nc_href, "month_range": ["189501", "189502"]}]]
+
+
+def test_plan_items() -> None:
+    nc_href = test_data.get_path("data-files/netcdf/monthly/nclimgrid_prcp.nc")
+    with TemporaryDirectory() as cog_dir:
+        cog.create_cogs(
+            nc_href_dict(nc_href), cog_dir, month={"idx": 1, "date": "189501"}
+        )
+        plan = partition.plan_items(nc_href, cog_check_href=cog_dir)
+        assert len(os.listdir(cog_dir)) == 4
+
+    assert plan["units"] == 2
+    assert plan["cogs_to_create"] == 4
+    assert plan["cogs_existing"] == 4
+    # Each variable file holds two time slices, one of which is read.
+    nc_bytes = sum(os.path.getsize(href) for href in nc_href_dict(nc_href).values())
+    assert abs(plan["input_bytes"] - nc_bytes / 2) < 4
+    assert plan["output_bytes"] == 4 * partition.COG_BYTES[False]
+    assert plan["seconds"] == 4 * partition.SECONDS_PER_COG[False]
+
+    calibration = partition.calibrate(nc_href, quantized=True)
+    assert 0 < calibration["cog_bytes"] < 2**21
+    plan = partition.plan_items(nc_href, quantized=True, calibration=calibration)
+    assert plan["cogs_to_create"] == 8
+    assert plan["output_bytes"] == int(8 * calibration["cog_bytes"])
+
+    summary = partition.summarize_plans([plan, plan])
+    assert summary["cogs_to_create"] == 16
+    assert summary["plans"] == [plan, plan]
+
+
+def test_calibrate_daily() -> None:
+    nc_href = test_data.get_path(
+        "data-files/netcdf/daily/beta/by-month/2022/01/prcp-202201-grd-prelim.nc"
+    )
+    calibration = partition.calibrate(nc_href)
+    assert 0 < calibration["cog_bytes"] < 2**22
+    assert calibration["seconds_per_cog"] > 0
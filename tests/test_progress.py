@@ -0,0 +1,64 @@
+from tempfile import TemporaryDirectory
+from typing import List
+
+from stactools.noaa_nclimgrid import stac
+from stactools.noaa_nclimgrid.progress import ProgressEvent, ProgressTracker
+from tests import test_data
+
+
+def test_progress_event() -> None:
+    event = ProgressEvent(
+        done=2,
+        total=8,
+        unit="189502",
+        cogs=8,
+        bytes_read=4_000_000,
+        bytes_written=10_000_000,
+        elapsed=4.0,
+    )
+    assert event.cogs_per_second == 2.0
+    assert event.read_mb_per_second == 1.0
+    assert event.write_mb_per_second == 2.5
+    assert event.eta == 12.0
+    assert event.to_dict()["eta"] == 12.0
+
+    start = ProgressEvent(0, 8, None, 0, 0, 0, 0.0)
+    assert start.eta is None
+    assert start.cogs_per_second == 0.0
+
+
+def test_create_items_progress() -> None:
+    nc_href = test_data.get_path("data-files/netcdf/monthly/nclimgrid_prcp.nc")
+    events: List[ProgressEvent] = []
+    with TemporaryDirectory() as cog_dir:
+        items, cogs = stac.create_items(nc_href, cog_dir, progress=events.append)
+        assert [(e.done, e.total, e.unit) for e in events] == [
+            (0, 2, None),
+            (1, 2, "189502"),
+            (2, 2, "189501"),
+        ]
+        assert events[-1].cogs == len(cogs) == 8
+        assert events[-1].bytes_written > 0
+        assert events[-1].eta == 0
+
+        events.clear()
+        stac.create_items(
+            nc_href, cog_dir, cog_check_href=cog_dir, progress=events.append
+        )
+        assert events[-1].done == 2
+        assert events[-1].cogs == 0
+
+
+def test_progress_tracker_remote_cogs() -> None:
+    events: List[ProgressEvent] = []
+    tracker = ProgressTracker(1, events.append)
+    tracker.start()
+    tracker.update(
+        "189501",
+        ["s3://bucket/cogs/nclimgrid-prcp-189501.tif"],
+        {"nclimgrid-prcp-189501.tif": {"file:size": 1234}},
+    )
+    assert [(e.done, e.cogs, e.bytes_written) for e in events] == [
+        (0, 0, 0),
+        (1, 1, 1234),
+    ]
@@ -0,0 +1,63 @@
+import threading
+import time
+
+import pytest
+
+from stactools.noaa_nclimgrid import scheduler
+
+
+def test_parse_memory() -> None:
+    assert scheduler.parse_memory("1000") == 1000
+    assert scheduler.parse_memory("4GB") == 4 * 10**9
+    assert scheduler.parse_memory("1.5 GiB") == 3 * 2**29
+    assert scheduler.parse_memory("512mib") == 512 * 2**20
+    with pytest.raises(ValueError):
+        scheduler.parse_memory("4 GBs")
+
+
+def test_slice_memory() -> None:
+    nbytes = 596 * 1385 * 4
+    assert scheduler.slice_memory((596, 1385)) == scheduler.SLICE_COPIES * nbytes
+    assert scheduler.slice_memory((596, 1385), quantized=True) > 4 * nbytes
+
+
+def test_peak_rss() -> None:
+    rss = scheduler.peak_rss()
+    assert rss is None or rss > 2**20
+
+
+def test_current_rss() -> None:
+    rss = scheduler.current_rss()
+    assert rss is None or rss > 2**20
+
+
+def test_map_with_budget_limits_concurrency() -> None:
+    lock = threading.Lock()
+    running = [0]
+    max_running = [0]
+
+    def task(index: int) -> int:
+        with lock:
+            running[0] += 1
+            max_running[0] = max(max_running[0], running[0])
+        time.sleep(0.01)
+        with lock:
+            running[0] -= 1
+        return index * 2
+
+    baseline = scheduler.current_rss() or 0
+    results = scheduler.map_with_budget(
+        task, list(range(20)), 100, baseline + 250, max_workers=8
+    )
+    assert results == [index * 2 for index in range(20)]
+    assert 1 <= max_running[0] <= 2
+
+    results = scheduler.map_with_budget(task, [1, 2], 100, 0)
+    assert results == [2, 4]
+
+
+def test_memory_budget_runs_oversized_task_alone() -> None:
+    budget = scheduler.MemoryBudget(100)
+    with budget.reserve(500):
+        assert budget.reserved == 500
+    assert budget.reserved == 0
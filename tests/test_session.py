@@ -0,0 +1,240 @@
+import os
+import threading
+from tempfile import TemporaryDirectory
+from typing import Any, Dict, List, Tuple
+
+import fsspec
+import numpy as np
+import pytest
+import xarray
+from fsspec import AbstractFileSystem
+from fsspec.spec import AbstractBufferedFile
+
+from stactools.noaa_nclimgrid import stac
+from stactools.noaa_nclimgrid.session import (
+    CoalescingBlockCache,
+    DatasetCache,
+    FileSystemSession,
+    ReadMetrics,
+    open_dataset,
+    open_href,
+    retry_call,
+)
+from tests import test_data
+
+
+def test_session_reuses_filesystem() -> None:
+    session = FileSystemSession()
+    assert session.filesystem("file") is session.filesystem("file")
+
+
+def test_session_open_with_cache_settings() -> None:
+    with fsspec.open("memory://session/test.nc", "wb") as f:
+        f.write(b"0123456789" * 100)
+
+    session = FileSystemSession(cache_type="readahead", block_size=64)
+    with open_href("memory://session/test.nc", session) as f:
+        f.seek(500)
+        assert f.read(10) == b"0123456789"
+
+
+def test_create_items_with_session() -> None:
+    nc_href = test_data.get_path("data-files/netcdf/monthly/nclimgrid_prcp.nc")
+    session = FileSystemSession(cache_type="none")
+    with TemporaryDirectory() as cog_dir:
+        items, cogs = stac.create_items(nc_href, cog_dir, session=session)
+        assert len(items) == 2
+        assert len(cogs) == 8
+
+
+class FlakyFileSystem(AbstractFileSystem):
+    """Local files behind a remote-like filesystem whose range requests fail
+    every third call."""
+
+    protocol = "flaky"
+    calls = 0
+
+    def info(self, path: str, **kwargs: Any) -> Dict[str, Any]:
+        path = self._strip_protocol(path)
+        return {"name": path, "size": os.path.getsize(path), "type": "file"}
+
+    def _open(self, path: str, mode: str = "rb", **kwargs: Any) -> Any:
+        return FlakyFile(self, path, mode, **kwargs)
+
+
+class FlakyFile(AbstractBufferedFile):
+    def _fetch_range(self, start: int, end: int) -> bytes:
+        FlakyFileSystem.calls += 1
+        if FlakyFileSystem.calls % 3 == 0:
+            raise ConnectionResetError("Connection reset by peer")
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            return f.read(end - start)
+
+
+fsspec.register_implementation("flaky", FlakyFileSystem, clobber=True)
+
+
+def test_coalescing_block_cache() -> None:
+    data = bytes(range(256)) * 40
+    requests: List[Tuple[int, int]] = []
+
+    def fetcher(start: int, stop: int) -> bytes:
+        requests.append((start, stop))
+        return data[start:stop]
+
+    cache = CoalescingBlockCache(1000, fetcher, len(data), maxblocks=4)
+    assert cache._fetch(500, 2500) == data[500:2500]
+    assert requests == [(0, 3000)]
+    assert cache._fetch(2900, 4100) == data[2900:4100]
+    assert requests == [(0, 3000), (3000, 5000)]
+    assert cache._fetch(1000, 1200) == data[1000:1200]
+    assert len(requests) == 2
+    # Block 0 was evicted, block 1 was kept as recently used.
+    assert cache._fetch(0, 2000) == data[0:2000]
+    assert requests[-1] == (0, 1000)
+    assert cache._fetch(10000, 20000) == data[10000:]
+    assert cache._fetch(5, 5) == b""
+
+
+def test_session_retries_transient_errors() -> None:
+    nc_href = test_data.get_path("data-files/netcdf/monthly/nclimgrid_prcp.nc")
+    session = FileSystemSession(block_size=2**16, backoff=0)
+    with open_href(f"flaky://{nc_href}", session) as f:
+        with xarray.open_dataset(f) as dataset:
+            values = dataset.prcp.values
+    with xarray.open_dataset(nc_href) as dataset:
+        assert np.array_equal(values, dataset.prcp.values, equal_nan=True)
+
+    metrics = session.metrics.to_dict()
+    assert metrics["retries"] > 0
+    assert metrics["failures"] == 0
+    assert metrics["requests"] > 0
+    assert metrics["bytes"] >= os.path.getsize(nc_href)
+
+
+def test_retry_call() -> None:
+    metrics = ReadMetrics()
+    attempts = []
+
+    def fail() -> None:
+        attempts.append(1)
+        raise TimeoutError("timed out")
+
+    with pytest.raises(TimeoutError):
+        retry_call(fail, retries=2, backoff=0, metrics=metrics)
+    assert len(attempts) == 3
+    assert metrics.retries == 2
+    assert metrics.failures == 1
+
+    def missing() -> None:
+        attempts.append(1)
+        raise FileNotFoundError("missing")
+
+    with pytest.raises(FileNotFoundError):
+        retry_call(missing, retries=2, backoff=0, metrics=metrics)
+    assert len(attempts) == 4
+
+
+def test_dataset_cache() -> None:
+    nc_href = test_data.get_path("data-files/netcdf/monthly/nclimgrid_prcp.nc")
+    session = FileSystemSession(datasets=DatasetCache(max_open=1))
+    assert session.datasets is not None
+    with open_dataset(nc_href, session) as dataset:
+        first = dataset
+        values = dataset.prcp.isel(time=0).values
+    with open_dataset(nc_href, session) as dataset:
+        assert dataset is first
+        assert np.array_equal(dataset.prcp.isel(time=0).values, values, equal_nan=True)
+    assert (session.datasets.hits, session.datasets.misses) == (1, 1)
+
+    tavg_href = nc_href.replace("prcp", "tavg")
+    with open_dataset(tavg_href, session):
+        pass
+    assert len(session.datasets) == 1
+    with open_dataset(nc_href, session) as dataset:
+        assert dataset is not first
+    assert session.datasets.misses == 3
+
+    session.datasets.close()
+    assert len(session.datasets) == 0
+
+
+def test_dataset_cache_reopens_changed_files() -> None:
+    nc_href = test_data.get_path("data-files/netcdf/monthly/nclimgrid_prcp.nc")
+    with TemporaryDirectory() as tmp_dir:
+        href = os.path.join(tmp_dir, "nclimgrid_prcp.nc")
+        with open(nc_href, "rb") as src, open(href, "wb") as dst:
+            dst.write(src.read())
+        datasets = DatasetCache()
+        session = FileSystemSession(datasets=datasets)
+        with open_dataset(href, session) as dataset:
+            first = dataset
+        stat = os.stat(href)
+        os.utime(href, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        with open_dataset(href, session) as dataset:
+            assert dataset is not first
+        assert datasets.misses == 2
+        datasets.close()
+
+
+class _Dataset:
+    def close(self) -> None:
+        pass
+
+
+def test_dataset_cache_slow_open_does_not_block_other_hrefs() -> None:
+    datasets = DatasetCache()
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_opener() -> Any:
+        started.set()
+        assert release.wait(timeout=10)
+        return open(__file__, "rb")
+
+    def open_slow() -> None:
+        with datasets.open("https://example.com/slow.nc", slow_opener, _load_dataset):
+            pass
+
+    thread = threading.Thread(target=open_slow)
+    thread.start()
+    try:
+        assert started.wait(timeout=10)
+        with datasets.open(
+            "https://example.com/fast.nc", lambda: open(__file__, "rb"), _load_dataset
+        ) as dataset:
+            assert isinstance(dataset, _Dataset)
+        assert not release.is_set()
+    finally:
+        release.set()
+        thread.join()
+    assert (datasets.hits, datasets.misses) == (0, 2)
+
+    # A thread waiting for a dataset in use by another thread gets the same
+    # dataset once it is released.
+    with datasets.open(
+        "https://example.com/slow.nc", slow_opener, _load_dataset
+    ) as first:
+        results: List[Any] = []
+        waiter = threading.Thread(
+            target=lambda: results.append(
+                _open_and_get(datasets, "https://example.com/slow.nc")
+            )
+        )
+        waiter.start()
+        waiter.join(timeout=0.2)
+        assert waiter.is_alive()
+    waiter.join()
+    assert results == [first]
+    datasets.close()
+    assert len(datasets) == 0
+
+
+def _load_dataset(file_object: Any) -> _Dataset:
+    return _Dataset()
+
+
+def _open_and_get(datasets: DatasetCache, href: str) -> Any:
+    with datasets.open(href, lambda: open(__file__, "rb"), _load_dataset) as dataset:
+        return dataset
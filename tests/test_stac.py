@@ -1,6 +1,10 @@
+import json
+import os
 from tempfile import TemporaryDirectory
 
-from stactools.noaa_nclimgrid import stac
+import pytest
+
+from stactools.noaa_nclimgrid import constants, stac
 from stactools.noaa_nclimgrid.constants import CollectionType, Variable
 from tests import test_data
 
@@ -101,6 +105,21 @@ def test_read_href_modifier() -> None:
         assert did_it
 
 
+def test_read_href_modifier_is_cached() -> None:
+    nc_href = test_data.get_path("data-files/netcdf/monthly/nclimgrid_prcp.nc")
+
+    modified_hrefs = []
+
+    def read_href_modifier(href: str) -> str:
+        modified_hrefs.append(href)
+        return href
+
+    with TemporaryDirectory() as cog_dir:
+        _ = stac.create_items(nc_href, cog_dir, read_href_modifier=read_href_modifier)
+        assert len(modified_hrefs) == 4
+        assert len(set(modified_hrefs)) == 4
+
+
 def test_daily_collection() -> None:
     collection = stac.create_collection(CollectionType.DAILY_SCALED, nc_assets=True)
     collection_dict = collection.to_dict()
@@ -164,3 +183,108 @@ def test_month_range() -> None:
         items, cogs = stac.create_items(nc_href, cog_dir, month_range=month_range)
         assert len(items) == 1
         assert len(cogs) == 4
+
+
+def test_hash_manifest() -> None:
+    nc_href = test_data.get_path(
+        "data-files/netcdf/daily/beta/by-month/2022/01/prcp-202201-grd-scaled.nc"
+    )
+    with TemporaryDirectory() as cog_dir:
+        hash_manifest = os.path.join(cog_dir, "hashes.json")
+        _, cogs = stac.create_items(nc_href, cog_dir, hash_manifest=hash_manifest)
+        assert len(cogs) == 8
+        with open(hash_manifest) as f:
+            assert len(json.load(f)) == 8
+
+        _, cogs = stac.create_items(
+            nc_href, cog_dir, cog_check_href=cog_dir, hash_manifest=hash_manifest
+        )
+        assert len(cogs) == 0
+
+        os.remove(hash_manifest)
+        _, cogs = stac.create_items(
+            nc_href, cog_dir, cog_check_href=cog_dir, hash_manifest=hash_manifest
+        )
+        assert len(cogs) == 0
+        with open(hash_manifest) as f:
+            assert len(json.load(f)) == 8
+
+
+def test_file_manifest() -> None:
+    nc_href = test_data.get_path("data-files/netcdf/monthly/nclimgrid_prcp.nc")
+    with TemporaryDirectory() as cog_dir:
+        file_manifest = os.path.join(cog_dir, "files.json")
+        items, cogs = stac.create_items(nc_href, cog_dir, file_manifest=file_manifest)
+        with open(file_manifest) as f:
+            file_info = json.load(f)
+        assert len(file_info) == 8
+        for item in items:
+            assert constants.FILE_EXTENSION_V21 in item.stac_extensions
+            for var in Variable:
+                asset = item.assets[var.value]
+                name = os.path.basename(asset.href)
+                assert asset.extra_fields["file:size"] == os.path.getsize(asset.href)
+                assert asset.extra_fields["file:checksum"].startswith("1220")
+                assert asset.extra_fields["file:checksum"] == (
+                    file_info[name]["file:checksum"]
+                )
+            item.validate()
+
+        items, cogs = stac.create_items(
+            nc_href, cog_dir, cog_check_href=cog_dir, file_manifest=file_manifest
+        )
+        assert len(cogs) == 0
+        for item in items:
+            assert "file:checksum" in item.assets[Variable.PRCP].extra_fields
+
+
+def test_item_factory_matches_create_item() -> None:
+    cog_hrefs = {
+        var: test_data.get_path(
+            f"data-files/cog/monthly/nclimgrid-{var.value}-189501.tif"
+        )
+        for var in Variable
+    }
+    item_factory = stac.ItemFactory()
+    _ = item_factory.create_item(cog_hrefs)
+    factory_dict = item_factory.create_item(cog_hrefs).to_dict()
+    item_dict = stac.create_item(cog_hrefs).to_dict()
+    factory_dict["properties"].pop("created")
+    item_dict["properties"].pop("created")
+    assert factory_dict == item_dict
+
+
+def test_create_quantized_items() -> None:
+    nc_href = test_data.get_path("data-files/netcdf/monthly/nclimgrid_prcp.nc")
+    with TemporaryDirectory() as cog_dir:
+        items, _ = stac.create_items(nc_href, cog_dir, quantized=True)
+        for item in items:
+            bands = item.assets[Variable.PRCP].extra_fields["raster:bands"]
+            assert bands[0]["data_type"] == "uint16"
+            assert bands[0]["nodata"] == 65535
+            assert bands[0]["scale"] == 0.05
+            assert bands[0]["offset"] == 0.0
+            bands = item.assets[Variable.TMIN].extra_fields["raster:bands"]
+            assert bands[0]["data_type"] == "int16"
+            assert bands[0]["unit"] == "degree Celsius"
+            item.validate()
+
+    collection = stac.create_collection(CollectionType.MONTHLY, quantized=True)
+    item_assets = collection.extra_fields["item_assets"]
+    assert item_assets["tavg"]["raster:bands"][0]["scale"] == 0.01
+
+    assert stac.ItemFactory(quantized=True).quantized
+    with pytest.raises(ValueError):
+        stac.create_items(
+            nc_href, "unused", quantized=True, item_factory=stac.ItemFactory()
+        )
+
+
+def test_create_items_with_max_memory() -> None:
+    nc_href = test_data.get_path("data-files/netcdf/monthly/nclimgrid_prcp.nc")
+    with TemporaryDirectory() as cog_dir:
+        items, cogs = stac.create_items(nc_href, cog_dir, max_memory=2**32)
+        assert [item.id for item in items] == ["nclimgrid-189502", "nclimgrid-189501"]
+        assert len(cogs) == 8
+        for item in items:
+            item.validate()
@@ -0,0 +1,37 @@
+import numpy as np
+
+from stactools.noaa_nclimgrid.constants import Frequency
+from stactools.noaa_nclimgrid.timeindex import TimeIndex
+
+
+def test_monthly_time_index() -> None:
+    times = np.arange("1895-01", "2022-01", dtype="datetime64[M]")
+    index = TimeIndex.from_times(times, Frequency.MONTHLY)
+    assert len(index) == 1524
+    assert (index.first, index.last) == (189501, 202112)
+
+    selected = index.select(202011, 202102)
+    assert selected.labels() == ["202011", "202012", "202101", "202102"]
+    assert selected.ordered(descending=True).units()[0] == {
+        "month": {"idx": 1514, "date": "202102"}
+    }
+    assert len(index.select(202201, 202212)) == 0
+
+
+def test_daily_time_index() -> None:
+    times = np.arange("2022-01-01", "2022-02-01", dtype="datetime64[D]")
+    index = TimeIndex.from_times(times, Frequency.DAILY).head(3)
+    assert index.labels() == ["20220101", "20220102", "20220103"]
+    assert index.ordered(descending=True).units() == [
+        {"day": 3},
+        {"day": 2},
+        {"day": 1},
+    ]
+    assert index.select(20220102, 20220131).days() == [2, 3]
+
+
+def test_unsorted_times() -> None:
+    times = np.array(["1895-02", "1895-01"], dtype="datetime64[M]")
+    index = TimeIndex.from_times(times, Frequency.MONTHLY)
+    assert index.labels() == ["189501", "189502"]
+    assert index.units()[0] == {"month": {"idx": 2, "date": "189501"}}
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from stactools.noaa_nclimgrid import timeseries
+from stactools.noaa_nclimgrid.cog import read_time_slice
+from stactools.noaa_nclimgrid.constants import Variable
+from tests import test_data
+
+
+def test_grid_indices() -> None:
+    rows, cols = timeseries.grid_indices(
+        [49.37, 24.57, 40.0], [-124.70, -67.01, -100.0]
+    )
+    assert rows.tolist() == [0, 595, 225]
+    assert cols.tolist() == [0, 1384, 592]
+
+    with pytest.raises(ValueError):
+        timeseries.grid_indices([10.0], [-100.0])
+
+
+@pytest.mark.parametrize(
+    "nc_path",
+    [
+        "data-files/netcdf/monthly/nclimgrid_prcp.nc",
+        "data-files/netcdf/daily/beta/by-month/2022/01/prcp-202201-grd-prelim.nc",
+    ],
+)
+def test_extract_timeseries_matches_time_slices(nc_path: str) -> None:
+    nc_href = test_data.get_path(nc_path)
+    lats = np.array([40.0, 35.5, 45.2])
+    lons = np.array([-100.0, -90.3, -110.8])
+    result = timeseries.extract_timeseries(nc_href, lats, lons, ids=["a", "b", "c"])
+
+    rows, cols = timeseries.grid_indices(lats, lons)
+    num_times = len(result) // len(lats)
+    assert result["id"].tolist() == [
+        point_id for point_id in ["a", "b", "c"] for _ in range(num_times)
+    ]
+    for var in Variable:
+        var_href = nc_href.replace(Variable.PRCP.value, var.value)
+        expected = np.stack(
+            [
+                read_time_slice(var_href, var, time_index)[rows, cols]
+                for time_index in range(num_times)
+            ]
+        )
+        np.testing.assert_array_equal(result[var.value].values, expected.T.ravel())
@@ -1,4 +1,13 @@
-from stactools.noaa_nclimgrid import utils
+import json
+import os
+import shutil
+from datetime import datetime, timedelta, timezone
+from tempfile import TemporaryDirectory
+
+import pystac
+
+from stactools.noaa_nclimgrid import stac, utils
+from stactools.noaa_nclimgrid.constants import Variable
 from tests import test_data
 
 
@@ -22,7 +31,115 @@ def test_month_indices_local() -> None:
     assert len(idx) == 2
 
 
+def test_month_index_range() -> None:
+    nc_href = test_data.get_path("data-files/netcdf/monthly/nclimgrid_prcp.nc")
+    index = utils.month_index(nc_href, month_range=("189502", "189502"))
+    assert index.labels() == ["189502"]
+    assert utils.month_indices(nc_href) == [
+        {"idx": 2, "date": "189502"},
+        {"idx": 1, "date": "189501"},
+    ]
+
+
 def test_month_indices_remote() -> None:
     nc_href = "https://ai4epublictestdata.blob.core.windows.net/stactools/nclimgrid/monthly/nclimgrid_prcp.nc"  # noqa
     idx = utils.month_indices(nc_href)
     assert len(idx) == 2
+
+
+def test_href_expiry() -> None:
+    sas = "https://account.blob.core.windows.net/c/f.nc?st=2022-01-01T00%3A00%3A00Z&se=2022-01-02T00%3A00%3A00Z&sig=x"  # noqa
+    assert utils.href_expiry(sas) == datetime(2022, 1, 2, tzinfo=timezone.utc)
+    presigned = "https://bucket.s3.amazonaws.com/f.nc?X-Amz-Date=20220101T000000Z&X-Amz-Expires=3600&X-Amz-Signature=x"  # noqa
+    assert utils.href_expiry(presigned) == datetime(2022, 1, 1, 1, tzinfo=timezone.utc)
+    assert utils.href_expiry("https://example.com/f.nc") is None
+
+
+def test_cached_read_href_modifier() -> None:
+    calls = 0
+
+    def read_href_modifier(href: str) -> str:
+        nonlocal calls
+        calls += 1
+        expiry = datetime.now(timezone.utc) + timedelta(hours=1)
+        return f"{href}?se={expiry.strftime('%Y-%m-%dT%H:%M:%SZ')}&sig=x"
+
+    cached = utils.CachedReadHrefModifier(read_href_modifier)
+    first = cached("https://example.com/a.nc")
+    assert cached("https://example.com/a.nc") == first
+    assert calls == 1
+    cached("https://example.com/b.nc")
+    assert calls == 2
+    assert utils.cached_read_href_modifier(cached) is cached
+
+
+def test_cached_read_href_modifier_refreshes_before_expiry() -> None:
+    calls = 0
+
+    def read_href_modifier(href: str) -> str:
+        nonlocal calls
+        calls += 1
+        expiry = datetime.now(timezone.utc) + timedelta(minutes=1)
+        return f"{href}?se={expiry.strftime('%Y-%m-%dT%H:%M:%SZ')}&sig=x"
+
+    cached = utils.CachedReadHrefModifier(read_href_modifier, refresh_margin=120)
+    cached("https://example.com/a.nc")
+    cached("https://example.com/a.nc")
+    assert calls == 2
+
+
+def test_save_item() -> None:
+    cog_hrefs = {
+        var: test_data.get_path(
+            f"data-files/cog/monthly/nclimgrid-{var.value}-189501.tif"
+        )
+        for var in Variable
+    }
+    item = stac.create_item(cog_hrefs)
+    with TemporaryDirectory() as tmp_dir:
+        item.set_self_href(os.path.join(tmp_dir, "items", f"{item.id}.json"))
+        item.make_asset_hrefs_relative()
+        utils.save_item(item)
+        with open(item.get_self_href()) as f:
+            saved_dict = json.load(f)
+        assert saved_dict == json.loads(
+            json.dumps(item.to_dict(include_self_link=False))
+        )
+        assert pystac.Item.from_dict(saved_dict).id == item.id
+
+
+def test_relocate_assets() -> None:
+    with TemporaryDirectory() as tmp_dir:
+        cog_hrefs = {}
+        for var in Variable:
+            cog_hrefs[var] = os.path.join(
+                tmp_dir, "cogs", f"nclimgrid-{var.value}-189501.tif"
+            )
+            os.makedirs(os.path.dirname(cog_hrefs[var]), exist_ok=True)
+            shutil.copyfile(
+                test_data.get_path(
+                    f"data-files/cog/monthly/nclimgrid-{var.value}-189501.tif"
+                ),
+                cog_hrefs[var],
+            )
+        item = stac.create_item(cog_hrefs)
+        item.set_self_href(os.path.join(tmp_dir, "copied", f"{item.id}.json"))
+
+        keys = [var.value for var in Variable]
+        assert utils.relocate_assets([item], keys, copy=True) == 4
+        for var in Variable:
+            assert os.path.exists(cog_hrefs[var])
+            assert os.path.dirname(item.assets[var].href) == os.path.join(
+                tmp_dir, "copied"
+            )
+            assert os.path.exists(item.assets[var].href)
+
+        item.set_self_href(os.path.join(tmp_dir, "moved", f"{item.id}.json"))
+        assert utils.relocate_assets([item], keys) == 4
+        assert utils.relocate_assets([item], keys) == 0
+        for var in Variable:
+            assert os.path.exists(cog_hrefs[var])
+            assert not os.path.exists(
+                os.path.join(tmp_dir, "copied", os.path.basename(cog_hrefs[var]))
+            )
+            assert os.path.exists(item.assets[var].href)
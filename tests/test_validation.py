@@ -0,0 +1,63 @@
+import os
+from tempfile import TemporaryDirectory
+from typing import Any, Dict
+
+import numpy as np
+import rasterio
+
+from stactools.noaa_nclimgrid import stac
+from stactools.noaa_nclimgrid.validation import validate_cog, validate_cogs
+from tests import test_data
+
+COG = test_data.get_path("data-files/cog/monthly/nclimgrid-prcp-189501.tif")
+
+
+def _write(path: str, **profile: Any) -> str:
+    options: Dict[str, Any] = {
+        "driver": "GTiff",
+        "width": 1200,
+        "height": 600,
+        "count": 1,
+        "dtype": "float32",
+    }
+    options.update(profile)
+    with rasterio.open(path, "w", **options) as dst:
+        dst.write(np.ones((1, 600, 1200), dtype="float32"))
+    return path
+
+
+def test_validate_cog() -> None:
+    assert validate_cog(COG) == []
+
+
+def test_validate_striped_tiff() -> None:
+    with TemporaryDirectory() as tmp_dir:
+        errors = validate_cog(_write(os.path.join(tmp_dir, "striped.tif")))
+    assert "Not tiled" in errors
+    assert "Missing the COG layout marker (LAYOUT=COG)" in errors
+    assert "Missing overviews" in errors
+
+
+def test_validate_block_size() -> None:
+    with TemporaryDirectory() as tmp_dir:
+        path = _write(os.path.join(tmp_dir, "small.tif"), driver="COG", blocksize=256)
+        errors = validate_cog(path)
+        assert errors == ["Tiles are [(256, 256)], not 512x512"]
+        assert validate_cog(path, blocksize=256) == []
+
+
+def test_validate_cogs() -> None:
+    with TemporaryDirectory() as tmp_dir:
+        striped = _write(os.path.join(tmp_dir, "striped.tif"))
+        missing = os.path.join(tmp_dir, "missing.tif")
+        results = validate_cogs([COG, striped, missing])
+    assert results[COG] == []
+    assert "Not tiled" in results[striped]
+    assert results[missing][0].startswith("Unreadable")
+
+
+def test_create_items_validate_cogs() -> None:
+    nc_href = test_data.get_path("data-files/netcdf/monthly/nclimgrid_prcp.nc")
+    with TemporaryDirectory() as cog_dir:
+        items, cogs = stac.create_items(nc_href, cog_dir, validate_cogs=True)
+        assert len(cogs) == 8
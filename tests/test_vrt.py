@@ -0,0 +1,29 @@
+import os
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import rasterio
+
+from stactools.noaa_nclimgrid import stac, vrt
+from stactools.noaa_nclimgrid.constants import Variable
+from tests import test_data
+
+
+def test_create_time_stack_vrt() -> None:
+    nc_href = test_data.get_path("data-files/netcdf/monthly/nclimgrid_prcp.nc")
+    with TemporaryDirectory() as tmp_dir:
+        items, _ = stac.create_items(nc_href, tmp_dir)
+        vrt_path = os.path.join(tmp_dir, "prcp.vrt")
+        # Items are created newest first; bands are in time order.
+        assert vrt.create_time_stack_vrt(items, Variable.PRCP, vrt_path) == 2
+
+        with rasterio.open(vrt_path) as dataset:
+            assert dataset.count == 2
+            assert dataset.crs.to_epsg() == 4326
+            assert dataset.descriptions[0] == "1895-01-01T00:00:00Z"
+            assert dataset.tags(1)["item_id"] == "nclimgrid-189501"
+            transform = dataset.transform
+            values = dataset.read(1)
+        with rasterio.open(items[-1].assets[Variable.PRCP].href) as dataset:
+            assert dataset.transform == transform
+            assert np.array_equal(values, dataset.read(1), equal_nan=True)
@@ -0,0 +1,111 @@
+import io
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+from tempfile import TemporaryDirectory
+from typing import Any, Dict
+
+import pytest
+
+from stactools.noaa_nclimgrid.worker import Worker, WorkerServer, serve_stream
+from tests import test_data
+
+
+def test_worker_keeps_datasets_open() -> None:
+    nc_href = test_data.get_path("data-files/netcdf/monthly/nclimgrid_prcp.nc")
+    with TemporaryDirectory() as cog_dir:
+        worker = Worker(cog_dir)
+        first = worker.run(
+            {"href": nc_href, "month_range": ["189501", "189501"], "nc_assets": True}
+        )
+        assert [item["id"] for item in first["items"]] == ["nclimgrid-189501"]
+        assert len(first["cogs"]) == 4
+        misses = worker.status()["dataset_misses"]
+
+        second = worker.run(
+            {"href": nc_href, "month_range": ["189502", "189502"], "nc_assets": True}
+        )
+        assert [item["id"] for item in second["items"]] == ["nclimgrid-189502"]
+        assert len(second["items"][0]["assets"]) == 8
+        status = worker.status()
+        assert status["jobs"] == 2
+        assert status["dataset_misses"] == misses
+        assert status["dataset_hits"] > 0
+        # An xarray dataset and a SliceReader per variable.
+        assert status["open_datasets"] == 8
+        worker.close()
+        assert worker.status()["open_datasets"] == 0
+
+
+def test_worker_rejects_invalid_jobs() -> None:
+    with TemporaryDirectory() as cog_dir:
+        worker = Worker(cog_dir)
+        with pytest.raises(ValueError):
+            worker.run({"month_range": ["189501", "189501"]})
+        with pytest.raises(ValueError):
+            worker.run({"href": "nclimgrid_prcp.nc", "range": [1, 2]})
+        with pytest.raises(ValueError):
+            worker.run({"href": "nclimgrid_prcp.nc", "day_range": [1]})
+
+
+def test_serve_stream() -> None:
+    nc_href = test_data.get_path("data-files/netcdf/monthly/nclimgrid_prcp.nc")
+    with TemporaryDirectory() as cog_dir:
+        worker = Worker(cog_dir)
+        jobs = [
+            {"href": nc_href, "month_range": ["189501", "189501"]},
+            {"href": os.path.join(cog_dir, "nclimgrid_prcp.nc")},
+            {"href": nc_href, "month_range": ["189502", "189502"]},
+        ]
+        input = io.StringIO("\n".join(json.dumps(job) for job in jobs) + "\n\n")
+        output = io.StringIO()
+        assert serve_stream(worker, input, output) == 1
+        results = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert len(results) == 3
+        assert results[0]["items"][0]["id"] == "nclimgrid-189501"
+        assert "error" in results[1]
+        assert results[2]["items"][0]["id"] == "nclimgrid-189502"
+        assert worker.status()["failures"] == 1
+        worker.close()
+
+
+def _post(url: str, job: Any) -> Dict[str, Any]:
+    request = urllib.request.Request(
+        url, data=json.dumps(job).encode("utf-8"), method="POST"
+    )
+    with urllib.request.urlopen(request) as response:
+        result: Dict[str, Any] = json.load(response)
+    return result
+
+
+def test_worker_server() -> None:
+    nc_href = test_data.get_path("data-files/netcdf/monthly/nclimgrid_prcp.nc")
+    with TemporaryDirectory() as cog_dir:
+        worker = Worker(cog_dir)
+        server = WorkerServer(worker, ("127.0.0.1", 0))
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            result = _post(
+                f"{server.url}/items",
+                {"href": nc_href, "month_range": ["189501", "189501"]},
+            )
+            assert result["items"][0]["id"] == "nclimgrid-189501"
+
+            with pytest.raises(urllib.error.HTTPError) as error:
+                _post(f"{server.url}/items", {"month_range": ["189501", "189501"]})
+            assert error.value.code == 400
+            with pytest.raises(urllib.error.HTTPError) as error:
+                _post(f"{server.url}/items", {"href": f"{cog_dir}/prcp.nc"})
+            assert error.value.code == 500
+
+            with urllib.request.urlopen(f"{server.url}/status") as response:
+                status = json.load(response)
+            assert status["jobs"] == 2
+            assert status["failures"] == 1
+        finally:
+            server.shutdown()
+            server.server_close()
+            worker.close()